@@ -1,10 +1,13 @@
+import json
 from fastapi import FastAPI, Depends
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from typing import Annotated
 
 from engine.executor import PKAdmin
+from storage.disk.checkpointer import get_checkpointer
 
 pk_admin_instance = None
 
@@ -13,7 +16,9 @@ pk_admin_instance = None
 async def lifespan(app: FastAPI):
     global pk_admin_instance
     pk_admin_instance = PKAdmin()
+    get_checkpointer().start()
     yield
+    get_checkpointer().stop()
 
 # app
 app = FastAPI(lifespan=lifespan)
@@ -50,7 +55,18 @@ async def get_schemas(pk_admin: PKAdminDep, db_name: str):
 async def get_schemas(pk_admin: PKAdminDep, db_name: str, schema_name: str):
     return pk_admin.catalog.get_tables_json(db_name, schema_name)
 
+@app.get("/checkpoint")
+async def get_checkpoint_stats(pk_admin: PKAdminDep):
+    return get_checkpointer().get_stats()
+
 @app.post("/execute")
 async def execute_query(pk_admin: PKAdminDep, body: Query):
     result = pk_admin.execute(body.query)
-    return result
\ No newline at end of file
+    return result
+
+@app.post("/stream")
+async def stream_query(pk_admin: PKAdminDep, body: Query):
+    # one JSON row per line, sent while the query runs
+    rows = pk_admin.stream(body.query)
+    lines = (json.dumps(row, default=str) + "\n" for row in rows)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
@@ -8,13 +8,17 @@ from catalog.schema import Schema
 from catalog.table import Table
 from catalog.column import Column
 from catalog.index import Index
+from catalog.statistics import TableStatistics, DEFAULT_SAMPLE_ROWS, collect_statistics, needs_analyze
 from storage.disk.path_builder import PathBuilder
 from storage.disk.file_manager import FileManager
+from storage.disk.paged_file import open_write_ahead_log
 from models.enum.data_type_enum import DataTypeTag
 from models.enum.index_enum import IndexType
+from storage.indexing.heap import HeapFile
 from storage.indexing.rtree_wrapper import RTree
 from storage.indexing.bplus_tree import BPlusTreeFile
 from storage.indexing.hashing import ExtendibleHashingFile
+from storage.indexing.linear_hashing import LinearHashingFile
 from storage.indexing.isam import ISAMFile
 
 VERSION = "0.0.1"
@@ -30,6 +34,7 @@ class CatalogManager:
         self.system_catalog_path = data_directory / "system/catalog.dat"
         self.file_manager        = FileManager(data_directory)
         self.path_builder        = PathBuilder(data_directory)
+        self.modifications: dict[tuple[str, str, str], int] = {}  # rows written, not yet stored
         
         if not data_directory.exists():
             os.makedirs(data_directory, exist_ok=True)
@@ -38,6 +43,9 @@ class CatalogManager:
             path_system = self.path_builder.system_dir("system")
             self.file_manager.create_directory(path_system)
 
+        # redo whatever the log has that did not reach the data files
+        self.wal = open_write_ahead_log(self.path_builder.system_dir("system") / "wal", data_directory)
+
         self.global_catalog = GlobalCatalog(
             databases={},
             version=VERSION,
@@ -124,7 +132,8 @@ class CatalogManager:
                      index_name:    str,
                      index_type:    int,
                      index_colum:   int = 0,
-                     index_is_primary: bool = False
+                     index_is_primary: bool = False,
+                     index_bloom: bool = False
                      ) -> None:
         path_meta   = self.path_builder.table_meta(db_name, schema_name, table_name)
         path_idx    = self.path_builder.table_index(db_name, schema_name, table_name, index_name)
@@ -138,7 +147,8 @@ class CatalogManager:
             idx_file     = path_idx,
             idx_tuples   = 0,
             idx_columns  = [index_colum],
-            idx_is_primary = index_is_primary
+            idx_is_primary = index_is_primary,
+            idx_bloom    = index_bloom
         )
         table.add_index(index)
         self.file_manager.write_data(table, path_meta)
@@ -148,6 +158,45 @@ class CatalogManager:
         else:
             self.file_manager.create_file(path_idx)
 
+    def analyze_table(self,
+                      db_name:     str,
+                      schema_name: str,
+                      table_name:  str,
+                      sample_rows: int = DEFAULT_SAMPLE_ROWS
+                      ) -> TableStatistics:
+        path_meta = self.path_builder.table_meta(db_name, schema_name, table_name)
+        path_data = self.path_builder.table_data(db_name, schema_name, table_name)
+        table: Table = self.file_manager.read_data(path_meta)
+        with HeapFile(table, path_data) as heap:
+            statistics = collect_statistics(table, heap, sample_rows)
+        table.set_tab_statistics(statistics)
+        self.file_manager.write_data(table, path_meta)
+        return statistics
+
+    def count_modifications(self,
+                            db_name:     str,
+                            schema_name: str,
+                            table_name:  str,
+                            rows:        int
+                            ) -> None:
+        # rows inserted or deleted by the running statement; they are added
+        # to the table at its end, in analyze_stale_tables
+        key = (db_name, schema_name, table_name)
+        self.modifications[key] = self.modifications.get(key, 0) + rows
+
+    def analyze_stale_tables(self) -> None:
+        # run at the end of each statement: the rows it wrote are stored with
+        # the table, so the count survives a restart, and tables written past
+        # the threshold since their last ANALYZE are analyzed again
+        modifications, self.modifications = self.modifications, {}
+        for (db_name, schema_name, table_name), rows in modifications.items():
+            path_meta = self.path_builder.table_meta(db_name, schema_name, table_name)
+            table: Table = self.file_manager.read_data(path_meta)
+            table.add_tab_modifications(rows)
+            self.file_manager.write_data(table, path_meta)
+            if needs_analyze(table.get_tab_tuples(), table.get_tab_modifications()):
+                self.analyze_table(db_name, schema_name, table_name)
+
     # /////////////////////////////////////////////////////////////////////////////////////////    
     def get_version(self) -> str:
         return self.global_catalog.version
@@ -230,49 +279,60 @@ class CatalogManager:
                         table_name:  str
                         ) -> dict:
         table   = self.get_table(db_name, schema_name, table_name)
-        columns = table.get_tab_columns()
         callbacks = {}
 
         for index in table.get_tab_indexes():
-            col_pos  = index.get_idx_columns()[0]
-            column   = columns[col_pos]
-            dtype    = column.get_att_to_type_id()
-            max_len  = column.get_att_len()
-            idx_type = index.get_idx_type()
-            idx_file = str(index.get_idx_file())
-
-            if idx_type in (IndexType.SEQUENTIAL.value, IndexType.HASH.value):
-                idx_obj = ExtendibleHashingFile(
-                    index_filename=idx_file,
-                    data_type=dtype,
-                    max_key_len=max_len
-                )
-            elif idx_type == IndexType.ISAM.value:
-                idx_obj = ISAMFile(
-                    index_filename=idx_file,
-                    data_type=dtype,
-                    max_key_len=max_len
-                )
-            elif idx_type == IndexType.BTREE.value:
-                idx_obj = BPlusTreeFile(
-                    index_filename=idx_file,
-                    data_type=dtype,
-                    max_key_len=max_len,
-                    order=4
-                )
-            elif idx_type == IndexType.RTREE.value:
-                idx_obj = RTree(filename=idx_file)
-            else:
-                idx_obj = ExtendibleHashingFile(
-                    index_filename=idx_file,
-                    data_type=dtype,
-                    max_key_len=max_len
-                )
-
-            callbacks[index.get_idx_id()] = (idx_obj, col_pos)
+            callbacks[index.get_idx_id()] = (self.open_index(table, index), index.get_idx_columns()[0])
 
         return callbacks
 
+    def open_index(self, table: Table, index: Index):
+        column   = table.get_tab_columns()[index.get_idx_columns()[0]]
+        dtype    = column.get_att_to_type_id()
+        max_len  = column.get_att_len()
+        idx_type = index.get_idx_type()
+        idx_file = str(index.get_idx_file())
+
+        if idx_type in (IndexType.SEQUENTIAL.value, IndexType.HASH.value):
+            return ExtendibleHashingFile(
+                index_filename=idx_file,
+                data_type=dtype,
+                max_key_len=max_len,
+                unique=index.get_idx_is_primary(),
+                bloom=index.get_idx_bloom()
+            )
+        elif idx_type == IndexType.ISAM.value:
+            return ISAMFile(
+                index_filename=idx_file,
+                data_type=dtype,
+                max_key_len=max_len
+            )
+        elif idx_type == IndexType.BTREE.value:
+            return BPlusTreeFile(
+                index_filename=idx_file,
+                data_type=dtype,
+                max_key_len=max_len,
+                unique=index.get_idx_is_primary(),
+                bloom=index.get_idx_bloom()
+            )
+        elif idx_type == IndexType.LINEAR_HASH.value:
+            return LinearHashingFile(
+                index_filename=idx_file,
+                data_type=dtype,
+                max_key_len=max_len,
+                unique=index.get_idx_is_primary(),
+                bloom=index.get_idx_bloom()
+            )
+        elif idx_type == IndexType.RTREE.value:
+            return RTree(filename=idx_file)
+        return ExtendibleHashingFile(
+            index_filename=idx_file,
+            data_type=dtype,
+            max_key_len=max_len,
+            unique=index.get_idx_is_primary(),
+            bloom=index.get_idx_bloom()
+        )
+
     # /////////////////////////////////////////////////////////////////////////////////////////
     def generate_database_id(self) -> int:
         return max((db.get_id() for db in self.global_catalog.databases.values()), default=0) + 1
@@ -10,6 +10,7 @@ class Index:
     idx_tuples: int
     idx_columns: list[int]  # column positions
     idx_is_primary: bool
+    idx_bloom: bool = False  # keys mirrored in a Bloom filter sidecar
 
     # GETTERS
     def get_idx_id(self) -> int:
@@ -31,4 +32,7 @@ class Index:
         return self.idx_columns.copy()
 
     def get_idx_is_primary(self) -> bool:
-        return self.idx_is_primary
\ No newline at end of file
+        return self.idx_is_primary
+
+    def get_idx_bloom(self) -> bool:
+        return self.idx_bloom
\ No newline at end of file
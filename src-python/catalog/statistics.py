@@ -0,0 +1,174 @@
+import random
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+DEFAULT_SAMPLE_ROWS = 30000  # 300 x the statistics target, as in PostgreSQL
+STATISTICS_TARGET = 100  # most common values and histogram buckets per column
+
+# autoanalyze thresholds of PostgreSQL: the statistics of a table are
+# refreshed once the rows written since the last ANALYZE pass them
+ANALYZE_BASE_THRESHOLD = 50
+ANALYZE_SCALE_FACTOR = 0.1
+
+# Statistics of one column, computed from a sample. Values in mcv are
+# kept with their frequency; the histogram splits the remaining values in
+# buckets holding the same number of rows (equi-depth), so an estimate
+# adds the matching common values to the covered part of the histogram.
+# n_distinct < 0 means a fraction of the rows, so it grows with the table.
+@dataclass
+class ColumnStatistics:
+    null_frac: float
+    n_distinct: float
+    min_value: any = None
+    max_value: any = None
+    mcv: list[tuple[any, float]] = field(default_factory=list)  # (value, frequency)
+    histogram: list[any] = field(default_factory=list)  # bucket bounds
+
+    def get_distinct(self, rows: float) -> float:
+        return -self.n_distinct * rows if self.n_distinct < 0 else self.n_distinct
+
+    def eq_fraction(self, value, rows: float) -> float | None:
+        # fraction of the rows equal to value; None if it can not be compared
+        if value is None:
+            return 0.0
+        try:
+            for common, frequency in self.mcv:
+                if common == value:
+                    return frequency
+            if self.min_value is not None and not self.min_value <= value <= self.max_value:
+                return 0.0
+        except TypeError:
+            return None
+        others = self.get_distinct(rows) - len(self.mcv)
+        if others < 1:
+            return 0.0
+        return self._rest() / others
+
+    def range_fraction(self, low, high) -> float | None:
+        # fraction of the rows between low and high (None is unbounded)
+        try:
+            common = sum(frequency for value, frequency in self.mcv
+                         if (low is None or value >= low) and (high is None or value <= high))
+            if len(self.histogram) < 2:
+                covered = 0.5
+            else:
+                covered = max(0.0, self._position(high, 1.0) - self._position(low, 0.0))
+        except TypeError:
+            return None
+        return min(1.0, common + self._rest() * covered)
+
+    def _rest(self) -> float:
+        return max(0.0, 1.0 - self.null_frac - sum(frequency for _, frequency in self.mcv))
+
+    def _position(self, value, default: float) -> float:
+        # fraction of the histogram below value, interpolated inside the
+        # bucket for numbers
+        if value is None:
+            return default
+        bounds = self.histogram
+        if value <= bounds[0]:
+            return 0.0
+        if value >= bounds[-1]:
+            return 1.0
+        i = bisect_right(bounds, value) - 1
+        low, high = bounds[i], bounds[i + 1]
+        within = 0.5
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (value, low, high)) and high > low:
+            within = (value - low) / (high - low)
+        return (i + within) / (len(bounds) - 1)
+
+@dataclass
+class TableStatistics:
+    rows: float
+    pages: int
+    sample_rows: int
+    columns: dict[str, ColumnStatistics]  # by lower case column name
+    analyzed_at: datetime
+
+    def get_column(self, name: str) -> ColumnStatistics | None:
+        return self.columns.get(name.lower())
+
+# ANALYZE. The sample is taken in two stages as in PostgreSQL: a random set
+# of pages, then a reservoir (algorithm R) over the live rows on them, so
+# a big table is never read whole and every row has the same chance to be
+# in the sample. The row count is extrapolated from the sampled pages.
+def collect_statistics(table, heap, sample_size: int = DEFAULT_SAMPLE_ROWS,
+                       rng: random.Random | None = None) -> TableStatistics:
+    rng = rng or random.Random()
+    sample, rows = sample_rows(heap, sample_size, rng)
+    columns = {}
+    for position, column in enumerate(table.get_tab_columns()):
+        values = [row[position] for row in sample]
+        columns[column.get_att_name().lower()] = column_statistics(values, rows)
+    return TableStatistics(rows, heap.get_page_count(), len(sample), columns, datetime.now(timezone.utc))
+
+def sample_rows(heap, sample_size: int, rng: random.Random) -> tuple[list[tuple], float]:
+    pages = heap.get_page_count()
+    page_nos = sorted(rng.sample(range(pages), min(pages, sample_size)))
+    reservoir = []
+    seen = 0
+    for _, row, active in heap.scan(page_nos):
+        if not active:
+            continue
+        seen += 1
+        if len(reservoir) < sample_size:
+            reservoir.append(row)
+        else:
+            j = rng.randrange(seen)
+            if j < sample_size:
+                reservoir[j] = row
+    rows = seen * pages / len(page_nos) if page_nos else 0.0
+    return reservoir, rows
+
+def column_statistics(values: list, rows: float) -> ColumnStatistics:
+    non_null = [value for value in values if value is not None]
+    null_frac = 1.0 - len(non_null) / len(values) if values else 0.0
+    if not non_null:
+        return ColumnStatistics(null_frac, 0.0)
+
+    counts = Counter(non_null)
+    singles = sum(1 for count in counts.values() if count == 1)
+    n_distinct = estimate_distinct(len(counts), singles, len(non_null), rows * (1.0 - null_frac))
+
+    if singles == 0 and len(counts) <= STATISTICS_TARGET:
+        # every value was seen more than once: the list holds all of them
+        common = counts.most_common()
+    else:
+        average = len(non_null) / len(counts)
+        common = [(value, count) for value, count in counts.most_common(STATISTICS_TARGET)
+                  if count > 1 and count > 1.25 * average]
+    mcv = [(value, count / len(values)) for value, count in common]
+
+    try:
+        in_mcv = {value for value, _ in common}
+        rest = sorted(value for value in non_null if value not in in_mcv)
+        low, high = min(non_null), max(non_null)
+    except TypeError:
+        # values that can not be ordered get no range statistics
+        return ColumnStatistics(null_frac, n_distinct, mcv=mcv)
+    return ColumnStatistics(null_frac, n_distinct, low, high, mcv, histogram_bounds(rest, STATISTICS_TARGET))
+
+def estimate_distinct(distinct: int, singles: int, sample: int, rows: float) -> float:
+    # Haas and Stokes' Duj1 estimator, the one PostgreSQL uses; stored as
+    # a negative fraction of the rows when it scales with the table
+    if sample >= rows or singles == 0:
+        estimate = float(distinct)
+    elif singles == distinct:
+        return -1.0  # every sampled value is unique
+    else:
+        estimate = sample * distinct / (sample - singles + singles * sample / rows)
+        estimate = min(max(estimate, distinct), rows)
+    if rows > 0 and estimate > 0.1 * rows:
+        return -estimate / rows
+    return estimate
+
+def histogram_bounds(values: list, buckets: int) -> list:
+    if len(values) < 2:
+        return []
+    buckets = min(buckets, len(values) - 1)
+    return [values[i * (len(values) - 1) // buckets] for i in range(buckets + 1)]
+
+def needs_analyze(tuples: int, modifications: int) -> bool:
+    return modifications > ANALYZE_BASE_THRESHOLD + ANALYZE_SCALE_FACTOR * tuples
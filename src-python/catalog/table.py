@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from catalog.column import Column
 from catalog.index import Index
+from catalog.statistics import TableStatistics
 
 @dataclass
 class Table:
@@ -12,6 +13,8 @@ class Table:
     tab_page_size: int  # size of page
     tab_columns: list[Column] = field(default_factory=list)
     tab_indexes: list[Index] = field(default_factory=list)
+    tab_statistics: TableStatistics | None = None  # set by ANALYZE
+    tab_modifications: int = 0  # rows inserted or deleted since the last ANALYZE
 
     # GETTERS
     def get_tab_id(self) -> int:
@@ -38,9 +41,30 @@ class Table:
     def get_tab_indexes(self) -> list[Index]:
         return self.tab_indexes.copy()
 
+    def get_tab_statistics(self) -> TableStatistics | None:
+        return self.tab_statistics
+
+    def get_tab_modifications(self) -> int:
+        return self.tab_modifications
+
     # METHODS
     def add_column(self, column: Column) -> None:
         self.tab_columns.append(column)
 
     def add_index(self, index: Index) -> None:
-        self.tab_indexes.append(index)
\ No newline at end of file
+        self.tab_indexes.append(index)
+
+    def add_tab_modifications(self, rows: int) -> None:
+        self.tab_modifications += rows
+
+    def set_tab_statistics(self, statistics: TableStatistics) -> None:
+        # the row and page counts of the table and its indexes come along
+        self.tab_statistics = statistics
+        self.tab_modifications = 0
+        self.tab_tuples = round(statistics.rows)
+        self.tab_pages = statistics.pages
+        for index in self.tab_indexes:
+            column = self.tab_columns[index.get_idx_columns()[0]]
+            column_stats = statistics.get_column(column.get_att_name())
+            null_frac = column_stats.null_frac if column_stats is not None else 0.0
+            index.idx_tuples = round(statistics.rows * (1.0 - null_frac))
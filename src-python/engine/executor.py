@@ -8,12 +8,17 @@ from engine.operators.insert import Insert
 from engine.operators.select import Select
 from engine.operators.delete import Delete
 from engine.operators.copy import Copy
+from engine.operators.vacuum import Vacuum
+from engine.operators.analyze import Analyze
 from catalog.catalog_manager import CatalogManager
+from models.enum.durability_enum import Durability
+from storage.disk.paged_file import commit_paged_files
 
 @dataclass
 class PKAdmin:
     catalog: CatalogManager = field(default_factory=lambda: CatalogManager(Path("data")))
     search_path: str = field(default="postgres/public")
+    durability: Durability = field(default=Durability.STATEMENT)
 
     def execute(self, sql: str) -> None:
         exprs = parser_sql(sql)
@@ -26,19 +31,35 @@ class PKAdmin:
                 create = Create(self.catalog)
                 result = create.execute(expr)
             elif isinstance(expr, exp.Insert):
-                insert = Insert(self.catalog)
+                insert = Insert(self.catalog, self.durability)
                 result = insert.execute(expr)
             elif isinstance(expr, exp.Select):
                 select = Select(self.catalog)
                 result = select.execute(expr)
             elif isinstance(expr, exp.Copy):
-                copy = Copy(self.catalog)
+                copy = Copy(self.catalog, self.durability)
                 result = copy.execute(expr)
             elif isinstance(expr, exp.Delete):
                 select = Delete(self.catalog)
                 result = select.execute(expr)
             elif isinstance(expr, exp.Update):
                 pass
+            elif isinstance(expr, exp.Command) and expr.this.upper() == "VACUUM":
+                vacuum = Vacuum(self.catalog)
+                result = vacuum.execute(expr)
+            elif isinstance(expr, exp.Analyze):
+                analyze = Analyze(self.catalog)
+                result = analyze.execute(expr)
             else:
                 print(f"Undefined: {type(expr)}")
-        return result
\ No newline at end of file
+            # dirty pages stay in the buffer pool during the statement
+            commit_paged_files(sync=self.durability == Durability.COMMIT)
+            self.catalog.analyze_stale_tables()
+        return result
+
+    def stream(self, sql: str):
+        # rows of a single SELECT, read as they are consumed
+        exprs = parser_sql(sql)
+        if len(exprs) != 1 or not isinstance(exprs[0], exp.Select):
+            raise ValueError("Error: solo se puede transmitir una única sentencia SELECT")
+        return Select(self.catalog).stream(exprs[0])
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from sqlglot import expressions as exp
+
+from catalog.catalog_manager import CatalogManager
+from catalog.statistics import DEFAULT_SAMPLE_ROWS
+
+# ANALYZE [table]: samples the heap of the table, or of every table when
+# none is given, and stores its statistics in the table metadata for the
+# planner (see catalog/statistics.py).
+@dataclass
+class Analyze:
+    catalog: CatalogManager
+    sample_rows: int = DEFAULT_SAMPLE_ROWS
+
+    def execute(self, expr: exp.Analyze) -> str:
+        tables = [(table.catalog, table.db, table.name) for table in expr.find_all(exp.Table)]
+        if not tables:
+            tables = [(db_name, schema_name, table_name)
+                      for db_name in self.catalog.get_database_names()
+                      for schema_name in self.catalog.get_schemas_name(db_name)
+                      for table_name in self.catalog.get_tables_name(db_name, schema_name)]
+        for db_name, schema_name, table_name in tables:
+            self.catalog.analyze_table(db_name, schema_name, table_name, self.sample_rows)
+        return f"{len(tables)} tables analyzed"
@@ -1,26 +1,31 @@
 from dataclasses import dataclass
 import csv
+from itertools import islice
 from pathlib import Path
 from sqlglot import expressions as exp
 from catalog.catalog_manager import CatalogManager
 from engine.operators.insert import Insert
+from models.enum.durability_enum import Durability
 from query.parser_sql import get_copy_info
 
 @dataclass
 class Copy:
     catalog: CatalogManager
+    durability: Durability = Durability.STATEMENT
+    batch_size: int = 1000
 
     def execute(self, expr: exp.Copy):
         db, schema, table, filepath = get_copy_info(expr)
-        insert_engine = Insert(self.catalog)
+        insert_engine = Insert(self.catalog, self.durability)
 
         with open(filepath, newline='', encoding='utf-8') as csvfile:
             reader = csv.reader(csvfile)
             next(reader)
-            for row in reader:
-                insert_engine.execute_from_tuple(
+            # rows go to the heap in batches, each one packed and written at once
+            while batch := [tuple(row) for row in islice(reader, self.batch_size)]:
+                insert_engine.execute_from_tuples(
                     db_name=db,
                     schema_name=schema,
                     table_name=table,
-                    values=tuple(row)
-                )
\ No newline at end of file
+                    rows=batch
+                )
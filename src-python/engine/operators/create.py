@@ -1,12 +1,12 @@
 from dataclasses import dataclass 
 from sqlglot import expressions as exp
-import os
 
 from catalog.catalog_manager import CatalogManager
 from catalog.column import Column
 from storage.indexing.heap import HeapFile
 from storage.indexing.isam import ISAMFile
 from storage.indexing.hashing import ExtendibleHashingFile
+from storage.indexing.linear_hashing import LinearHashingFile
 from storage.indexing.bplus_tree import BPlusTreeFile
 from models.enum.index_enum import IndexType
 from query.parser_sql import (
@@ -17,6 +17,7 @@ from query.parser_sql import (
     get_name,
     get_index_type,
     get_column_name,
+    get_index_options,
 )
 
 @dataclass
@@ -73,6 +74,8 @@ class Create:
         index_name: str = get_name(expr)
         index_type: str = get_index_type(expr).upper()
         column_name: str = get_column_name(expr).lower()
+        options: dict = get_index_options(expr)
+        index_bloom = bool(options.get("bloom", False))
         index_column = self.catalog.get_position_column_by_name(
             db_name,
             schema_name,
@@ -87,15 +90,16 @@ class Create:
             index_type=IndexType[index_type].value,
             index_colum=index_column,
             index_is_primary=False,
+            index_bloom=index_bloom,
         )
         path_data = self.catalog.path_builder.table_data(db_name, schema_name, table_name)
         path_index = self.catalog.path_builder.table_index(db_name, schema_name, table_name, index_name)
 
-        if os.path.getsize(path_data) != 0:
-            table = self.catalog.get_table(db_name, schema_name, table_name)
-            with HeapFile(table, path_data) as heap:
+        table = self.catalog.get_table(db_name, schema_name, table_name)
+        with HeapFile(table, path_data) as heap:
+            # the rows may still be only in the buffer pool and the log
+            if heap.get_page_count() != 0:
                 if IndexType[index_type] == IndexType.ISAM:
-                    block_factor = 10                    
                     column: Column = table.get_tab_columns()[index_column]
                     data_type = column.get_att_to_type_id()
                     max_key_len = column.get_att_len()
@@ -104,22 +108,7 @@ class Create:
                         data_type=data_type,
                         max_key_len=max_key_len,
                     )
-
-                    record_id = 0
-                    records_processed = 0
-                    
-                    while True:
-                        record_data = heap.read_record(record_id)
-                        if record_data is None:
-                            break
-                        data_tuple, is_active = record_data
-                        if is_active:
-                            key = data_tuple[index_column]
-                            if records_processed % block_factor == 0:
-                                logical_position = records_processed // block_factor
-                                isam_file.insert(key, logical_position)
-                            records_processed += 1
-                        record_id += 1
+                    isam_file.build(data_tuple[index_column] for _, data_tuple, is_active in heap.scan() if is_active)
 
                 elif IndexType[index_type] == IndexType.BTREE:
                     column: Column = table.get_tab_columns()[index_column]
@@ -129,18 +118,15 @@ class Create:
                         index_filename=path_index,
                         data_type=data_type,
                         max_key_len=max_key_len,
-                        order=4
-                    )  
-                    record_id = 0
-                    while True:
-                        record_data = heap.read_record(record_id)
-                        if record_data is None:
-                            break
-                        data_tuple, is_active = record_data
-                        if is_active:
-                            key = data_tuple[index_column]
-                            btree_file.insert(key, record_id)
-                        record_id += 1
+                        unique=False,
+                        bloom=index_bloom
+                    )
+                    fill_factor = options.get("fillfactor", 100 * BPlusTreeFile.DEFAULT_FILL_FACTOR) / 100
+                    btree_file.bulk_load(
+                        ((data_tuple[index_column], record_id)
+                         for record_id, data_tuple, is_active in heap.scan() if is_active),
+                        fill_factor=fill_factor,
+                    )
 
                 elif IndexType[index_type] == IndexType.HASH:
                     column: Column = table.get_tab_columns()[index_column]
@@ -149,19 +135,29 @@ class Create:
                     hash_file = ExtendibleHashingFile(
                         index_filename=path_index, 
                         data_type=data_type,
-                        max_key_len=max_key_len
+                        max_key_len=max_key_len,
+                        unique=False,
+                        bloom=index_bloom
                     )
 
-                    record_id = 0
-                    while True:
-                        record_data = heap.read_record(record_id)
-                        if record_data is None:
-                            break
-                        data_tuple, is_active = record_data
+                    for record_id, data_tuple, is_active in heap.scan():
                         if is_active:
                             key = data_tuple[index_column]
                             hash_file.insert(key, record_id)
-                        record_id += 1
+
+                elif IndexType[index_type] == IndexType.LINEAR_HASH:
+                    column: Column = table.get_tab_columns()[index_column]
+                    hash_file = LinearHashingFile(
+                        index_filename=path_index,
+                        data_type=column.get_att_to_type_id(),
+                        max_key_len=column.get_att_len(),
+                        unique=False,
+                        bloom=index_bloom
+                    )
+
+                    for record_id, data_tuple, is_active in heap.scan():
+                        if is_active:
+                            hash_file.insert(data_tuple[index_column], record_id)
 
                 elif IndexType[index_type] == IndexType.RTREE:
                     pass
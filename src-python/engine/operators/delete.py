@@ -3,6 +3,8 @@ from sqlglot import expressions as exp
 
 from catalog.catalog_manager import CatalogManager
 from storage.indexing.heap import HeapFile
+from storage.indexing.isam import ISAMFile
+from storage.indexing.rtree_wrapper import RTree
 from query.parser_sql import (
     get_table_catalog,
     get_table_schema,
@@ -13,6 +15,7 @@ from query.parser_sql import (
 @dataclass
 class Delete:
     catalog: CatalogManager
+    batch_size: int = 1000
 
     def execute(self, expr: exp.Delete) -> str:
         db_name     = get_table_catalog(expr)
@@ -37,21 +40,33 @@ class Delete:
         if col_pos is None:
             raise ValueError(f"Columna '{col_name}' no encontrada en la tabla")
 
+        # matches are collected while scanning and deleted in batches: the
+        # heap flips their active bytes page by page and each index gets its
+        # keys in sorted order
         with HeapFile(table, data_path) as heap:
-            rid = 0
-            while True:
-                rec = heap.read_record(rid)
-                if rec is None:
-                    break
-                row, active = rec
+            batch = []
+            for rid, row, active in heap.scan():
                 if active and row[col_pos] == value:
-                    heap.delete(rid)
-                    deleted += 1
-                    for idx_obj, pos in callbacks.values():
-                        try:
-                            idx_obj.delete(row[pos])
-                        except Exception:
-                            pass
-                rid += 1
-
-        return f"{deleted} rows deleted"
\ No newline at end of file
+                    batch.append((rid, row))
+                    if len(batch) == self.batch_size:
+                        deleted += self._delete_batch(heap, callbacks, batch)
+                        batch = []
+            if batch:
+                deleted += self._delete_batch(heap, callbacks, batch)
+
+        self.catalog.count_modifications(db_name, schema_name, table_name, deleted)
+        return f"{deleted} rows deleted"
+
+    def _delete_batch(self, heap: HeapFile, callbacks: dict, batch: list[tuple[int, tuple]]) -> int:
+        deleted = heap.delete_many([rid for rid, _ in batch])
+        for idx_obj, pos in callbacks.values():
+            if isinstance(idx_obj, RTree):
+                # R-tree entries are keyed by coordinates and loaded outside
+                # the SQL operators, which do not keep them in sync
+                continue
+            for key, rid in sorted((row[pos], rid) for rid, row in batch):
+                if isinstance(idx_obj, ISAMFile):
+                    idx_obj.delete(key)
+                else:
+                    idx_obj.delete(key, rid)
+        return deleted
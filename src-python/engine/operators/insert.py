@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from sqlglot import expressions as exp
 
 from catalog.catalog_manager import CatalogManager
+from models.enum.durability_enum import Durability
 from query.parser_sql import (
     get_table_catalog,
     get_table_schema,
@@ -9,22 +10,31 @@ from query.parser_sql import (
     get_values,
     to_tuple,
 )
+from storage.disk.paged_file import flush_paged_files
 from storage.indexing.heap import HeapFile
 
 @dataclass
 class Insert:
     catalog: CatalogManager
+    durability: Durability = Durability.STATEMENT
 
     def execute_from_tuple(self, db_name, schema_name, table_name, values: tuple[any, ...]) -> None:
+        self.execute_from_tuples(db_name, schema_name, table_name, [values])
+
+    def execute_from_tuples(self, db_name, schema_name, table_name, rows: list[tuple[any, ...]]) -> list[int]:
         table = self.catalog.get_table(db_name, schema_name, table_name)
         table_path = self.catalog.path_builder.table_data(db_name, schema_name, table_name)
         indexes = self.catalog.callbacks_index(db_name, schema_name, table_name)
 
-        with HeapFile(table, table_path) as heap:
-            position = heap.insert(values)
-            values = heap.converto_to_type(values)
-            for index, pos_column in indexes.values():
-                index.insert(values[pos_column], position)
+        with HeapFile(table, table_path, durability=self.durability) as heap:
+            positions = heap.insert_many(rows)
+            for values, position in zip(rows, positions):
+                values = heap.converto_to_type(values)
+                for index, pos_column in indexes.values():
+                    index.insert(values[pos_column], position)
+        self._end_batch()
+        self.catalog.count_modifications(db_name, schema_name, table_name, len(rows))
+        return positions
 
     def execute(self, expr: exp.Insert) -> None:
         db_name = get_table_catalog(expr)
@@ -47,11 +57,17 @@ class Insert:
             schema_name,
             table_name
         )
-        with HeapFile(table, table_path) as heap:
-            values = get_values(expr)
-            for value in values:
-                value = to_tuple(value)
-                position = heap.insert(value)
-                # update all indexes
+        with HeapFile(table, table_path, durability=self.durability) as heap:
+            values = [to_tuple(value) for value in get_values(expr)]
+            positions = heap.insert_many(values)
+            # update all indexes
+            for value, position in zip(values, positions):
                 for index, pos_column in indexes.values():
-                    index.insert(value[pos_column], position)
\ No newline at end of file
+                    index.insert(value[pos_column], position)
+        self._end_batch()
+        self.catalog.count_modifications(db_name, schema_name, table_name, len(values))
+
+    def _end_batch(self) -> None:
+        # the heap wrote its own pages back, the indexes still hold theirs
+        if self.durability == Durability.BATCH:
+            flush_paged_files()
@@ -3,160 +3,206 @@ from sqlglot import expressions as exp
 
 from catalog.table import Table
 from catalog.catalog_manager import CatalogManager
-from models.enum.index_enum import IndexType
-from models.enum.data_type_enum import DataTypeTag
-from storage.indexing.heap import HeapFile
-from storage.indexing.hashing import ExtendibleHashingFile
-from storage.indexing.bplus_tree import BPlusTreeFile
-from storage.indexing.isam import ISAMFile
-from engine.planner import login_plan
+from engine.pipeline import (
+    Operator, SeqScan, IndexScan, ArrayScan, Filter, Project, Limit, Sort, SortKey, Aggregate, AggregateCall,
+    ArrayAggregate
+)
+from engine.planner import Planner
+from engine.predicate import compile_predicate, compile_mask, column_comparison, condition_columns
+from models.enum.access_method_enum import AccessMethod
+from storage.indexing.numpy_scan import array_columns
 from query.parser_sql import (
     get_table_catalog,
     get_table_schema,
     get_table_name,
-    get_identifier
 )
 
+AGGREGATES = {exp.Count: "COUNT", exp.Sum: "SUM", exp.Avg: "AVG", exp.Min: "MIN", exp.Max: "MAX"}
+
+# Builds the operator tree of a SELECT (see engine/pipeline.py):
+# scan -> filter -> [aggregate] -> [sort] -> [limit] -> project. The scan is
+# the access path chosen by the planner and the filter checks the whole
+# WHERE condition on the rows it returns. A sequential scan whose condition,
+# group keys and aggregate arguments only read numeric columns runs on
+# arrays instead (ArrayScan, ArrayAggregate), filtering and aggregating a
+# column at a time.
 @dataclass
 class Select:
     catalog: CatalogManager
 
     def execute(self, expr: exp.Select):
+        root, single_row = self.build(expr)
+        if single_row:
+            with root:
+                return root.next()
+        return list(root)
+
+    def stream(self, expr: exp.Select):
+        # rows as they are produced; the tree is built (and checked) now
+        # and opened on the first row
+        root, _ = self.build(expr)
+        return iter(root)
+
+    def build(self, expr: exp.Select) -> tuple[Operator, bool]:
+        # the root operator and whether the query returns one row or None
+        # (an equality on the primary key) instead of a list
         db_name = get_table_catalog(expr)
         schema_name = get_table_schema(expr)
         table_name = get_table_name(expr)
         path_data = self.catalog.path_builder.table_data(db_name, schema_name, table_name)
         table: Table = self.catalog.get_table(db_name, schema_name, table_name)
-        columns = table.get_tab_columns()
-
-        plan = login_plan(expr)
-        try:
-            column_name: str = get_identifier(plan.condition)
-            index = self.get_index(column_name, table)
-        except Exception:
-            index = table.get_tab_indexes()[0]
-
-        index_type = index.get_idx_type()
-        if plan.condition is None:
-            return self.call_scan(table, index, path_data, columns[0].get_att_to_type_id())
-        elif isinstance(plan.condition, exp.Between):
-            plan.condition.args['low'] is not None and plan.condition.args['high']
-            low = plan.condition.args['low'].to_py()
-            high = plan.condition.args['high'].to_py()
-            return self.call_scan_range(table, index, path_data, columns[0].get_att_to_type_id(), low, high)
-        elif isinstance(plan.condition, exp.EQ):
-            if index_type == IndexType.BTREE.value:
-                column = columns[index.get_idx_columns()[0]]
-                key: str = plan.condition.expression.to_py()
-                return self.call_btree(table, index, path_data, column.get_att_to_type_id(), key)
-            elif index_type == IndexType.HASH.value:
-                column = columns[index.get_idx_columns()[0]]
-                key: str = plan.condition.expression.to_py()
-                return self.call_hash(table, index, path_data, column.get_att_to_type_id(), key)
-            elif index_type == IndexType.ISAM.value:
-                column = columns[index.get_idx_columns()[0]]
-                key: str = plan.condition.expression.to_py()
-                return self.call_isam()
-        elif index_type == IndexType.RTREE.value:
-            return self.call_rtree(table, index, path_data, plan.condition)
-        return None
-
-    def get_index(self, column_name: str, table: Table):
-        pos = 0
-        for i, column in enumerate(table.get_tab_columns()):
-            if column.get_att_name() == column_name:
-                pos = i
-                break
-        indexes = table.get_tab_indexes()
-        if (pos + 1) > len(indexes):
-            return indexes[0]
-        return indexes[pos]
-
-    def call_rtree(self, table: Table, index_obj, data_file: str, condition: exp.Expression):
-        heap_file = HeapFile(table, data_file)
-        try:
-            left = condition.this
-            right = condition.expression
-
-            lat_min = float(left.args["this"].args["this"].name)
-            lat_max = float(left.args["expression"].name)
-            long_min = float(right.args["this"].args["this"].name)
-            long_max = float(right.args["expression"].name)
-
-            from storage.indexing.rtree_wrapper import RTree
-            rtree = RTree(filename=index_obj.get_idx_file())
-
-            results = rtree.range_query((lat_min, long_min, lat_max, long_max))
-            records = []
-            for pos in results:
-                record = heap_file.read_record_json(pos)
-                if record:
-                    records.append(record)
-            return records
-        except Exception as e:
-            print("Error en la ejecución con RTree:", e)
-            return None
+        names = {column.get_att_name().lower(): column.get_att_name() for column in table.get_tab_columns()}
 
-    def call_hash(self, table: Table, index_obj, data_file, data_type: DataTypeTag, key: any) -> dict:
-        idx_path = index_obj.get_idx_file()
-        columns = table.get_tab_columns()
-        column = columns[index_obj.get_idx_columns()[0]]
-        max_key_len: int = column.get_att_len()
-        hash_file = ExtendibleHashingFile(
-            index_filename=str(idx_path),
-            data_type=data_type,
-            max_key_len=max_key_len,
-        )
-        heap_file = HeapFile(table, data_file)
-        #hash_file.debug_print_structure()
-        pos = hash_file.search(key)
-        #print(heap_file.read_record_json(pos))
-        if pos is None:
+        where = expr.args.get("where")
+        condition = where.this if where is not None else None
+        group = expr.args.get("group")
+        group_keys = [self.column_key(column, names) for column in group.expressions] if group else []
+        outputs, calls = self.select_list(expr, names, group_keys)
+        aggregated = bool(calls or group_keys)
+        sort_keys = self.sort_keys(expr, names, outputs, calls)
+        offset, limit = self.limit_clause(expr, "offset") or 0, self.limit_clause(expr, "limit")
+
+        # the planner only counts on the limit if rows are not reordered
+        streamed_limit = offset + limit if limit is not None and not (aggregated or sort_keys) else None
+        path = Planner(self.catalog).choose(db_name, schema_name, table_name, condition, streamed_limit)
+
+        columns = self.needed_columns(condition, names, outputs, group_keys, calls, sort_keys)
+        root = None
+        if path.method == AccessMethod.SEQ_SCAN:
+            root = self.array_scan(table, path_data, condition, names, group_keys, calls, streamed_limit, columns)
+        if root is None:
+            if path.method == AccessMethod.SEQ_SCAN:
+                root = SeqScan(table, path_data, columns)
+            else:
+                root = IndexScan(self.catalog, table, path_data, path, columns)
+            if condition is not None:
+                root = Filter(root, compile_predicate(condition, names))
+            if aggregated:
+                root = Aggregate(root, group_keys, calls)
+        if sort_keys:
+            root = Sort(root, sort_keys, None if limit is None else offset + limit)
+        if offset or limit is not None:
+            root = Limit(root, offset, limit)
+        if aggregated or outputs != [(name, name) for name in names.values()]:
+            root = Project(root, outputs)
+
+        single_row = not aggregated and self.is_unique_lookup(table, condition, names)
+        return root, single_row
+
+    def array_scan(self, table: Table, path_data, condition: exp.Expression | None, names: dict[str, str],
+                   group_keys: list[str], calls: list[AggregateCall], streamed_limit: int | None,
+                   needed: list[str]) -> Operator | None:
+        # the scan (and aggregate) on arrays when the query only reads
+        # numeric columns, otherwise None
+        columns = array_columns(table)
+        mask = compile_mask(condition, names, columns) if condition is not None else None
+        if condition is not None and mask is None:
+            return None
+        if calls or group_keys:
+            arguments = group_keys + [call.argument for call in calls if call.argument is not None]
+            if all(key in columns for key in arguments):
+                return ArrayAggregate(table, path_data, mask, group_keys, calls)
             return None
-        return heap_file.read_record_json(pos)
-    
-    def call_btree(self, table: Table, index_obj, data_file: str, data_type: DataTypeTag, key: any) -> dict:
-        idx_path = index_obj.get_idx_file()
-        columns = table.get_tab_columns()
-        column = columns[index_obj.get_idx_columns()[0]]
-        btree = BPlusTreeFile(
-            index_filename=str(idx_path),
-            data_type=data_type,
-            max_key_len=column.get_att_len(),
-            order=4
-        )
-        heap = HeapFile(table, data_file)
-        if not key:
+        # without a condition there is nothing to do on arrays, and with a
+        # streamed limit the row scan stops as soon as it has enough rows
+        if mask is None or streamed_limit is not None:
             return None
-        pos = btree.search(key)
-        return None if pos is None else heap.read_record_json(pos)
-
-    def call_isam(): pass
-
-    def call_scan(self, table: Table, index_obj, data_file: str, data_type: DataTypeTag) -> list[dict]:
-        idx_path = index_obj.get_idx_file()
-        columns = table.get_tab_columns()
-        column = columns[index_obj.get_idx_columns()[0]]
-        btree = BPlusTreeFile(
-            index_filename=str(idx_path),
-            data_type=data_type,
-            max_key_len=column.get_att_len(),
-            order=4
-        )
-        heap = HeapFile(table, data_file)
-        records_id = [id for (_, id) in btree.all_tuples()]
-        return list(heap.read_all_records(records_id))
-
-    def call_scan_range(self, table: Table, index_obj, data_file: str, data_type: DataTypeTag, start: any, end: any) -> list[dict]:
-        idx_path = index_obj.get_idx_file()
-        columns = table.get_tab_columns()
-        column = columns[index_obj.get_idx_columns()[0]]
-        btree = BPlusTreeFile(
-            index_filename=str(idx_path),
-            data_type=data_type,
-            max_key_len=column.get_att_len(),
-            order=4
-        )
-        heap = HeapFile(table, data_file)
-        records_id = [id for (_, id) in btree.all_tuples_range(start, end)]
-        return list(heap.read_all_records(records_id))
\ No newline at end of file
+        return ArrayScan(table, path_data, mask, needed)
+
+    @staticmethod
+    def needed_columns(condition: exp.Expression | None, names: dict[str, str], outputs: list[tuple[str, str]],
+                       group_keys: list[str], calls: list[AggregateCall], sort_keys: list[SortKey]) -> list[str]:
+        # the columns the operators above the scan read, in table order; the
+        # scan decodes only these
+        keys = {key for _, key in outputs} | set(group_keys) | {key.key for key in sort_keys}
+        keys |= {call.argument for call in calls if call.argument is not None}
+        keys |= {names[name.lower()] for name in condition_columns(condition) if name.lower() in names}
+        return [key for key in names.values() if key in keys]
+
+    def select_list(self, expr: exp.Select, names: dict[str, str],
+                    group_keys: list[str]) -> tuple[list[tuple[str, str]], list[AggregateCall]]:
+        # (output name, row key) pairs and the aggregate calls they need
+        outputs, calls = [], []
+        for projection in expr.expressions:
+            item = projection.unalias()
+            if isinstance(item, exp.Star):
+                outputs += [(name, name) for name in names.values()]
+            elif isinstance(item, exp.Column) and isinstance(item.this, exp.Star):
+                outputs += [(name, name) for name in names.values()]
+            elif isinstance(item, exp.Column):
+                outputs.append((projection.alias_or_name, self.column_key(item, names)))
+            elif type(item) in AGGREGATES:
+                call = self.aggregate_call(item, f"_agg{len(calls)}", names)
+                calls.append(call)
+                outputs.append((projection.alias or call.function.lower(), call.key))
+            else:
+                raise ValueError(f"Error: expresión no soportada en SELECT: {item.sql()}")
+
+        if calls or group_keys:
+            loose = [key for _, key in outputs if key in names.values() and key not in group_keys]
+            if loose:
+                raise ValueError(f"Error: la columna '{loose[0]}' debe aparecer en GROUP BY o en una función de agregación")
+        return outputs, calls
+
+    def aggregate_call(self, item: exp.Func, key: str, names: dict[str, str]) -> AggregateCall:
+        argument = item.this
+        distinct = isinstance(argument, exp.Distinct)
+        if distinct:
+            argument = argument.expressions[0]
+        if isinstance(argument, exp.Star) and isinstance(item, exp.Count):
+            return AggregateCall(key, "COUNT", None)
+        if not isinstance(argument, exp.Column):
+            raise ValueError(f"Error: argumento no soportado en {item.sql()}")
+        return AggregateCall(key, AGGREGATES[type(item)], self.column_key(argument, names), distinct)
+
+    def sort_keys(self, expr: exp.Select, names: dict[str, str],
+                  outputs: list[tuple[str, str]], calls: list[AggregateCall]) -> list[SortKey]:
+        order = expr.args.get("order")
+        if order is None:
+            return []
+        aggregates = {}
+        for projection, call in zip([p for p in expr.expressions if type(p.unalias()) in AGGREGATES], calls):
+            aggregates[projection.unalias().sql()] = call.key
+        aliases = {name.lower(): key for name, key in outputs}
+
+        keys = []
+        for ordered in order.expressions:
+            item = ordered.this
+            if isinstance(item, exp.Literal) and not item.is_string:
+                position = int(item.to_py())
+                if not 1 <= position <= len(outputs):
+                    raise ValueError(f"Error: posición {position} de ORDER BY fuera de la lista del SELECT")
+                key = outputs[position - 1][1]
+            elif isinstance(item, exp.Column) and item.name.lower() in aliases:
+                key = aliases[item.name.lower()]
+            elif isinstance(item, exp.Column):
+                key = self.column_key(item, names)
+            elif item.sql() in aggregates:
+                key = aggregates[item.sql()]
+            else:
+                raise ValueError(f"Error: expresión no soportada en ORDER BY: {item.sql()}")
+            keys.append(SortKey(key, bool(ordered.args.get("desc")), bool(ordered.args.get("nulls_first"))))
+        return keys
+
+    @staticmethod
+    def column_key(column: exp.Expression, names: dict[str, str]) -> str:
+        if not isinstance(column, exp.Column) or column.name.lower() not in names:
+            raise ValueError(f"Error: columna no encontrada en la tabla: {column.sql()}")
+        return names[column.name.lower()]
+
+    @staticmethod
+    def limit_clause(expr: exp.Select, name: str) -> int | None:
+        clause = expr.args.get(name)
+        return None if clause is None else int(clause.expression.to_py())
+
+    @staticmethod
+    def is_unique_lookup(table: Table, condition: exp.Expression | None, names: dict[str, str]) -> bool:
+        comparison = column_comparison(condition.unnest()) if condition is not None else None
+        if comparison is None or comparison[1] is not exp.EQ:
+            return False
+        positions = list(names)
+        if comparison[0].lower() not in names:
+            return False
+        position = positions.index(comparison[0].lower())
+        return any(index.get_idx_is_primary() and index.get_idx_columns()[0] == position
+                   for index in table.get_tab_indexes())
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from sqlglot import expressions as exp
+
+from catalog.catalog_manager import CatalogManager
+from storage.disk.paged_file import commit_paged_files
+from storage.indexing.heap import HeapFile
+from storage.indexing.bplus_tree import BPlusTreeFile
+from storage.indexing.hashing import ExtendibleHashingFile
+from storage.indexing.linear_hashing import LinearHashingFile
+from storage.indexing.isam import ISAMFile
+from storage.indexing.rtree_wrapper import RTree
+from query.parser_sql import get_command_table
+
+# VACUUM moves the live rows at the end of the heap into the deleted slots
+# before them and truncates the pages left empty. It works in chunks of
+# chunk_size rows: each chunk remaps the index entries of the rows it moved
+# and commits its pages, so between chunks the table is consistent and
+# other statements can run. ISAM indexes are sparse (block numbers, not
+# record ids) and are built again at the end; R-tree entries are keyed by
+# coordinates the rows do not have, so a table with one is not vacuumed.
+@dataclass
+class Vacuum:
+    catalog: CatalogManager
+    chunk_size: int = 1000
+
+    def execute(self, expr: exp.Command) -> str:
+        db_name, schema_name, table_name = get_command_table(expr)
+        table     = self.catalog.get_table(db_name, schema_name, table_name)
+        data_path = self.catalog.path_builder.table_data(db_name, schema_name, table_name)
+        callbacks = self.catalog.callbacks_index(db_name, schema_name, table_name)
+        if any(isinstance(idx_obj, RTree) for idx_obj, _ in callbacks.values()):
+            raise ValueError(f"Error: VACUUM no puede mover las filas de {table_name}, tiene un índice R-tree")
+
+        moved = 0
+        with HeapFile(table, data_path) as heap:
+            pages_before = heap.get_page_count()
+            while chunk := heap.compact(self.chunk_size):
+                for old_rid, new_rid, row in chunk:
+                    for idx_obj, pos in callbacks.values():
+                        self._remap(idx_obj, row[pos], old_rid, new_rid)
+                moved += len(chunk)
+                commit_paged_files()
+            pages_after = heap.get_page_count()
+            for idx_obj, pos in callbacks.values():
+                if moved and isinstance(idx_obj, ISAMFile):
+                    idx_obj.reset()
+                    idx_obj.build(row[pos] for _, row, is_active in heap.scan() if is_active)
+
+        # deleted keys stay in the Bloom filters until they are rebuilt
+        for idx_obj, _ in callbacks.values():
+            if getattr(idx_obj, "bloom", None) is not None:
+                idx_obj.rebuild_bloom_filter()
+
+        return f"{moved} rows moved, {pages_before - pages_after} pages freed"
+
+    def _remap(self, idx_obj, key, old_rid: int, new_rid: int) -> None:
+        if isinstance(idx_obj, (BPlusTreeFile, ExtendibleHashingFile, LinearHashingFile)):
+            idx_obj.delete(key, old_rid)
+            idx_obj.insert(key, new_rid)
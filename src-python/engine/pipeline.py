@@ -0,0 +1,450 @@
+import heapq
+import pickle
+import tempfile
+from dataclasses import dataclass
+from functools import cmp_to_key
+from pathlib import Path
+
+import numpy as np
+
+from catalog.table import Table
+from catalog.catalog_manager import CatalogManager
+from engine.planner import AccessPath
+from models.enum.access_method_enum import AccessMethod
+from storage.indexing.heap import HeapFile
+from storage.indexing.numpy_scan import HeapArrayScan
+
+SORT_RUN_ROWS = 100000  # rows sorted in memory before a run goes to disk
+
+# Volcano style iterators. A query is a tree of operators, each pulling rows
+# (dicts keyed by column name) from its child one at a time: open() gets the
+# operator ready, next() returns the next row or None at the end and close()
+# releases what open() took. Only Sort and Aggregate have to see all their
+# input before returning a row; the rest keep one row at a time, so a
+# result can be sent while it is being read.
+class Operator:
+    def open(self) -> None:
+        pass
+
+    def next(self) -> dict | None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        with self:
+            while (row := self.next()) is not None:
+                yield row
+
+# scans
+class SeqScan(Operator):
+    # with columns only those are decoded (see RecordProjection), otherwise
+    # the whole row
+    def __init__(self, table: Table, path_data: Path, columns: list[str] | None = None):
+        self.table = table
+        self.path_data = path_data
+        self.projected = columns is not None
+        self.columns = columns if self.projected else [column.get_att_name() for column in table.get_tab_columns()]
+        self.heap = None
+        self.records = None
+
+    def open(self) -> None:
+        self.heap = HeapFile(self.table, self.path_data, use_mmap=True)
+        self.records = self.heap.scan(columns=self.columns if self.projected else None)
+
+    def next(self) -> dict | None:
+        for _, data_tuple, is_active in self.records:
+            if is_active:
+                return dict(zip(self.columns, data_tuple))
+        return None
+
+    def close(self) -> None:
+        if self.records is not None:
+            self.records.close()
+            self.heap.close()
+            self.records = self.heap = None
+
+class IndexScan(Operator):
+    # rows of the record ids an index returns for an access path; the index
+    # cursor is lazy, so stopping early stops reading leaves and rows; with
+    # columns only those are decoded
+    def __init__(self, catalog: CatalogManager, table: Table, path_data: Path, path: AccessPath,
+                 columns: list[str] | None = None):
+        self.catalog = catalog
+        self.table = table
+        self.path_data = path_data
+        self.path = path
+        self.columns = columns
+        self.heap = None
+        self.records = None
+
+    def open(self) -> None:
+        self.heap = HeapFile(self.table, self.path_data, use_mmap=True)
+        self.records = self.heap.read_all_records(self.record_ids(), self.columns)
+
+    def next(self) -> dict | None:
+        for row in self.records:
+            if row is not None:
+                return row
+        return None
+
+    def close(self) -> None:
+        if self.records is not None:
+            self.records.close()
+            self.heap.close()
+            self.records = self.heap = None
+
+    def record_ids(self):
+        path = self.path
+        index = self.catalog.open_index(self.table, path.index)
+        if path.method in (AccessMethod.BTREE_POINT, AccessMethod.HASH_POINT):
+            return index.search_all(path.key)
+        if path.method == AccessMethod.BTREE_RANGE:
+            return (rid for _, rid in index.iter_range(path.low, path.high))
+        if path.method == AccessMethod.RTREE_RANGE:
+            return index.range_query(path.rect)
+        raise ValueError(f"Error: access path {path.method.name} is not supported")
+
+class ArrayScan(Operator):
+    # rows of a heap matching a condition compiled by predicate.compile_mask:
+    # the condition is checked on whole columns of the mapped file (see
+    # storage/indexing/numpy_scan.py) and only the matching rows are decoded
+    def __init__(self, table: Table, path_data: Path, mask, columns: list[str]):
+        self.table = table
+        self.path_data = path_data
+        self.mask = mask
+        self.columns = columns
+        self.heap = None
+        self.records = None
+
+    def open(self) -> None:
+        self.heap = HeapFile(self.table, self.path_data, use_mmap=True)
+        # the scan is closed before the rows are read, which may wait for
+        # the pool
+        with HeapArrayScan(self.heap) as scan:
+            record_ids = scan.record_ids(scan.active & self.mask(scan.column))
+        self.records = self.heap.read_all_records(record_ids.tolist(), self.columns)
+
+    def next(self) -> dict | None:
+        for row in self.records:
+            if row is not None:
+                return row
+        return None
+
+    def close(self) -> None:
+        if self.records is not None:
+            self.records.close()
+            self.heap.close()
+            self.records = self.heap = None
+
+# row at a time operators
+class UnaryOperator(Operator):
+    def __init__(self, child: Operator):
+        self.child = child
+
+    def open(self) -> None:
+        self.child.open()
+
+    def close(self) -> None:
+        self.child.close()
+
+class Filter(UnaryOperator):
+    def __init__(self, child: Operator, predicate):
+        super().__init__(child)
+        self.predicate = predicate
+
+    def next(self) -> dict | None:
+        while (row := self.child.next()) is not None:
+            if self.predicate(row):
+                return row
+        return None
+
+class Project(UnaryOperator):
+    def __init__(self, child: Operator, outputs: list[tuple[str, str]]):
+        # outputs are (output name, row key) pairs
+        super().__init__(child)
+        self.outputs = outputs
+
+    def next(self) -> dict | None:
+        row = self.child.next()
+        if row is None:
+            return None
+        return {name: row[key] for name, key in self.outputs}
+
+class Limit(UnaryOperator):
+    def __init__(self, child: Operator, offset: int = 0, limit: int | None = None):
+        super().__init__(child)
+        self.offset = offset
+        self.limit = limit
+        self.skipped = 0
+        self.returned = 0
+
+    def open(self) -> None:
+        super().open()
+        self.skipped = self.returned = 0
+
+    def next(self) -> dict | None:
+        # once the limit is reached the child is not asked for more rows
+        if self.limit is not None and self.returned >= self.limit:
+            return None
+        while self.skipped < self.offset:
+            if self.child.next() is None:
+                return None
+            self.skipped += 1
+        row = self.child.next()
+        if row is not None:
+            self.returned += 1
+        return row
+
+# blocking operators
+@dataclass
+class SortKey:
+    key: str
+    descending: bool = False
+    nulls_first: bool = False
+
+class Sort(UnaryOperator):
+    # With a limit only the first rows are kept (a bounded heap). Otherwise
+    # runs of run_rows rows are sorted in memory and, once there is more
+    # than one, written to temporary files and merged (external merge sort).
+    def __init__(self, child: Operator, keys: list[SortKey], limit: int | None = None,
+                 run_rows: int = SORT_RUN_ROWS):
+        super().__init__(child)
+        self.keys = keys
+        self.limit = limit
+        self.run_rows = run_rows
+        self.sort_key = cmp_to_key(self.compare)
+        self.runs = []
+        self.rows = None
+
+    def open(self) -> None:
+        super().open()
+        rows = iter(self.child.next, None)
+        if self.limit is not None:
+            self.rows = iter(heapq.nsmallest(self.limit, rows, key=self.sort_key))
+            return
+        run = []
+        for row in rows:
+            run.append(row)
+            if len(run) == self.run_rows:
+                self.runs.append(self.spill(sorted(run, key=self.sort_key)))
+                run = []
+        run.sort(key=self.sort_key)
+        if not self.runs:
+            self.rows = iter(run)
+        else:
+            self.runs.append(self.spill(run))
+            self.rows = heapq.merge(*(self.read_run(run_file) for run_file in self.runs), key=self.sort_key)
+
+    def next(self) -> dict | None:
+        return next(self.rows, None)
+
+    def close(self) -> None:
+        for run_file in self.runs:
+            run_file.close()
+        self.runs = []
+        self.rows = None
+        super().close()
+
+    def compare(self, a: dict, b: dict) -> int:
+        for sort_key in self.keys:
+            x, y = a[sort_key.key], b[sort_key.key]
+            if x == y:
+                continue
+            if x is None or y is None:
+                return (-1 if x is None else 1) * (1 if sort_key.nulls_first else -1)
+            result = -1 if x < y else 1
+            return -result if sort_key.descending else result
+        return 0
+
+    @staticmethod
+    def spill(rows: list[dict]):
+        run_file = tempfile.TemporaryFile()
+        for row in rows:
+            pickle.dump(row, run_file, pickle.HIGHEST_PROTOCOL)
+        run_file.seek(0)
+        return run_file
+
+    @staticmethod
+    def read_run(run_file):
+        while True:
+            try:
+                yield pickle.load(run_file)
+            except EOFError:
+                return
+
+@dataclass
+class AggregateCall:
+    key: str  # key of the result in the output rows
+    function: str  # COUNT, SUM, AVG, MIN or MAX
+    argument: str | None  # row key, None for COUNT(*)
+    distinct: bool = False
+
+class Accumulator:
+    def __init__(self, call: AggregateCall):
+        self.call = call
+        self.count = 0
+        self.value = None
+        self.seen = set() if call.distinct else None
+
+    def add(self, row: dict) -> None:
+        if self.call.argument is None:
+            self.count += 1
+            return
+        value = row[self.call.argument]
+        if value is None:
+            return
+        if self.seen is not None:
+            if value in self.seen:
+                return
+            self.seen.add(value)
+        self.count += 1
+        function = self.call.function
+        if function in ("SUM", "AVG"):
+            self.value = value if self.value is None else self.value + value
+        elif function == "MIN" and (self.value is None or value < self.value):
+            self.value = value
+        elif function == "MAX" and (self.value is None or value > self.value):
+            self.value = value
+
+    def result(self):
+        if self.call.function == "COUNT":
+            return self.count
+        if self.call.function == "AVG":
+            return self.value / self.count if self.count else None
+        return self.value
+
+class Aggregate(UnaryOperator):
+    # hash aggregation: one set of accumulators per group; without GROUP BY
+    # there is a single group, returned even when there are no rows
+    def __init__(self, child: Operator, group_keys: list[str], calls: list[AggregateCall]):
+        super().__init__(child)
+        self.group_keys = group_keys
+        self.calls = calls
+        self.groups = None
+
+    def open(self) -> None:
+        super().open()
+        groups: dict[tuple, list[Accumulator]] = {}
+        if not self.group_keys:
+            groups[()] = [Accumulator(call) for call in self.calls]
+        while (row := self.child.next()) is not None:
+            group = tuple(row[key] for key in self.group_keys)
+            accumulators = groups.get(group)
+            if accumulators is None:
+                accumulators = groups[group] = [Accumulator(call) for call in self.calls]
+            for accumulator in accumulators:
+                accumulator.add(row)
+        self.groups = iter(groups.items())
+
+    def next(self) -> dict | None:
+        item = next(self.groups, None)
+        if item is None:
+            return None
+        group, accumulators = item
+        row = dict(zip(self.group_keys, group))
+        for accumulator in accumulators:
+            row[accumulator.call.key] = accumulator.result()
+        return row
+
+    def close(self) -> None:
+        self.groups = None
+        super().close()
+
+class ArrayAggregate(Operator):
+    # Aggregate over the columns of a heap read as arrays (see ArrayScan),
+    # for group keys and arguments that are numbers: rows are numbered by
+    # group with numpy.unique and every call is one reduction per group over
+    # the values sorted by group. Groups come out in the order they are
+    # first seen, as in Aggregate.
+    def __init__(self, table: Table, path_data: Path, mask, group_keys: list[str], calls: list[AggregateCall]):
+        self.table = table
+        self.path_data = path_data
+        self.mask = mask
+        self.group_keys = group_keys
+        self.calls = calls
+        self.rows = None
+
+    def open(self) -> None:
+        heap = HeapFile(self.table, self.path_data, use_mmap=True)
+        try:
+            with HeapArrayScan(heap) as scan:
+                selected = scan.active if self.mask is None else scan.active & self.mask(scan.column)
+                keys = [scan.select(key, selected) for key in self.group_keys]
+                arguments = {call.argument: scan.select(call.argument, selected)
+                             for call in self.calls if call.argument is not None}
+            self.rows = iter(self.aggregate(keys, arguments, int(np.count_nonzero(selected))))
+        finally:
+            heap.close()
+
+    def next(self) -> dict | None:
+        return next(self.rows, None)
+
+    def close(self) -> None:
+        self.rows = None
+
+    def aggregate(self, keys: list, arguments: dict, count: int) -> list[dict]:
+        if not keys:
+            groups, group_count, first = np.zeros(count, dtype=np.intp), 1, [0]
+        else:
+            groups, group_count, first = self.number_groups(keys)
+            if not group_count:
+                return []
+        rows = [{key: values[i].item() for key, values in zip(self.group_keys, keys)} for i in first]
+        for call in self.calls:
+            for row, value in zip(rows, self.reduce(call, groups, group_count, arguments.get(call.argument))):
+                row[call.key] = value
+        return rows
+
+    @staticmethod
+    def number_groups(keys: list):
+        # (group of each row, number of groups, first row of each group)
+        if len(keys) == 1:
+            _, first, groups = np.unique(keys[0], return_index=True, return_inverse=True)
+        else:
+            codes = np.stack([np.unique(values, return_inverse=True)[1].reshape(-1) for values in keys], axis=1)
+            _, first, groups = np.unique(codes, axis=0, return_index=True, return_inverse=True)
+        groups = groups.reshape(-1)
+        order = np.argsort(first, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return rank[groups], len(order), first[order]
+
+    @staticmethod
+    def reduce(call: AggregateCall, groups, group_count: int, values) -> list:
+        # one result per group; None for the groups without values
+        if values is None:
+            return np.bincount(groups, minlength=group_count).tolist()
+        if call.distinct:
+            order = np.lexsort((values, groups))
+            groups, values = groups[order], values[order]
+            keep = np.ones(len(values), dtype=bool)
+            keep[1:] = (groups[1:] != groups[:-1]) | (values[1:] != values[:-1])
+            groups, values = groups[keep], values[keep]
+        counts = np.bincount(groups, minlength=group_count)
+        if call.function == "COUNT":
+            return counts.tolist()
+
+        order = np.argsort(groups, kind='stable')
+        groups, values = groups[order], values[order]
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(groups) else np.empty(0, dtype=np.intp)
+        if call.function in ("SUM", "AVG"):
+            if values.dtype.kind in 'biu':
+                values = values.astype(np.int64)
+            reduced = np.add.reduceat(values, starts) if len(starts) else values[:0]
+        else:
+            ufunc = np.minimum if call.function == "MIN" else np.maximum
+            reduced = ufunc.reduceat(values, starts) if len(starts) else values[:0]
+
+        results = [None] * group_count
+        for group, value in zip(groups[starts].tolist(), reduced.tolist()):
+            results[group] = value / counts[group].item() if call.function == "AVG" else value
+        return results
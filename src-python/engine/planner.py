@@ -1,5 +1,230 @@
+import math
+import struct
+from dataclasses import dataclass
+from sqlglot import expressions as exp
 from sqlglot.planner import Step
 from sqlglot.expressions import Expression
 
+from catalog.index import Index
+from catalog.statistics import ColumnStatistics, TableStatistics
+from catalog.table import Table
+from catalog.catalog_manager import CatalogManager
+from engine.predicate import conjuncts, column_comparison, column_between
+from models.enum.access_method_enum import AccessMethod
+from models.enum.index_enum import IndexType
+from storage.disk.fixed_length import FixedLengthRecord
+from storage.disk.page import SlottedPage
+from storage.disk.paged_file import open_paged_file, read_file_header
+from storage.indexing.bplus_tree import BPlusTreeFile
+
 def login_plan(expr: Expression) -> Step:
-    return Step().from_expression(expr)
\ No newline at end of file
+    return Step().from_expression(expr)
+
+# costs in units of one sequential page read, as in PostgreSQL
+SEQ_PAGE_COST = 1.0
+RANDOM_PAGE_COST = 4.0
+CPU_TUPLE_COST = 0.01
+CPU_INDEX_TUPLE_COST = 0.005
+CPU_OPERATOR_COST = 0.0025
+
+# selectivities used when there are no statistics for a column
+DEFAULT_EQ_SEL = 0.005
+DEFAULT_RANGE_SEL = 0.005
+DEFAULT_INEQ_SEL = 1 / 3
+
+HASH_PROBE_PAGES = 1.2  # bucket page plus the occasional overflow page
+RTREE_LEVELS = 2
+
+@dataclass
+class AccessPath:
+    method: AccessMethod
+    cost: float
+    rows: float  # rows the path reads before the residual filter
+    index: Index | None = None
+    key: any = None
+    low: any = None
+    high: any = None
+    rect: tuple[float, float, float, float] | None = None
+
+@dataclass
+class TableEstimate:
+    pages: int
+    rows: float
+
+# Cost based choice of how to read a table for a WHERE condition. Every
+# index of the table whose column appears in a sargable conjunct (column
+# op literal, BETWEEN, or the window of an R-tree) yields an access path
+# next to the heap scan; each is costed from the table and index sizes and
+# the column statistics of the last ANALYZE, and the cheapest one wins. The whole condition is still checked on every row
+# the path returns, so a path only has to return a superset of the rows.
+@dataclass
+class Planner:
+    catalog: CatalogManager
+
+    def choose(self, db_name: str, schema_name: str, table_name: str,
+               condition: Expression | None, limit: float | None = None) -> AccessPath:
+        paths = self.access_paths(db_name, schema_name, table_name, condition, limit)
+        return min(paths, key=lambda path: path.cost)
+
+    def access_paths(self, db_name: str, schema_name: str, table_name: str,
+                     condition: Expression | None, limit: float | None = None) -> list[AccessPath]:
+        table = self.catalog.get_table(db_name, schema_name, table_name)
+        estimate = self.estimate_table(db_name, schema_name, table_name, table)
+        paths = [self.seq_scan(estimate, condition, limit)]
+
+        statistics = table.get_tab_statistics()
+        names = [column.get_att_name().lower() for column in table.get_tab_columns()]
+        parts = conjuncts(condition)
+        for part in parts:
+            comparison = column_comparison(part)
+            between = column_between(part)
+            if comparison is not None:
+                column_name, kind, value = comparison
+            elif between is not None:
+                column_name, kind, value = between[0], exp.Between, (between[1], between[2])
+            else:
+                continue
+            if column_name.lower() not in names:
+                continue
+            position = names.index(column_name.lower())
+            column_stats = statistics.get_column(column_name) if statistics is not None else None
+            for index in table.get_tab_indexes():
+                if index.get_idx_columns()[0] == position:
+                    path = self.index_path(index, kind, value, column_stats, estimate, limit)
+                    if path is not None:
+                        paths.append(path)
+
+        rect = self.rtree_window(parts)
+        if rect is not None:
+            position = names.index(rect[0].lower()) if rect[0].lower() in names else -1
+            for index in table.get_tab_indexes():
+                if index.get_idx_type() == IndexType.RTREE.value and index.get_idx_columns()[0] == position:
+                    rows = max(1.0, estimate.rows * self.window_selectivity(parts, statistics))
+                    cost = RTREE_LEVELS * RANDOM_PAGE_COST + self.heap_fetch_cost(rows, estimate)
+                    paths.append(AccessPath(AccessMethod.RTREE_RANGE, cost, rows, index, rect=rect[1]))
+        return paths
+
+    # estimates
+    def estimate_table(self, db_name: str, schema_name: str, table_name: str, table: Table) -> TableEstimate:
+        # pages come from the heap file itself and the rows per page from the
+        # last ANALYZE; before that every slot is assumed to be used
+        path = self.catalog.path_builder.table_data(db_name, schema_name, table_name)
+        pages = open_paged_file(path, table.get_tab_page_size()).get_page_count()
+        rows = table.get_tab_tuples()
+        if rows:
+            rows = rows * pages / max(1, table.get_tab_pages())
+        else:
+            record = FixedLengthRecord(table)
+            record.set_format_str()
+            rows = pages * SlottedPage.capacity(table.get_tab_page_size(), record.get_format_size())
+        return TableEstimate(pages, float(rows))
+
+    def selectivity(self, index: Index | None, kind, value, column_stats: ColumnStatistics | None,
+                    estimate: TableEstimate) -> float:
+        if kind is exp.EQ and index is not None and index.get_idx_is_primary():
+            return 1.0 / max(1.0, estimate.rows)
+        fraction = None
+        if column_stats is not None:
+            if kind is exp.EQ:
+                fraction = column_stats.eq_fraction(value, estimate.rows)
+            elif kind is exp.NEQ:
+                equal = column_stats.eq_fraction(value, estimate.rows)
+                if equal is not None:
+                    fraction = max(0.0, 1.0 - column_stats.null_frac - equal)
+            else:
+                fraction = column_stats.range_fraction(*self.range_bounds(kind, value))
+        if fraction is not None:
+            return fraction
+        if kind is exp.EQ:
+            return DEFAULT_EQ_SEL
+        if kind is exp.Between:
+            return DEFAULT_RANGE_SEL
+        return DEFAULT_INEQ_SEL
+
+    @staticmethod
+    def window_selectivity(parts: list[Expression], statistics: TableStatistics | None) -> float:
+        # both BETWEENs of an R-tree window, as if the columns were independent
+        selectivity = 1.0
+        for part in parts:
+            name, low, high = column_between(part)
+            column_stats = statistics.get_column(name) if statistics is not None else None
+            fraction = column_stats.range_fraction(low, high) if column_stats is not None else None
+            selectivity *= fraction if fraction is not None else math.sqrt(DEFAULT_RANGE_SEL)
+        return selectivity
+
+    @staticmethod
+    def limit_fraction(rows: float, limit: float | None) -> float:
+        # paths that stream rows stop once the limit is reached
+        if limit is None or limit == math.inf or rows <= 0:
+            return 1.0
+        return min(1.0, limit / rows)
+
+    # paths
+    def seq_scan(self, estimate: TableEstimate, condition: Expression | None, limit: float | None) -> AccessPath:
+        operators = len(list(condition.find_all(exp.Predicate))) if condition is not None else 0
+        cost = (estimate.pages * SEQ_PAGE_COST
+                + estimate.rows * (CPU_TUPLE_COST + operators * CPU_OPERATOR_COST))
+        if condition is None:
+            cost *= self.limit_fraction(estimate.rows, limit)
+        return AccessPath(AccessMethod.SEQ_SCAN, cost, estimate.rows)
+
+    def index_path(self, index: Index, kind, value, column_stats: ColumnStatistics | None,
+                   estimate: TableEstimate, limit: float | None) -> AccessPath | None:
+        index_type = index.get_idx_type()
+        rows = max(1.0, estimate.rows * self.selectivity(index, kind, value, column_stats, estimate))
+        fetch = self.heap_fetch_cost(rows, estimate)
+
+        if index_type == IndexType.BTREE.value:
+            height, entries_per_leaf = self.btree_shape(index)
+            if kind is exp.EQ:
+                cost = height * RANDOM_PAGE_COST + fetch
+                return AccessPath(AccessMethod.BTREE_POINT, cost, rows, index, key=value)
+            if kind is exp.NEQ:
+                return None
+            low, high = self.range_bounds(kind, value)
+            leaves = math.ceil(rows / entries_per_leaf)
+            cost = (height * RANDOM_PAGE_COST + leaves * SEQ_PAGE_COST + fetch) * self.limit_fraction(rows, limit)
+            return AccessPath(AccessMethod.BTREE_RANGE, cost, rows, index, low=low, high=high)
+
+        if kind is not exp.EQ:
+            return None
+        if index_type in (IndexType.HASH.value, IndexType.LINEAR_HASH.value, IndexType.SEQUENTIAL.value):
+            cost = HASH_PROBE_PAGES * RANDOM_PAGE_COST + fetch
+            return AccessPath(AccessMethod.HASH_POINT, cost, rows, index, key=value)
+        # an ISAM index is sparse: its entries are block numbers of every
+        # block_factor-th row at build time, not record ids, so it is no
+        # access path
+        return None
+
+    @staticmethod
+    def heap_fetch_cost(rows: float, estimate: TableEstimate) -> float:
+        # one random page per row, but never more pages than the heap has
+        pages = min(rows, max(1, estimate.pages))
+        return pages * RANDOM_PAGE_COST + rows * (CPU_INDEX_TUPLE_COST + CPU_TUPLE_COST)
+
+    @staticmethod
+    def btree_shape(index: Index) -> tuple[int, float]:
+        # (height, entries per leaf) from the tree header, without opening it
+        header = read_file_header(index.get_idx_file(), BPlusTreeFile.HEADER_SIZE)
+        if header is None:
+            return 1, 1.0
+        _, node_count, height, record_count, *_ = struct.unpack(BPlusTreeFile.HEADER_FORMAT, header)
+        return max(1, height), max(1.0, record_count / max(1, node_count))
+
+    @staticmethod
+    def range_bounds(kind, value) -> tuple[any, any]:
+        if kind is exp.Between:
+            return value
+        if kind in (exp.GT, exp.GTE):
+            return value, None
+        return None, value
+
+    @staticmethod
+    def rtree_window(parts: list[Expression]):
+        # (first column, (min_1, min_2, max_1, max_2)) when the condition is
+        # two BETWEENs, the window an R-tree over those two columns answers
+        betweens = [column_between(part) for part in parts]
+        if len(betweens) != 2 or None in betweens:
+            return None
+        (first, low_1, high_1), (_, low_2, high_2) = betweens
+        return first, (float(low_1), float(low_2), float(high_1), float(high_2))
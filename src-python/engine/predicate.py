@@ -0,0 +1,143 @@
+from decimal import Decimal
+
+import numpy as np
+from sqlglot import expressions as exp
+
+# Compiles a WHERE condition into a function over a row dict. Column names
+# are resolved through names (lower case name -> key in the row), so the
+# same condition works on full rows and on projected ones.
+COMPARISONS = {
+    exp.EQ:  lambda a, b: a == b,
+    exp.NEQ: lambda a, b: a != b,
+    exp.GT:  lambda a, b: a > b,
+    exp.GTE: lambda a, b: a >= b,
+    exp.LT:  lambda a, b: a < b,
+    exp.LTE: lambda a, b: a <= b,
+}
+FLIPPED = {exp.EQ: exp.EQ, exp.NEQ: exp.NEQ, exp.GT: exp.LT, exp.GTE: exp.LTE, exp.LT: exp.GT, exp.LTE: exp.GTE}
+
+def conjuncts(condition: exp.Expression | None) -> list[exp.Expression]:
+    # the AND-ed parts of a condition
+    if condition is None:
+        return []
+    condition = condition.unnest()
+    if isinstance(condition, exp.And):
+        return conjuncts(condition.this) + conjuncts(condition.expression)
+    return [condition]
+
+def column_comparison(condition: exp.Expression):
+    # (column name, comparison class, value) for `column op literal` in
+    # either order, otherwise None
+    for kind in COMPARISONS:
+        if isinstance(condition, kind):
+            left, right = condition.this, condition.expression
+            if isinstance(left, exp.Column) and isinstance(right, exp.Literal | exp.Neg | exp.Boolean):
+                return left.name, kind, right.to_py()
+            if isinstance(right, exp.Column) and isinstance(left, exp.Literal | exp.Neg | exp.Boolean):
+                return right.name, FLIPPED[kind], left.to_py()
+    return None
+
+def column_between(condition: exp.Expression):
+    # (column name, low, high) for `column BETWEEN low AND high`
+    if isinstance(condition, exp.Between) and isinstance(condition.this, exp.Column):
+        return condition.this.name, condition.args['low'].to_py(), condition.args['high'].to_py()
+    return None
+
+def condition_columns(condition: exp.Expression | None) -> list[str]:
+    if condition is None:
+        return []
+    return list(dict.fromkeys(column.name for column in condition.find_all(exp.Column)))
+
+def compile_predicate(condition: exp.Expression | None, names: dict[str, str]):
+    if condition is None:
+        return lambda row: True
+    return _compile(condition.unnest(), names)
+
+def _compile(condition: exp.Expression, names: dict[str, str]):
+    if isinstance(condition, exp.And):
+        left, right = _compile(condition.this.unnest(), names), _compile(condition.expression.unnest(), names)
+        return lambda row: left(row) and right(row)
+    if isinstance(condition, exp.Or):
+        left, right = _compile(condition.this.unnest(), names), _compile(condition.expression.unnest(), names)
+        return lambda row: left(row) or right(row)
+    if isinstance(condition, exp.Not):
+        inner = _compile(condition.this.unnest(), names)
+        return lambda row: not inner(row)
+
+    between = column_between(condition)
+    if between is not None:
+        key, low, high = _key(between[0], names), between[1], between[2]
+        return lambda row: row[key] is not None and low <= row[key] <= high
+
+    if isinstance(condition, exp.In) and isinstance(condition.this, exp.Column):
+        key = _key(condition.this.name, names)
+        values = {value.to_py() for value in condition.expressions}
+        return lambda row: row[key] in values
+
+    comparison = column_comparison(condition)
+    if comparison is not None:
+        key, compare, value = _key(comparison[0], names), COMPARISONS[comparison[1]], comparison[2]
+        return lambda row: row[key] is not None and compare(row[key], value)
+
+    raise ValueError(f"Error: condición no soportada: {condition.sql()}")
+
+def _key(column_name: str, names: dict[str, str]) -> str:
+    key = names.get(column_name.lower())
+    if key is None:
+        raise ValueError(f"Error: columna '{column_name}' no encontrada en la tabla")
+    return key
+
+def compile_mask(condition: exp.Expression, names: dict[str, str], columns: set[str]):
+    # The condition over whole columns, for array scans: a function from a
+    # column getter (row key -> numpy array) to a boolean array. None when a
+    # part of it reads a column not in columns or compares with something
+    # other than a number, so the caller falls back to compile_predicate.
+    try:
+        return _compile_mask(condition.unnest(), names, columns)
+    except ValueError:
+        return None
+
+def _compile_mask(condition: exp.Expression, names: dict[str, str], columns: set[str]):
+    if isinstance(condition, exp.And):
+        left = _compile_mask(condition.this.unnest(), names, columns)
+        right = _compile_mask(condition.expression.unnest(), names, columns)
+        return lambda column: left(column) & right(column)
+    if isinstance(condition, exp.Or):
+        left = _compile_mask(condition.this.unnest(), names, columns)
+        right = _compile_mask(condition.expression.unnest(), names, columns)
+        return lambda column: left(column) | right(column)
+    if isinstance(condition, exp.Not):
+        inner = _compile_mask(condition.this.unnest(), names, columns)
+        return lambda column: ~inner(column)
+
+    between = column_between(condition)
+    if between is not None:
+        key, low, high = _array_key(between[0], names, columns), _number(between[1]), _number(between[2])
+        return lambda column: (column(key) >= low) & (column(key) <= high)
+
+    if isinstance(condition, exp.In) and isinstance(condition.this, exp.Column):
+        key = _array_key(condition.this.name, names, columns)
+        values = [_number(value.to_py()) for value in condition.expressions]
+        return lambda column: np.isin(column(key), values)
+
+    comparison = column_comparison(condition)
+    if comparison is not None:
+        key, compare = _array_key(comparison[0], names, columns), COMPARISONS[comparison[1]]
+        value = _number(comparison[2])
+        return lambda column: compare(column(key), value)
+
+    raise ValueError(f"Error: condición no soportada: {condition.sql()}")
+
+def _array_key(column_name: str, names: dict[str, str], columns: set[str]) -> str:
+    key = _key(column_name, names)
+    if key not in columns:
+        raise ValueError(f"Error: la columna '{key}' no se puede leer como array")
+    return key
+
+def _number(value) -> int | float | bool:
+    # decimal literals are compared as the doubles the column stores
+    if isinstance(value, Decimal):
+        return float(value)
+    if not isinstance(value, int | float | bool):
+        raise ValueError(f"Error: valor no numérico: {value!r}")
+    return value
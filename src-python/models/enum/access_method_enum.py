@@ -0,0 +1,8 @@
+from enum import IntEnum
+
+class AccessMethod(IntEnum):
+    SEQ_SCAN     = 0  # every page of the heap
+    BTREE_POINT  = 1  # B+ tree lookup of one key
+    BTREE_RANGE  = 2  # B+ tree leaf walk between two keys
+    HASH_POINT   = 3  # extendible or linear hash lookup of one key
+    RTREE_RANGE  = 4  # R-tree window query
@@ -0,0 +1,6 @@
+from enum import IntEnum
+
+class Durability(IntEnum):
+    BATCH       = 0  # write back after every batch of rows
+    STATEMENT   = 1  # log (or write back) at the end of each statement
+    COMMIT      = 2  # same, then fsync the log (or the files)
@@ -6,4 +6,5 @@ class IndexType(IntEnum):
     ISAM        = 2
     HASH        = 3
     BTREE       = 4
-    RTREE       = 5
\ No newline at end of file
+    RTREE       = 5
+    LINEAR_HASH = 6
\ No newline at end of file
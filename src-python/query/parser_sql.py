@@ -10,7 +10,10 @@ from sqlglot.expressions import (
     Var,
     IndexParameters,
     DefaultColumnConstraint, 
-    NotNullColumnConstraint
+    NotNullColumnConstraint,
+    Column as ColumnRef,
+    Star,
+    to_table
 )
 from sqlglot import parse
 
@@ -86,6 +89,15 @@ def get_identifier(expr: Expression):
     ident = expr.find(Identifier)
     return list(ident.args.values())[0]
 
+def get_projection(expr: Expression) -> list[str] | None:
+    # selected column names, or None when the rows need every column
+    names = []
+    for projection in expr.expressions:
+        if not isinstance(projection, ColumnRef) or isinstance(projection.this, Star):
+            return None
+        names.append(projection.name)
+    return names
+
 def get_index_type(expr: Expression) -> str:
     params = expr.find(IndexParameters)
     index = params.find(Var)
@@ -96,6 +108,21 @@ def get_column_name(expr: Expression) -> str:
     identifier = params.find(Identifier)
     return identifier.name if identifier else None
 
+def get_index_options(expr: Expression) -> dict[str, any]:
+    params = expr.find(IndexParameters)
+    options = {}
+    for prop in params.args.get("with_storage") or []:
+        options[prop.name.lower()] = prop.args["value"].to_py()
+    return options
+
+def get_command_table(expr: Expression):
+    # statements sqlglot keeps as a Command (VACUUM t) carry the rest of the
+    # text as a literal
+    if expr.expression is None or not expr.expression.name.strip():
+        raise ValueError(f"Error: {expr.this} requiere el nombre de una tabla")
+    table = to_table(expr.expression.name.strip().rstrip(';'))
+    return table.catalog, table.db, table.name
+
 def get_copy_info(expr: Expression):
     table = expr.find(Table)
     filename = expr.find(Literal)
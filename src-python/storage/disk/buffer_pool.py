@@ -0,0 +1,232 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+DEFAULT_POOL_SIZE = 64 * 1024 * 1024  # 64 MB
+
+@dataclass
+class Frame:
+    file: any  # PagedFile
+    page_no: int
+    data: bytearray
+    pin_count: int = 0
+    dirty: bool = False
+    referenced: bool = True
+    unlogged: bool = False  # changed since its image was last logged
+    lsn: int = 0  # LSN of its last logged image
+
+    def mark_dirty(self) -> None:
+        self.dirty = True
+        self.unlogged = True
+
+# Shared page cache for the heap and index files. Frames are keyed by
+# (file path, page number) and can have different sizes, so the budget is in
+# bytes. Victims are chosen with the clock (second chance) policy: the frames
+# dict is the clock ring and its first entry is the hand.
+# With a write-ahead log attached, a dirty page is logged and the log flushed
+# up to its LSN before the page is written back (see storage/disk/wal.py).
+class BufferPool:
+    def __init__(self, capacity: int = DEFAULT_POOL_SIZE):
+        self.capacity = capacity
+        self.used = 0
+        self.frames: OrderedDict[tuple[str, int], Frame] = OrderedDict()
+        self.lock = threading.RLock()
+        self.wal = None  # WriteAheadLog
+        self.unsynced: set = set()  # files written back since their last fsync
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+
+    # pin / unpin
+    def fetch_page(self, file, page_no: int) -> Frame:
+        key = (file.path, page_no)
+        with self.lock:
+            frame = self.frames.get(key)
+            if frame is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                frame = self._add_frame(file, page_no, bytearray(file.read_raw(page_no)))
+            frame.pin_count += 1
+            frame.referenced = True
+            return frame
+
+    def fetch_resident(self, file, page_no: int) -> Frame | None:
+        # pins the page only if it is already cached, never reads it in
+        with self.lock:
+            frame = self.frames.get((file.path, page_no))
+            if frame is not None:
+                self.hits += 1
+                frame.pin_count += 1
+                frame.referenced = True
+            return frame
+
+    def unpin_page(self, frame: Frame, dirty: bool = False) -> None:
+        with self.lock:
+            if frame.pin_count <= 0:
+                raise RuntimeError(f"Error: page {frame.page_no} of {frame.file.path} is not pinned")
+            frame.pin_count -= 1
+            if dirty:
+                frame.mark_dirty()
+
+    @contextmanager
+    def page(self, file, page_no: int):
+        frame = self.fetch_page(file, page_no)
+        try:
+            yield frame
+        finally:
+            self.unpin_page(frame)
+
+    # whole page helpers
+    def read_page(self, file, page_no: int) -> bytes:
+        with self.page(file, page_no) as frame:
+            return bytes(frame.data)
+
+    def write_page(self, file, page_no: int, data: bytes) -> None:
+        key = (file.path, page_no)
+        with self.lock:
+            frame = self.frames.get(key)
+            if frame is None:
+                # the page is overwritten entirely, no need to read it first
+                frame = self._add_frame(file, page_no, bytearray(data))
+            else:
+                frame.data[:] = data
+            frame.referenced = True
+            frame.mark_dirty()
+
+    # write back
+    def flush_page(self, frame: Frame) -> None:
+        self.flush_frames([frame])
+
+    def flush_file(self, file) -> None:
+        with self.lock:
+            self.flush_frames([frame for frame in self.frames.values() if frame.file is file])
+
+    def flush_all(self) -> None:
+        with self.lock:
+            self.flush_frames(list(self.frames.values()))
+
+    def flush_frames(self, frames: list[Frame]) -> None:
+        with self.lock:
+            dirty = [frame for frame in frames if frame.dirty]
+            if not dirty:
+                return
+            if self.wal is not None:
+                self._log([frame for frame in dirty if frame.unlogged])
+                self.wal.flush(max(frame.lsn for frame in dirty))
+            for frame in dirty:
+                frame.file.write_raw(frame.page_no, frame.data)
+                frame.dirty = False
+                frame.unlogged = False
+                self.unsynced.add(frame.file)
+                self.writes += 1
+
+    def sync_files(self) -> None:
+        # fsyncs every file written back since it was last synced; the
+        # fsyncs run outside the lock so statements are not held up
+        with self.lock:
+            files = list(self.unsynced)
+            self.unsynced.clear()
+        for file in files:
+            if file.fd >= 0:
+                file.sync()
+
+    # logging
+    def log_dirty_pages(self, skip_pinned: bool = False) -> int:
+        # appends the image of every page changed since it was last logged;
+        # returns the LSN the log has to be flushed to for them. A thread
+        # other than the one changing the pages skips the pinned ones, which
+        # may be half way through a change
+        with self.lock:
+            self._log([frame for frame in self.frames.values()
+                       if frame.unlogged and not (skip_pinned and frame.pin_count)])
+            return self.wal.written_lsn
+
+    def dirty_pages(self, file) -> list[tuple[int, bytes]]:
+        # (page number, copy of the data) of the pages of file changed since
+        # they were last written back
+        with self.lock:
+            return [(frame.page_no, bytes(frame.data)) for frame in self.frames.values()
+                    if frame.file is file and frame.dirty]
+
+    def discard_file(self, file) -> None:
+        # drops the cached pages of a file without writing them back
+        with self.lock:
+            for key, frame in list(self.frames.items()):
+                if frame.file is file:
+                    del self.frames[key]
+                    self.used -= len(frame.data)
+
+    # stats
+    def get_hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "capacity": self.capacity,
+                "used": self.used,
+                "frames": len(self.frames),
+                "dirty": sum(1 for f in self.frames.values() if f.dirty),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.get_hit_rate(),
+                "evictions": self.evictions,
+                "writes": self.writes,
+            }
+
+    # helpers
+    def _log(self, frames: list[Frame]) -> None:
+        if self.wal is None or not frames:
+            for frame in frames:
+                frame.unlogged = False
+            return
+        lsns = self.wal.append_pages([(frame.file.path, frame.file.page_offset(frame.page_no), bytes(frame.data))
+                                      for frame in frames])
+        for frame, lsn in zip(frames, lsns):
+            frame.lsn = lsn
+            frame.unlogged = False
+
+    def _add_frame(self, file, page_no: int, data: bytearray) -> Frame:
+        self._reserve(len(data))
+        frame = Frame(file, page_no, data)
+        self.frames[(file.path, page_no)] = frame
+        self.used += len(data)
+        return frame
+
+    def _reserve(self, size: int) -> None:
+        while self.frames and self.used + size > self.capacity:
+            self._evict()
+
+    def _evict(self) -> None:
+        # every frame gets at most one second chance, so two turns of the hand
+        # are enough to find a victim unless all of them are pinned
+        for _ in range(2 * len(self.frames)):
+            key, frame = next(iter(self.frames.items()))
+            if frame.pin_count > 0 or frame.referenced:
+                frame.referenced = False
+                self.frames.move_to_end(key)
+                continue
+            self.flush_page(frame)
+            del self.frames[key]
+            self.used -= len(frame.data)
+            self.evictions += 1
+            return
+        raise RuntimeError("Error: buffer pool exhausted, all pages are pinned")
+
+_buffer_pool = BufferPool()
+
+def get_buffer_pool() -> BufferPool:
+    return _buffer_pool
+
+def configure_buffer_pool(capacity: int) -> BufferPool:
+    global _buffer_pool
+    with _buffer_pool.lock:
+        _buffer_pool.flush_all()
+        wal = _buffer_pool.wal
+        _buffer_pool = BufferPool(capacity)
+        _buffer_pool.wal = wal
+    return _buffer_pool
@@ -0,0 +1,129 @@
+import threading
+import time
+
+from storage.disk.buffer_pool import get_buffer_pool
+
+PINNED_RETRY_DELAY = 0.001  # wait before writing back pages that were pinned
+
+# Fuzzy checkpoints: the log is cut at a redo LSN and the pages that were
+# dirty at that moment are written back in small batches while statements
+# keep running, with a pause between batches so the writes are spread out
+# instead of arriving as one burst. Pages pinned by a statement may be half
+# changed, so they are left for a later pass. Once they are synced the redo
+# LSN is recorded and the log segments before it are deleted, so a restart
+# only replays what was logged since the last checkpoint.
+# The background thread checkpoints every interval seconds, or earlier when
+# request() is called (the log grew past its limit).
+class Checkpointer:
+    def __init__(self, interval: float = 30.0, batch_pages: int = 64, batch_delay: float = 0.005):
+        self.interval = interval
+        self.batch_pages = batch_pages
+        self.batch_delay = batch_delay
+
+        self.lock = threading.Lock()  # one checkpoint at a time
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread: threading.Thread | None = None
+
+        self.checkpoints = 0
+        self.last_lsn = 0
+        self.last_duration = 0.0
+        self.last_pages = 0
+        self.last_bytes = 0
+        self.total_pages = 0
+        self.total_bytes = 0
+
+    def checkpoint(self) -> int | None:
+        # returns the redo LSN, or None without a write-ahead log
+        pool = get_buffer_pool()
+        wal = pool.wal
+        if wal is None:
+            return None
+        with self.lock:
+            start = time.perf_counter()
+            with pool.lock:
+                pool.log_dirty_pages(skip_pinned=True)
+                redo_lsn = wal.roll()
+                frames = [frame for frame in pool.frames.values() if frame.dirty]
+
+            pages = written = 0
+            while frames:
+                pinned = []
+                for i in range(0, len(frames), self.batch_pages):
+                    with pool.lock:
+                        # frames written back or dropped in the meantime are skipped
+                        batch = [frame for frame in frames[i:i + self.batch_pages]
+                                 if frame.dirty and pool.frames.get((frame.file.path, frame.page_no)) is frame]
+                        # statements change pinned pages in place without the
+                        # pool lock, so those are written once unpinned; a pin
+                        # only lasts for one page operation
+                        pinned += [frame for frame in batch if frame.pin_count]
+                        batch = [frame for frame in batch if not frame.pin_count]
+                        pool.flush_frames(batch)
+                    pages += len(batch)
+                    written += sum(len(frame.data) for frame in batch)
+                    if self.batch_delay and i + self.batch_pages < len(frames):
+                        time.sleep(self.batch_delay)
+                frames = pinned
+                if frames:
+                    time.sleep(self.batch_delay or PINNED_RETRY_DELAY)
+            pool.sync_files()
+            wal.discard_before(redo_lsn)
+
+            self.checkpoints += 1
+            self.last_lsn = redo_lsn
+            self.last_duration = time.perf_counter() - start
+            self.last_pages = pages
+            self.last_bytes = written
+            self.total_pages += pages
+            self.total_bytes += written
+            return redo_lsn
+
+    # background thread
+    def start(self) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="checkpointer", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        # stops the thread after a last checkpoint
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.wakeup.set()
+        self.thread.join()
+        self.thread = None
+
+    def request(self) -> None:
+        # wakes the thread up, or checkpoints right away when it is not running
+        if self.thread is not None and self.thread.is_alive():
+            self.wakeup.set()
+        else:
+            self.checkpoint()
+
+    def _run(self) -> None:
+        while not self.stopping.is_set():
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.checkpoint()
+
+    # stats
+    def get_stats(self) -> dict:
+        wal = get_buffer_pool().wal
+        return {
+            "checkpoints": self.checkpoints,
+            "last_lsn": self.last_lsn,
+            "last_duration": self.last_duration,
+            "last_pages": self.last_pages,
+            "last_bytes": self.last_bytes,
+            "total_pages": self.total_pages,
+            "total_bytes": self.total_bytes,
+            "log_size": wal.size if wal is not None else 0,
+        }
+
+_checkpointer = Checkpointer()
+
+def get_checkpointer() -> Checkpointer:
+    return _checkpointer
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from datetime import date, datetime, time
+from functools import lru_cache
 import uuid
 import struct
 
@@ -7,240 +8,258 @@ from catalog.table import Table
 from catalog.column import Column
 from models.enum.data_type_enum import DataTypeTag
 
+EPOCH_DATE = date(1970, 1, 1)
+
+# per type converters from python values to what struct stores
+def _to_int(value) -> int:
+    return int(value)
+
+def _to_float(value) -> float:
+    return float(value)
+
+def _to_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.lower() in ('true', '1', 'yes', 'on')
+    return bool(value)
+
+def _to_uuid_bytes(value) -> bytes:
+    if isinstance(value, str):
+        return uuid.UUID(value).bytes
+    elif isinstance(value, uuid.UUID):
+        return value.bytes
+    return uuid.UUID(str(value)).bytes
+
+def _to_days(value) -> int:
+    if isinstance(value, str):
+        return (datetime.strptime(value, '%m/%d/%Y').date() - EPOCH_DATE).days
+    elif isinstance(value, datetime):
+        return (value.date() - EPOCH_DATE).days
+    elif isinstance(value, date):
+        return (value - EPOCH_DATE).days
+    return int(value)
+
+def _to_seconds(value) -> int:
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%H:%M:%S').time()
+    if isinstance(value, time):
+        return value.hour * 3600 + value.minute * 60 + value.second
+    return int(value)
+
+def _to_micros(value) -> int:
+    if isinstance(value, str):
+        try:
+            value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            try:
+                value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f')
+            except ValueError:
+                value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1_000_000)
+    elif isinstance(value, date):
+        return int(datetime.combine(value, time.min).timestamp() * 1_000_000)
+    return int(value)
+
+# and back from what struct returns
+def _from_text(value: bytes) -> str:
+    return value.decode('utf-8').rstrip('\x00')
+
+def _from_uuid_bytes(value: bytes) -> str:
+    return str(uuid.UUID(bytes=value))
+
+def _from_days(value: int) -> date | None:
+    return EPOCH_DATE + date.resolution * value if value != 0 else None
+
+def _from_seconds(value: int) -> time | None:
+    if value == 0:
+        return None
+    return time(value // 3600, (value % 3600) // 60, value % 60)
+
+def _from_micros(value: int) -> datetime | None:
+    if value == 0:
+        return None
+    return datetime.fromtimestamp(value / 1_000_000)
+
+# struct code, converter for packing, converter after unpacking (None when
+# struct already returns the right value)
+COLUMN_CODECS = {
+    DataTypeTag.SMALLINT: ('h', _to_int, None),
+    DataTypeTag.INT: ('i', _to_int, None),
+    DataTypeTag.BIGINT: ('q', _to_int, None),
+    DataTypeTag.DOUBLE: ('d', _to_float, None),
+    DataTypeTag.BOOLEAN: ('?', _to_bool, None),
+    DataTypeTag.UUID: ('16s', _to_uuid_bytes, _from_uuid_bytes),
+    DataTypeTag.DATE: ('I', _to_days, _from_days),
+    DataTypeTag.TIME: ('I', _to_seconds, _from_seconds),
+    DataTypeTag.TIMESTAMP: ('Q', _to_micros, _from_micros),
+}
+TEXT_TYPES = (DataTypeTag.CHAR, DataTypeTag.VARCHAR)
+
+# Row layout compiled once per list of column types: one struct.Struct for
+# the whole row (the columns followed by the active flag) and a converter
+# per column, so packing a row is a single pass with no type dispatch.
+class RecordCodec:
+    def __init__(self, layout: tuple[tuple[int, int], ...]):
+        codes = []
+        packers = []
+        self.converters = []  # per column, applied after unpacking
+        for type_id, length in layout:
+            if type_id in TEXT_TYPES:
+                codes.append(f'{length}s')
+                packers.append(self._text_packer(length))
+                self.converters.append(_from_text)
+                continue
+            if type_id not in COLUMN_CODECS:
+                raise ValueError(f"Tipo de dato no soportado en registros: {DataTypeTag(type_id).name}")
+            code, to_stored, from_stored = COLUMN_CODECS[type_id]
+            codes.append(code)
+            packers.append(self._nullable(to_stored, b'' if code.endswith('s') else 0))
+            self.converters.append(from_stored)
+
+        self.codes = codes
+        self.offsets = [struct.calcsize('<' + ''.join(codes[:position])) for position in range(len(codes))]
+        self.format_str = '<' + ''.join(codes) + '?'  # active(1) or delete(0)
+        self.struct = struct.Struct(self.format_str)
+        self.size = self.struct.size
+        self._packers = tuple(packers)
+        self._unpackers = tuple((position, from_stored) for position, from_stored in enumerate(self.converters)
+                                if from_stored is not None)
+        self._projections: dict[tuple[int, ...], RecordProjection] = {}
+
+    def pack(self, data_tuple: tuple[any, ...], is_active: bool = True) -> bytes:
+        return self.struct.pack(*self._values(data_tuple), is_active)
+
+    def pack_into(self, buffer: bytearray, offset: int, data_tuple: tuple[any, ...], is_active: bool = True) -> None:
+        self.struct.pack_into(buffer, offset, *self._values(data_tuple), is_active)
+
+    def unpack(self, data_bytes: bytes) -> tuple[tuple[any, ...], bool]:
+        return self.unpack_from(data_bytes, 0)
+
+    def unpack_from(self, buffer: bytes | bytearray, offset: int = 0) -> tuple[tuple[any, ...], bool]:
+        *values, is_active = self.struct.unpack_from(buffer, offset)
+        for position, from_stored in self._unpackers:
+            values[position] = from_stored(values[position])
+        return tuple(values), is_active
+
+    def projection(self, positions: tuple[int, ...]) -> 'RecordProjection':
+        if positions not in self._projections:
+            self._projections[positions] = RecordProjection(self, positions)
+        return self._projections[positions]
+
+    def _values(self, data_tuple: tuple[any, ...]) -> list:
+        return [pack(value) for pack, value in zip(self._packers, data_tuple)]
+
+    @staticmethod
+    def _nullable(to_stored, default):
+        return lambda value: default if value is None else to_stored(value)
+
+    @staticmethod
+    def _text_packer(length: int):
+        # struct pads and truncates, only the encoding is left to do
+        return lambda value: b'' if value is None else str(value).encode('utf-8')[:length]
+
+# Decodes only some columns of a row with one struct.Struct whose pad bytes
+# ('x') skip the others, so those are never unpacked or converted.
+class RecordProjection:
+    def __init__(self, codec: RecordCodec, positions: tuple[int, ...]):
+        self.positions = positions
+        stored = sorted(set(positions), key=lambda position: codec.offsets[position])
+        format_str, end = '<', 0
+        for position in stored:
+            if codec.offsets[position] > end:
+                format_str += f'{codec.offsets[position] - end}x'
+            format_str += codec.codes[position]
+            end = codec.offsets[position] + struct.calcsize('<' + codec.codes[position])
+        if codec.size - 1 > end:
+            format_str += f'{codec.size - 1 - end}x'
+        self.struct = struct.Struct(format_str + '?')
+        # where each asked column is in the unpacked values, and its converter
+        index = {position: i for i, position in enumerate(stored)}
+        self._order = None if tuple(stored) == positions else tuple(index[position] for position in positions)
+        self._unpackers = tuple((i, codec.converters[position]) for i, position in enumerate(stored)
+                                if codec.converters[position] is not None)
+        self._active_offset = codec.size - 1
+
+    def is_active(self, buffer: bytes | bytearray, offset: int = 0) -> bool:
+        return buffer[offset + self._active_offset] != 0
+
+    def read(self, buffer: bytes | bytearray, offset: int = 0) -> tuple[any, ...]:
+        return self.unpack_from(buffer, offset)[0]
+
+    def unpack_from(self, buffer: bytes | bytearray, offset: int = 0) -> tuple[tuple[any, ...], bool]:
+        *values, is_active = self.struct.unpack_from(buffer, offset)
+        for i, from_stored in self._unpackers:
+            values[i] = from_stored(values[i])
+        if self._order is not None:
+            values = [values[i] for i in self._order]
+        return tuple(values), is_active
+
+@lru_cache(maxsize=None)
+def compile_record_codec(layout: tuple[tuple[int, int], ...]) -> RecordCodec:
+    return RecordCodec(layout)
+
 @dataclass
 class FixedLengthRecord:
     table: Table
     format_str: str = field(default=None, init=False)
+    codec: RecordCodec = field(default=None, init=False)
 
     def set_format_str(self) -> None:
         # reference: https://docs.python.org/3/library/struct.html
-        format_str = "<"
-        columns = self.table.get_tab_columns()
-        for column in columns:
-            column: Column
-            if column.get_att_type_id() == DataTypeTag.SMALLINT:
-                format_str += "h"
-            elif column.att_type_id == DataTypeTag.INT:
-                format_str += 'i'
-            elif column.att_type_id == DataTypeTag.BIGINT:
-                format_str += 'q'
-            elif column.att_type_id == DataTypeTag.DOUBLE:
-                format_str += 'd'
-            elif column.att_type_id == DataTypeTag.BOOLEAN:
-                format_str += '?'
-            elif column.att_type_id in (DataTypeTag.CHAR, DataTypeTag.VARCHAR):
-                format_str += f'{column.get_att_len()}s'
-            elif column.att_type_id == DataTypeTag.UUID:
-                format_str += '16s'
-            elif column.att_type_id == DataTypeTag.DATE:
-                format_str += 'I'
-            elif column.att_type_id == DataTypeTag.TIME:
-                format_str += 'I'
-            elif column.att_type_id == DataTypeTag.TIMESTAMP:
-                format_str += 'Q'
-        
-        format_str += '?' # active(1) or delete(0)
-        self.format_str = format_str
-    
+        layout = tuple((int(column.get_att_type_id()), column.get_att_len())
+                       for column in self.table.get_tab_columns())
+        self.codec = compile_record_codec(layout)
+        self.format_str = self.codec.format_str
+
     def convert_value(self, value: any, column: Column) -> any:
-        if column.get_att_type_id() == DataTypeTag.CHAR:
-            return str(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.VARCHAR:
+        type_id = column.get_att_type_id()
+        if type_id in TEXT_TYPES or type_id == DataTypeTag.UUID:
             return str(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.UUID:
-            return str(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.DATE:
-            if isinstance(value, str):
-                parsed_date = datetime.strptime(value, '%m/%d/%Y').date()
-                return (parsed_date - date(1970, 1, 1)).days
-            elif isinstance(value, date):
-                return (value - date(1970, 1, 1)).days
-            elif isinstance(value, datetime):
-                return (value.date() - date(1970, 1, 1)).days
-            else:
-                return int(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.TIME:
-            if isinstance(value, str):
-                parsed_time = datetime.strptime(value, '%H:%M:%S').time()
-                return parsed_time.hour * 3600 + parsed_time.minute * 60 + parsed_time.second
-            elif isinstance(value, time):
-                return value.hour * 3600 + value.minute * 60 + value.second
-            else:
-                return int(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.TIMESTAMP:
-            if isinstance(value, str):
-                try:
-                    parsed_datetime = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    try:
-                        parsed_datetime = datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        parsed_datetime = datetime.fromisoformat(value)
-                return int(parsed_datetime.timestamp() * 1_000_000)
-            elif isinstance(value, datetime):
-                return int(value.timestamp() * 1_000_000)
-            elif isinstance(value, date):
-                datetime_value = datetime.combine(value, time.min)
-                return int(datetime_value.timestamp() * 1_000_000)
-            else:
-                return int(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.BOOLEAN:
-            if isinstance(value, str):
-                return value.lower() in ('true', '1', 'yes', 'on')
-            else:
-                return bool(value)
-        
-        elif column.get_att_type_id() in (DataTypeTag.SMALLINT, DataTypeTag.INT, DataTypeTag.BIGINT):
-            return int(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.DOUBLE:
-            return float(value)
-        
+        if type_id in COLUMN_CODECS:
+            return COLUMN_CODECS[type_id][1](value)
         return value
 
     def convert_value_for_packing(self, value: any, column: Column):
-        if value is None:
-            if column.get_att_type_id() in (DataTypeTag.CHAR, DataTypeTag.VARCHAR):
-                return b'\x00' * column.get_att_len()
-            elif column.get_att_type_id() == DataTypeTag.UUID:
-                return b'\x00' * 16
-            elif column.get_att_type_id() in (DataTypeTag.DATE, DataTypeTag.TIME):
-                return 0
-            elif column.get_att_type_id() == DataTypeTag.TIMESTAMP:
-                return 0
-            elif column.get_att_type_id() == DataTypeTag.BOOLEAN:
-                return False
-            else:
-                return 0
-        
-        if column.get_att_type_id() == DataTypeTag.CHAR:
-            str_value = str(value).encode('utf-8')
-            return str_value.ljust(column.get_att_len(), b'\x00')[:column.get_att_len()]
-        
-        elif column.get_att_type_id() == DataTypeTag.VARCHAR:
-            str_value = str(value).encode('utf-8')[:column.get_att_len()]
-            return str_value.ljust(column.get_att_len(), b'\x00')
-        
-        elif column.get_att_type_id() == DataTypeTag.UUID:
-            if isinstance(value, str):
-                return uuid.UUID(value).bytes
-            elif isinstance(value, uuid.UUID):
-                return value.bytes
-            else:
-                return uuid.UUID(str(value)).bytes
-        
-        elif column.get_att_type_id() == DataTypeTag.DATE:
-            if isinstance(value, str):
-                parsed_date = datetime.strptime(value, '%m/%d/%Y').date()
-                return (parsed_date - date(1970, 1, 1)).days
-            elif isinstance(value, date):
-                return (value - date(1970, 1, 1)).days
-            elif isinstance(value, datetime):
-                return (value.date() - date(1970, 1, 1)).days
-            else:
-                return int(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.TIME:
-            if isinstance(value, str):
-                parsed_time = datetime.strptime(value, '%H:%M:%S').time()
-                return parsed_time.hour * 3600 + parsed_time.minute * 60 + parsed_time.second
-            elif isinstance(value, time):
-                return value.hour * 3600 + value.minute * 60 + value.second
-            else:
-                return int(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.TIMESTAMP:
-            if isinstance(value, str):
-                try:
-                    parsed_datetime = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    try:
-                        parsed_datetime = datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f')
-                    except ValueError:
-                        parsed_datetime = datetime.fromisoformat(value)
-                return int(parsed_datetime.timestamp() * 1_000_000)
-            elif isinstance(value, datetime):
-                return int(value.timestamp() * 1_000_000)
-            elif isinstance(value, date):
-                datetime_value = datetime.combine(value, time.min)
-                return int(datetime_value.timestamp() * 1_000_000)
-            else:
-                return int(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.BOOLEAN:
-            if isinstance(value, str):
-                return value.lower() in ('true', '1', 'yes', 'on')
-            else:
-                return bool(value)
-        
-        elif column.get_att_type_id() in (DataTypeTag.SMALLINT, DataTypeTag.INT, DataTypeTag.BIGINT):
-            return int(value)
-        
-        elif column.get_att_type_id() == DataTypeTag.DOUBLE:
-            return float(value)
-        
+        type_id = column.get_att_type_id()
+        if type_id in TEXT_TYPES:
+            return RecordCodec._text_packer(column.get_att_len())(value).ljust(column.get_att_len(), b'\x00')
+        if type_id in COLUMN_CODECS:
+            code, to_stored, _ = COLUMN_CODECS[type_id]
+            if value is None:
+                return b'\x00' * 16 if code == '16s' else 0
+            return to_stored(value)
         return value
 
     def convert_from_bytes(self, value: bytes, column: Column) -> any:
-        if column.get_att_type_id() in (DataTypeTag.CHAR, DataTypeTag.VARCHAR):
-            if isinstance(value, bytes):
-                value = value.decode('utf-8').rstrip('\x00')
-            return value
-        elif column.get_att_type_id() == DataTypeTag.UUID:
-            return str(uuid.UUID(bytes=value))
-        elif column.get_att_type_id() == DataTypeTag.DATE:
-            return date(1970, 1, 1) + date.resolution * value if value != 0 else None
-        elif column.get_att_type_id() == DataTypeTag.TIME:
-            if value == 0:
-                return None
-            hours = value // 3600
-            minutes = (value % 3600) // 60
-            seconds = value % 60
-            return time(hours, minutes, seconds)
-        elif column.get_att_type_id() == DataTypeTag.TIMESTAMP:
-            if value == 0:
-                return None
-            return datetime.fromtimestamp(value / 1_000_000)
-        elif column.att_type_id == DataTypeTag.BOOLEAN:
-            return bool(value)
+        type_id = column.get_att_type_id()
+        if type_id in TEXT_TYPES:
+            return _from_text(value) if isinstance(value, bytes) else value
+        if type_id in COLUMN_CODECS and COLUMN_CODECS[type_id][2] is not None:
+            return COLUMN_CODECS[type_id][2](value)
         return value
 
     def packing(self, data_tuple: tuple[any, ...], is_active: bool = True) -> bytes:
-        columns = self.table.get_tab_columns()
-        pack_values = []
-        
-        for value, column in zip(data_tuple, columns):
-            converted_value = self.convert_value_for_packing(value, column)
-            pack_values.append(converted_value)
-        
-        pack_values.append(is_active)
-        if self.format_str is None:
+        if self.codec is None:
             self.set_format_str()
-        
-        return struct.pack(self.format_str, *pack_values)
+        return self.codec.pack(data_tuple, is_active)
+
+    def packing_into(self, buffer: bytearray, offset: int, data_tuple: tuple[any, ...], is_active: bool = True) -> None:
+        if self.codec is None:
+            self.set_format_str()
+        self.codec.pack_into(buffer, offset, data_tuple, is_active)
 
     def unpacking(self, data_bytes: bytes) -> tuple[tuple[any, ...], bool]:
-        if self.format_str is None:
+        if self.codec is None:
+            self.set_format_str()
+        return self.codec.unpack(data_bytes)
+
+    def unpacking_from(self, buffer: bytes | bytearray, offset: int = 0) -> tuple[tuple[any, ...], bool]:
+        if self.codec is None:
             self.set_format_str()
+        return self.codec.unpack_from(buffer, offset)
 
-        unpacked = struct.unpack(self.format_str, data_bytes)
-        result = []
-        columns = self.table.get_tab_columns()
-        
-        for value, column in zip(unpacked[:-1], columns):
-            result.append(self.convert_from_bytes(value, column))
-        
-        is_active = unpacked[-1]
-        return tuple(result), is_active
-    
     def get_format_str(self) -> str:
         return self.format_str
-    
+
     def get_format_size(self) -> int:
-        return struct.calcsize(self.format_str)
\ No newline at end of file
+        return self.codec.size
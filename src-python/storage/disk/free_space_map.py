@@ -0,0 +1,70 @@
+import struct
+
+from storage.disk.paged_file import open_paged_file
+
+# Free space map of a heap file, kept next to it (data.dat + .fsm): one
+# counter per heap page with the number of deleted slots that can be
+# reused. The header keeps a hint, the lowest page that may have a free
+# slot, so inserts do not rescan the pages that are known to be full.
+class FreeSpaceMap:
+    SUFFIX = ".fsm"
+    HEADER = struct.Struct('<I')  # first page that may have free slots
+    PAGE_SIZE = 4096
+    ENTRY = struct.Struct('<H')
+    ENTRIES_PER_PAGE = PAGE_SIZE // ENTRY.size
+
+    def __init__(self, heap_path: str):
+        self.file = open_paged_file(str(heap_path) + self.SUFFIX, self.PAGE_SIZE, self.HEADER.size)
+        self._page_struct = struct.Struct(f'<{self.ENTRIES_PER_PAGE}H')
+
+    def is_empty(self) -> bool:
+        return self.file.is_empty()
+
+    def reset(self, counts: list[int]) -> None:
+        self.file.truncate()
+        self.file.write_header(self.HEADER.pack(0))
+        for page_no, count in enumerate(counts):
+            if count:
+                self.set(page_no, count)
+
+    def get(self, page_no: int) -> int:
+        map_page, index = divmod(page_no, self.ENTRIES_PER_PAGE)
+        if map_page >= self.file.get_page_count():
+            return 0
+        return self.ENTRY.unpack_from(self.file.read_page(map_page), index * self.ENTRY.size)[0]
+
+    def set(self, page_no: int, count: int) -> None:
+        map_page, index = divmod(page_no, self.ENTRIES_PER_PAGE)
+        if map_page >= self.file.get_page_count() and count == 0:
+            return
+        with self.file.pin(map_page, dirty=True) as frame:
+            self.ENTRY.pack_into(frame.data, index * self.ENTRY.size, count)
+        if count and page_no < self._get_hint():
+            self._set_hint(page_no)
+
+    def add(self, page_no: int, delta: int) -> None:
+        self.set(page_no, max(0, self.get(page_no) + delta))
+
+    def find(self) -> int | None:
+        # first heap page with a reusable slot, moving the hint up to it
+        hint = self._get_hint()
+        for map_page in range(hint // self.ENTRIES_PER_PAGE, self.file.get_page_count()):
+            counts = self._page_struct.unpack(self.file.read_page(map_page))
+            start = hint - map_page * self.ENTRIES_PER_PAGE if map_page == hint // self.ENTRIES_PER_PAGE else 0
+            for index in range(start, self.ENTRIES_PER_PAGE):
+                if counts[index]:
+                    page_no = map_page * self.ENTRIES_PER_PAGE + index
+                    if page_no != hint:
+                        self._set_hint(page_no)
+                    return page_no
+        self._set_hint(self.file.get_page_count() * self.ENTRIES_PER_PAGE)
+        return None
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def _get_hint(self) -> int:
+        return self.HEADER.unpack(self.file.read_header())[0]
+
+    def _set_hint(self, page_no: int) -> None:
+        self.file.write_header(self.HEADER.pack(page_no))
@@ -0,0 +1,166 @@
+import json
+import struct
+import uuid
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+
+from models.enum.data_type_enum import DataTypeTag
+
+# Order preserving encoding for index keys: comparing two encoded keys as
+# bytes gives the same result as comparing the values, so indexes can search
+# nodes and buckets without decoding them. Every key starts with a null
+# indicator byte (0 for NULL, 1 otherwise) so NULL sorts first and a zero
+# value is never mistaken for a missing one.
+class KeyCodec:
+    NULL_BYTE = b'\x00'
+    VALUE_BYTE = b'\x01'
+    EPOCH = datetime(1970, 1, 1)
+
+    INT_FORMATS = {
+        DataTypeTag.SMALLINT: '>H',
+        DataTypeTag.INT: '>I',
+        DataTypeTag.BIGINT: '>Q',
+    }
+    FIXED_SIZES = {
+        DataTypeTag.DOUBLE: 8,
+        DataTypeTag.DECIMAL: 8,
+        DataTypeTag.BOOLEAN: 1,
+        DataTypeTag.UUID: 16,
+        DataTypeTag.DATE: 4,
+        DataTypeTag.TIME: 8,
+        DataTypeTag.TIMESTAMP: 8,
+        DataTypeTag.GEOMETRIC: 32,
+        DataTypeTag.JSON: 1024,
+    }
+
+    def __init__(self, data_type: DataTypeTag, max_len: int = 0):
+        self.data_type = DataTypeTag(data_type)
+        self.max_len = max_len
+
+        if self.data_type in self.INT_FORMATS:
+            self._struct = struct.Struct(self.INT_FORMATS[self.data_type])
+            self._bias = 1 << (self._struct.size * 8 - 1)
+            value_size = self._struct.size
+            self._encode, self._decode = self._encode_int, self._decode_int
+        elif self.data_type in (DataTypeTag.CHAR, DataTypeTag.VARCHAR):
+            if max_len <= 0:
+                raise ValueError(f"Error: max_len debe ser mayor que 0 para {self.data_type.name}")
+            value_size = max_len
+            self._encode, self._decode = self._encode_text, self._decode_text
+        elif self.data_type in self.FIXED_SIZES:
+            value_size = self.FIXED_SIZES[self.data_type]
+            self._encode, self._decode = getattr(self, f'_encode_{self.data_type.name.lower()}'), \
+                getattr(self, f'_decode_{self.data_type.name.lower()}')
+        else:
+            raise ValueError(f"Tipo de dato no soportado: {data_type}")
+
+        self.size = 1 + value_size
+        self.null = bytes(self.size)
+
+    def encode(self, value: any) -> bytes:
+        if value is None:
+            return self.null
+        return self.VALUE_BYTE + self._encode(value)
+
+    def decode(self, data: bytes) -> any:
+        if data[0] == 0:
+            return None
+        return self._decode(data[1:self.size])
+
+    # integers: big-endian with the sign bit flipped
+    def _encode_int(self, value) -> bytes:
+        try:
+            return self._struct.pack(int(value) + self._bias)
+        except struct.error:
+            raise ValueError(f"Error: {value} is out of range for {self.data_type.name}")
+
+    def _decode_int(self, data: bytes) -> int:
+        return self._struct.unpack(data)[0] - self._bias
+
+    # floats: IEEE bits with the sign bit flipped for positives and every bit
+    # flipped for negatives; -0.0 and NaN are normalized first
+    def _encode_double(self, value) -> bytes:
+        value = float(value) + 0.0
+        if value != value:
+            value = float('nan')
+        bits = struct.unpack('>Q', struct.pack('>d', value))[0]
+        bits = bits ^ 0xFFFFFFFFFFFFFFFF if bits >> 63 else bits | (1 << 63)
+        return struct.pack('>Q', bits)
+
+    def _decode_double(self, data: bytes) -> float:
+        bits = struct.unpack('>Q', data)[0]
+        bits = bits ^ (1 << 63) if bits >> 63 else bits ^ 0xFFFFFFFFFFFFFFFF
+        return struct.unpack('>d', struct.pack('>Q', bits))[0]
+
+    # decimals are ordered through their double value
+    def _encode_decimal(self, value) -> bytes:
+        return self._encode_double(value)
+
+    def _decode_decimal(self, data: bytes) -> Decimal:
+        return Decimal(str(self._decode_double(data)))
+
+    # text: utf-8 bytes order like code points, padded with zeros
+    def _encode_text(self, value) -> bytes:
+        return self._pad(str(value).encode('utf-8'), self.max_len)
+
+    def _decode_text(self, data: bytes) -> str:
+        return data.rstrip(b'\0').decode('utf-8', errors='ignore')
+
+    def _encode_boolean(self, value) -> bytes:
+        return b'\x01' if value else b'\x00'
+
+    def _decode_boolean(self, data: bytes) -> bool:
+        return data != b'\x00'
+
+    def _encode_uuid(self, value) -> bytes:
+        return uuid.UUID(value).bytes if isinstance(value, str) else value.bytes
+
+    def _decode_uuid(self, data: bytes) -> uuid.UUID:
+        return uuid.UUID(bytes=data)
+
+    def _encode_date(self, value) -> bytes:
+        if isinstance(value, str):
+            value = datetime.strptime(value, '%Y-%m-%d').date()
+        elif isinstance(value, datetime):
+            value = value.date()
+        return struct.pack('>I', value.toordinal())
+
+    def _decode_date(self, data: bytes) -> date:
+        return date.fromordinal(struct.unpack('>I', data)[0])
+
+    def _encode_time(self, value) -> bytes:
+        if isinstance(value, str):
+            value = datetime.strptime(value, '%H:%M:%S').time()
+        micros = ((value.hour * 60 + value.minute) * 60 + value.second) * 1_000_000 + value.microsecond
+        return struct.pack('>Q', micros)
+
+    def _decode_time(self, data: bytes) -> time:
+        micros = struct.unpack('>Q', data)[0]
+        return (datetime.min + timedelta(microseconds=micros)).time()
+
+    def _encode_timestamp(self, value) -> bytes:
+        if isinstance(value, str):
+            value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        micros = (value.replace(tzinfo=None) - self.EPOCH) // timedelta(microseconds=1)
+        return struct.pack('>Q', micros + (1 << 63))
+
+    def _decode_timestamp(self, data: bytes) -> datetime:
+        micros = struct.unpack('>Q', data)[0] - (1 << 63)
+        return self.EPOCH + timedelta(microseconds=micros)
+
+    # geometric and json keys only need equality, not a meaningful order
+    def _encode_geometric(self, value) -> bytes:
+        return self._pad(str(value).encode('utf-8'), self.FIXED_SIZES[DataTypeTag.GEOMETRIC])
+
+    def _decode_geometric(self, data: bytes) -> str:
+        return self._decode_text(data)
+
+    def _encode_json(self, value) -> bytes:
+        return self._pad(json.dumps(value, sort_keys=True).encode('utf-8'), self.FIXED_SIZES[DataTypeTag.JSON])
+
+    def _decode_json(self, data: bytes) -> any:
+        return json.loads(self._decode_text(data))
+
+    @staticmethod
+    def _pad(data: bytes, size: int) -> bytes:
+        return data[:size].ljust(size, b'\0')
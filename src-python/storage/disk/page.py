@@ -0,0 +1,107 @@
+import struct
+
+# Slotted page layout (all offsets are relative to the start of the page):
+#
+#   +--------+------------------+ ....... +------------------------+
+#   | header | slot directory ->|  free   |<- tuple data (grows up)|
+#   +--------+------------------+ ....... +------------------------+
+#            ^ HEADER.size      ^ lower   ^ upper                  ^ page_size
+#
+# header: page_lsn, flags, slot_count, lower, upper
+# slot:   offset, length (length == 0 marks an unused slot)
+class SlottedPage:
+    HEADER = struct.Struct('<QHHHH')
+    SLOT = struct.Struct('<HH')
+
+    def __init__(self, data: bytearray):
+        self.data = data
+        self.page_size = len(data)
+
+    @classmethod
+    def empty(cls, page_size: int) -> 'SlottedPage':
+        page = cls(bytearray(page_size))
+        page.init()
+        return page
+
+    def init(self) -> None:
+        self.HEADER.pack_into(self.data, 0, 0, 0, 0, self.HEADER.size, self.page_size)
+
+    @classmethod
+    def capacity(cls, page_size: int, record_size: int) -> int:
+        return (page_size - cls.HEADER.size) // (record_size + cls.SLOT.size)
+
+    # GETTERS
+    def get_header(self) -> tuple[int, int, int, int, int]:
+        return self.HEADER.unpack_from(self.data, 0)
+
+    def get_lsn(self) -> int:
+        return self.get_header()[0]
+
+    def get_slot_count(self) -> int:
+        return self.get_header()[2]
+
+    def get_free_space(self) -> int:
+        _, _, _, lower, upper = self.get_header()
+        return upper - lower
+
+    def get_slot(self, slot_no: int) -> tuple[int, int]:
+        return self.SLOT.unpack_from(self.data, self.HEADER.size + slot_no * self.SLOT.size)
+
+    # SETTERS
+    def set_lsn(self, lsn: int) -> None:
+        struct.pack_into('<Q', self.data, 0, lsn)
+
+    def _set_header(self, flags: int, slot_count: int, lower: int, upper: int) -> None:
+        lsn = self.get_lsn()
+        self.HEADER.pack_into(self.data, 0, lsn, flags, slot_count, lower, upper)
+
+    def _set_slot(self, slot_no: int, offset: int, length: int) -> None:
+        self.SLOT.pack_into(self.data, self.HEADER.size + slot_no * self.SLOT.size, offset, length)
+
+    # METHODS
+    def is_initialized(self) -> bool:
+        _, _, _, lower, upper = self.get_header()
+        return lower >= self.HEADER.size and upper <= self.page_size
+
+    def can_fit(self, length: int) -> bool:
+        return self.get_free_space() >= length + self.SLOT.size
+
+    def insert(self, record: bytes) -> int | None:
+        allocated = self.allocate(len(record))
+        if allocated is None:
+            return None
+        slot_no, offset = allocated
+        self.data[offset:offset + len(record)] = record
+        return slot_no
+
+    def allocate(self, length: int) -> tuple[int, int] | None:
+        # reserves a slot of length bytes and returns (slot, offset) for the
+        # caller to write the record in place
+        if not self.can_fit(length):
+            return None
+        _, flags, slot_count, lower, upper = self.get_header()
+        upper -= length
+        self._set_slot(slot_count, upper, length)
+        self._set_header(flags, slot_count + 1, lower + self.SLOT.size, upper)
+        return slot_count, upper
+
+    def read(self, slot_no: int) -> bytes | None:
+        offset = self.locate(slot_no)
+        if offset is None:
+            return None
+        return bytes(self.data[offset:offset + self.get_slot(slot_no)[1]])
+
+    def locate(self, slot_no: int) -> int | None:
+        # offset of the record in the page, to decode it in place
+        if slot_no < 0 or slot_no >= self.get_slot_count():
+            return None
+        offset, length = self.get_slot(slot_no)
+        return offset if length else None
+
+    def update(self, slot_no: int, record: bytes) -> None:
+        if slot_no < 0 or slot_no >= self.get_slot_count():
+            raise IndexError(f"Error: slot {slot_no} out of range")
+        offset, length = self.get_slot(slot_no)
+        if length != len(record):
+            raise ValueError(f"Error: record size {len(record)} != slot size {length}")
+        self.data[offset:offset + length] = record
@@ -0,0 +1,319 @@
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from storage.disk.buffer_pool import get_buffer_pool, Frame
+from storage.disk.checkpointer import get_checkpointer
+from storage.disk.wal import WriteAheadLog
+
+HEADER_PAGE = -1
+INDEX_EXTENT_SIZE = 64 * 1024  # 64 KB
+
+# A data file seen as an optional header followed by fixed size pages.
+# Every access goes through the shared buffer pool; read_raw/write_raw are
+# only called by the pool to fill and write back frames. The file keeps one
+# descriptor open for its whole life and does positional I/O on it. With an
+# extent_size the file grows in preallocated extents instead of one page at
+# a time, so its physical size can be larger than the data in it.
+# view() is a read only path for pages that are not cached: it slices a
+# memory map of the file instead of loading the page into the pool. The map
+# is extended as the file grows on disk, tracked through allocated.
+class PagedFile:
+    def __init__(self, path: str | Path, page_size: int, header_size: int = 0, extent_size: int = 0):
+        self.path = os.path.abspath(path)
+        self.page_size = page_size
+        self.header_size = header_size
+        self.extent_size = extent_size
+
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.size = os.fstat(self.fd).st_size
+        self.allocated = self.size
+        self.map: mmap.mmap | None = None
+        self.views = 0  # readers of a memory map of the file
+        self.views_released = threading.Condition()
+
+    # GETTERS
+    def get_page_count(self) -> int:
+        data_size = max(0, self.size - self.header_size)
+        return -(-data_size // self.page_size)
+
+    def is_empty(self) -> bool:
+        return self.size == 0
+
+    def page_offset(self, page_no: int) -> int:
+        if page_no == HEADER_PAGE:
+            return 0
+        if page_no < 0:
+            raise ValueError(f"Error: invalid page {page_no}")
+        return self.header_size + page_no * self.page_size
+
+    def page_length(self, page_no: int) -> int:
+        return self.header_size if page_no == HEADER_PAGE else self.page_size
+
+    # raw I/O (used by the buffer pool)
+    def read_raw(self, page_no: int) -> bytes:
+        length = self.page_length(page_no)
+        data = os.pread(self.fd, length, self.page_offset(page_no))
+        return data.ljust(length, b'\0')
+
+    def write_raw(self, page_no: int, data: bytes) -> None:
+        offset = self.page_offset(page_no)
+        self._preallocate(offset + len(data))
+        os.pwrite(self.fd, data, offset)
+
+    # pooled access
+    def read_page(self, page_no: int) -> bytes:
+        return get_buffer_pool().read_page(self, page_no)
+
+    def write_page(self, page_no: int, data: bytes) -> None:
+        if len(data) != self.page_length(page_no):
+            raise ValueError(f"Error: page {page_no} must be {self.page_length(page_no)} bytes, got {len(data)}")
+        get_buffer_pool().write_page(self, page_no, data)
+        self._extend(page_no)
+
+    @contextmanager
+    def pin(self, page_no: int, dirty: bool = False):
+        pool = get_buffer_pool()
+        frame: Frame = pool.fetch_page(self, page_no)
+        try:
+            yield frame
+        finally:
+            pool.unpin_page(frame, dirty)
+        if frame.dirty:
+            self._extend(page_no)
+
+    @contextmanager
+    def view(self, page_no: int):
+        # yields the cached frame data when the pool has the page (it may be
+        # newer than the disk), otherwise a zero-copy slice of the mapped file
+        pool = get_buffer_pool()
+        frame = pool.fetch_resident(self, page_no)
+        if frame is not None:
+            try:
+                yield frame.data
+            finally:
+                pool.unpin_page(frame)
+            return
+
+        offset = self.page_offset(page_no)
+        end = offset + self.page_length(page_no)
+        self.acquire_view()
+        if end > self.allocated:
+            # not written back yet, so only the pool has it
+            self.release_view()
+            with self.pin(page_no) as frame:
+                yield frame.data
+            return
+        try:
+            if self.map is None or len(self.map) < end:
+                # views handed out earlier keep the old map alive until released
+                self.map = mmap.mmap(self.fd, self.allocated, access=mmap.ACCESS_READ)
+            view = memoryview(self.map)[offset:end]
+            try:
+                yield view
+            finally:
+                view.release()
+        finally:
+            self.release_view()
+
+    def acquire_view(self) -> None:
+        # Registers a reader of a memory map of the file. Reading a map past
+        # the end of the file raises SIGBUS, so truncation waits until every
+        # view is released. The count is taken under the pool lock, which
+        # truncation holds, so a view never starts while the file is cut;
+        # a view must not wait for the pool lock while it is held.
+        with get_buffer_pool().lock:
+            with self.views_released:
+                self.views += 1
+
+    def release_view(self) -> None:
+        with self.views_released:
+            self.views -= 1
+            if not self.views:
+                self.views_released.notify_all()
+
+    def read_header(self) -> bytes:
+        return self.read_page(HEADER_PAGE)
+
+    def write_header(self, data: bytes) -> None:
+        self.write_page(HEADER_PAGE, data)
+
+    def allocate_page(self) -> int:
+        page_no = self.get_page_count()
+        self.write_page(page_no, bytes(self.page_size))
+        return page_no
+
+    # METHODS
+    def flush(self) -> None:
+        get_buffer_pool().flush_file(self)
+
+    def sync(self) -> None:
+        os.fsync(self.fd)
+
+    def truncate(self) -> None:
+        pool = get_buffer_pool()
+        with pool.lock:
+            pool.discard_file(self)
+            self._cut(0)
+
+    def shrink(self, page_count: int) -> None:
+        # drops the pages from page_count on, the header stays
+        pool = get_buffer_pool()
+        with pool.lock:
+            pool.flush_file(self)
+            pool.discard_file(self)
+            self._cut(min(self.size, self.page_offset(page_count)))
+
+    def _cut(self, size: int) -> None:
+        # the truncation is logged first, so a replay does not bring back
+        # pages logged before it
+        wal = get_buffer_pool().wal
+        if wal is not None:
+            wal.flush(wal.log_truncate(self.path, size))
+        with self.views_released:
+            while self.views:
+                self.views_released.wait()
+        self.map = None
+        os.ftruncate(self.fd, size)
+        get_buffer_pool().unsynced.add(self)
+        self.size = size
+        self.allocated = size
+
+    def close(self) -> None:
+        if self.fd < 0:
+            return
+        pool = get_buffer_pool()
+        self.flush()
+        if pool.wal is not None or self in pool.unsynced:
+            # checkpoints only sync the files that are still open
+            self.sync()
+            pool.unsynced.discard(self)
+        pool.discard_file(self)
+        self.map = None
+        os.close(self.fd)
+        self.fd = -1
+
+    def is_stale(self) -> bool:
+        # the path was deleted or replaced behind our back
+        try:
+            return self.fd < 0 or os.stat(self.path).st_ino != os.fstat(self.fd).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _extend(self, page_no: int) -> None:
+        self.size = max(self.size, self.page_offset(page_no) + self.page_length(page_no))
+
+    def _preallocate(self, end: int) -> None:
+        if end <= self.allocated:
+            return
+        if self.extent_size:
+            end = -(-end // self.extent_size) * self.extent_size
+            if hasattr(os, 'posix_fallocate'):
+                os.posix_fallocate(self.fd, self.allocated, end - self.allocated)
+            else:
+                os.ftruncate(self.fd, end)
+        self.allocated = end
+
+_open_files: dict[str, PagedFile] = {}
+_open_files_lock = threading.Lock()
+
+# Paged files are shared per path so that every heap or index object over the
+# same file sees the same cached pages and logical size.
+def open_paged_file(path: str | Path, page_size: int, header_size: int = 0, extent_size: int = 0) -> PagedFile:
+    key = os.path.abspath(path)
+    with _open_files_lock:
+        paged_file = _open_files.get(key)
+        if paged_file is not None:
+            if paged_file.is_stale():
+                get_buffer_pool().discard_file(paged_file)
+                paged_file.map = None
+                if paged_file.fd >= 0:
+                    os.close(paged_file.fd)
+                    paged_file.fd = -1
+                paged_file = None
+            elif (paged_file.page_size, paged_file.header_size) != (page_size, header_size):
+                paged_file.close()
+                paged_file = None
+        if paged_file is None:
+            paged_file = PagedFile(key, page_size, header_size, extent_size)
+            _open_files[key] = paged_file
+        return paged_file
+
+def lookup_paged_file(path: str | Path) -> PagedFile | None:
+    with _open_files_lock:
+        paged_file = _open_files.get(os.path.abspath(path))
+        if paged_file is None or paged_file.is_stale():
+            return None
+        return paged_file
+
+def read_file_header(path: str | Path, header_size: int) -> bytes | None:
+    # reads the header of a file that may not be open yet, preferring the
+    # cached copy when it is
+    paged_file = lookup_paged_file(path)
+    if paged_file is not None and paged_file.header_size >= header_size:
+        return paged_file.read_header()[:header_size]
+    if not os.path.exists(path):
+        return None
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        header_data = os.pread(fd, header_size, 0)
+    finally:
+        os.close(fd)
+    return header_data if len(header_data) == header_size else None
+
+def flush_paged_files() -> None:
+    get_buffer_pool().flush_all()
+
+def sync_paged_files() -> None:
+    # writes back every dirty page and waits until the open files are on disk
+    flush_paged_files()
+    with _open_files_lock:
+        paged_files = [paged_file for paged_file in _open_files.values() if paged_file.fd >= 0]
+    for paged_file in paged_files:
+        paged_file.sync()
+
+def commit_paged_files(sync: bool = False) -> None:
+    # end of a statement: with a write-ahead log the changed pages only go to
+    # the log, made durable when sync; the data files are written lazily.
+    # Without one the pages are written back (and the files synced)
+    pool = get_buffer_pool()
+    if pool.wal is None:
+        sync_paged_files() if sync else flush_paged_files()
+        return
+    lsn = pool.log_dirty_pages()
+    if sync:
+        pool.wal.flush(lsn)
+    if pool.wal.size > CHECKPOINT_LOG_SIZE:
+        get_checkpointer().request()
+
+def checkpoint_paged_files() -> None:
+    # sharp checkpoint: writes back and syncs every page while holding the
+    # pool, after which the log can start over
+    pool = get_buffer_pool()
+    with pool.lock:
+        pool.flush_all()
+        pool.sync_files()
+        if pool.wal is not None:
+            pool.wal.reset()
+
+CHECKPOINT_LOG_SIZE = 64 * 1024 * 1024  # 64 MB
+
+def open_write_ahead_log(path: str | Path, base_dir: str | Path | None = None) -> WriteAheadLog:
+    # replays the log in the directory path from its last checkpoint and
+    # attaches it to the buffer pool; a log that was attached before is
+    # checkpointed (unless its directory is gone) and closed first
+    pool = get_buffer_pool()
+    with pool.lock:
+        if pool.wal is not None:
+            if pool.wal.path == os.path.abspath(path):
+                return pool.wal
+            if os.path.isdir(pool.wal.path):
+                checkpoint_paged_files()
+            pool.wal.close()
+            pool.wal = None
+        wal = WriteAheadLog(path, base_dir)
+        wal.replay()
+        pool.wal = wal
+        return wal
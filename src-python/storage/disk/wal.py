@@ -0,0 +1,244 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+
+# Redo log of page images. Every page changed by a statement is appended
+# whole to the log (full page writes), with an increasing LSN, before the
+# page can be written to its data file; truncations are logged the same way.
+# A record is only valid if its crc matches, so a torn tail left by a crash
+# is ignored.
+# The log is a directory of segments named after their first LSN. A
+# checkpoint starts a new segment, writes back the pages logged before it
+# and then records that LSN in the checkpoint file, so the older segments
+# can be deleted and replay on startup starts from there.
+# flush(lsn) makes the log durable up to lsn. Statements that commit at the
+# same time share one fsync (group commit): the first one syncs for all the
+# records appended so far and the others wait for it.
+class WriteAheadLog:
+    RECORD = struct.Struct('<QBqHI')  # lsn, kind, offset (or new size), path length, data length
+    CRC = struct.Struct('<I')
+    CHECKPOINT = struct.Struct('<Q')
+    SEGMENT_SUFFIX = ".wal"
+    PAGE = 1
+    TRUNCATE = 2
+
+    def __init__(self, directory: str | Path, base_dir: str | Path | None = None,
+                 checkpoint_path: str | Path | None = None, group_commit_delay: float = 0.0):
+        self.path = os.path.abspath(directory)
+        self.base_dir = os.path.abspath(base_dir) if base_dir is not None else os.path.dirname(self.path)
+        self.checkpoint_path = (os.path.abspath(checkpoint_path) if checkpoint_path is not None
+                                else os.path.join(os.path.dirname(self.path), "checkpoint"))
+        self.group_commit_delay = group_commit_delay
+        os.makedirs(self.path, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.sync_cond = threading.Condition()
+        self.syncing = False
+
+        self.checkpoint_lsn = self.read_checkpoint()
+        self.next_lsn = max(1, self.checkpoint_lsn)
+        self.written_lsn = self.next_lsn - 1
+        self.flushed_lsn = self.written_lsn
+        self.syncs = 0
+
+        segments = self.segments()
+        self.size = sum(os.path.getsize(path) for _, path in segments)
+        self.fd = -1
+        self.segment_size = 0
+        self._open_segment(segments[-1][0] if segments else self.next_lsn)
+
+    # appends
+    def append_pages(self, pages: list[tuple[str, int, bytes]]) -> list[int]:
+        # pages are (file path, byte offset, image); returns their LSNs
+        return self._append([(self.PAGE, path, offset, data) for path, offset, data in pages])
+
+    def log_truncate(self, path: str, size: int) -> int:
+        return self._append([(self.TRUNCATE, path, size, b'')])[0]
+
+    def _append(self, records: list[tuple[int, str, int, bytes]]) -> list[int]:
+        with self.lock:
+            buffer = bytearray()
+            lsns = []
+            for kind, path, offset, data in records:
+                lsn = self.next_lsn
+                self.next_lsn += 1
+                name = self._relative(path).encode('utf-8')
+                start = len(buffer)
+                buffer += self.RECORD.pack(lsn, kind, offset, len(name), len(data))
+                buffer += name
+                buffer += data
+                buffer += self.CRC.pack(zlib.crc32(memoryview(buffer)[start:]))
+                lsns.append(lsn)
+            os.pwrite(self.fd, buffer, self.segment_size)
+            self.segment_size += len(buffer)
+            self.size += len(buffer)
+            self.written_lsn = lsns[-1] if lsns else self.written_lsn
+            return lsns
+
+    # durability
+    def flush(self, lsn: int) -> None:
+        with self.sync_cond:
+            while self.flushed_lsn < lsn:
+                if not self.syncing:
+                    self.syncing = True
+                    break
+                self.sync_cond.wait()
+            else:
+                return
+        target = self.flushed_lsn
+        try:
+            if self.group_commit_delay:
+                # gives the statements committing at the same time a chance
+                # to append before the fsync
+                time.sleep(self.group_commit_delay)
+            with self.lock:
+                target = self.written_lsn
+                fd = self.fd
+            os.fsync(fd)
+            self.syncs += 1
+        finally:
+            self._end_sync(target)
+
+    def flush_all(self) -> None:
+        self.flush(self.written_lsn)
+
+    def roll(self) -> int:
+        # syncs the current segment and starts a new one; returns the LSN the
+        # new segment starts at
+        with self.sync_cond:
+            while self.syncing:
+                self.sync_cond.wait()
+            self.syncing = True
+        target = self.flushed_lsn
+        try:
+            with self.lock:
+                target = self.written_lsn
+                if self.segment_size:
+                    os.fsync(self.fd)
+                    os.close(self.fd)
+                    self._open_segment(self.next_lsn)
+                return self.next_lsn
+        finally:
+            self._end_sync(target)
+
+    def _end_sync(self, target: int) -> None:
+        with self.sync_cond:
+            self.flushed_lsn = max(self.flushed_lsn, target)
+            self.syncing = False
+            self.sync_cond.notify_all()
+
+    # checkpoints
+    def read_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path, 'rb') as checkpoint:
+                return self.CHECKPOINT.unpack(checkpoint.read(self.CHECKPOINT.size))[0]
+        except (FileNotFoundError, struct.error):
+            return 0
+
+    def discard_before(self, lsn: int) -> None:
+        # records lsn as the replay start and deletes the segments before it;
+        # only valid once the data files hold everything logged before lsn
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, 'wb') as checkpoint:
+            checkpoint.write(self.CHECKPOINT.pack(lsn))
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+        self.checkpoint_lsn = lsn
+
+        with self.lock:
+            segments = self.segments()
+            for (_, path), (next_first, _) in zip(segments, segments[1:]):
+                if next_first <= lsn:
+                    self.size -= os.path.getsize(path)
+                    os.remove(path)
+
+    def reset(self) -> None:
+        self.discard_before(self.roll())
+
+    # recovery
+    def segments(self) -> list[tuple[int, str]]:
+        segments = []
+        for name in os.listdir(self.path):
+            if name.endswith(self.SEGMENT_SUFFIX) and name[:-len(self.SEGMENT_SUFFIX)].isdigit():
+                segments.append((int(name[:-len(self.SEGMENT_SUFFIX)]), os.path.join(self.path, name)))
+        return sorted(segments)
+
+    def records(self, start_lsn: int = 0):
+        # yields (lsn, kind, path, offset, data) from start_lsn up to the
+        # first bad record
+        segments = self.segments()
+        for i, (_, segment_path) in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1][0] <= start_lsn:
+                continue
+            with open(segment_path, 'rb') as log:
+                while True:
+                    header = log.read(self.RECORD.size)
+                    if not header:
+                        break
+                    if len(header) < self.RECORD.size:
+                        return
+                    lsn, kind, offset, name_len, data_len = self.RECORD.unpack(header)
+                    body = log.read(name_len + data_len + self.CRC.size)
+                    if len(body) < name_len + data_len + self.CRC.size:
+                        return
+                    crc, = self.CRC.unpack_from(body, name_len + data_len)
+                    if zlib.crc32(header + body[:name_len + data_len]) != crc:
+                        return
+                    if lsn >= start_lsn:
+                        path = self._absolute(body[:name_len].decode('utf-8'))
+                        yield lsn, kind, path, offset, body[name_len:name_len + data_len]
+
+    def replay(self) -> int:
+        # applies the log from the last checkpoint to the data files, syncs
+        # them and starts over; returns how many records were applied
+        fds: dict[str, int] = {}
+        applied = 0
+        try:
+            for lsn, kind, path, offset, data in self.records(self.checkpoint_lsn):
+                if path not in fds:
+                    if not os.path.isdir(os.path.dirname(path)):
+                        continue
+                    fds[path] = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                if kind == self.PAGE:
+                    os.pwrite(fds[path], data, offset)
+                elif kind == self.TRUNCATE:
+                    os.ftruncate(fds[path], offset)
+                self.next_lsn = max(self.next_lsn, lsn + 1)
+                applied += 1
+            for fd in fds.values():
+                os.fsync(fd)
+        finally:
+            for fd in fds.values():
+                os.close(fd)
+        # new records go to a fresh segment, never after a torn one
+        with self.lock:
+            self.written_lsn = self.next_lsn - 1
+            os.close(self.fd)
+            self._open_segment(self.next_lsn, truncate=True)
+        self.flushed_lsn = self.written_lsn
+        self.discard_before(self.next_lsn)
+        self.size = sum(os.path.getsize(path) for _, path in self.segments())
+        return applied
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    # helpers
+    def _open_segment(self, first_lsn: int, truncate: bool = False) -> None:
+        path = os.path.join(self.path, f"{first_lsn:016d}{self.SEGMENT_SUFFIX}")
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | (os.O_TRUNC if truncate else 0), 0o644)
+        self.segment_size = os.fstat(self.fd).st_size
+
+    def _relative(self, path: str) -> str:
+        # paths under the data directory are kept relative, so it can move
+        relative = os.path.relpath(path, self.base_dir)
+        return path if relative.startswith('..') else relative
+
+    def _absolute(self, path: str) -> str:
+        return os.path.join(self.base_dir, path)
@@ -0,0 +1,80 @@
+from xxhash import xxh64
+import math
+import struct
+
+from storage.disk.paged_file import open_paged_file
+
+# Reference: Putze, Sanders, Singler, "Cache-, Hash- and Space-Efficient Bloom Filters" (2007)
+# Blocked Bloom filter kept in a sidecar file of an index (index_filename +
+# .bloom). A key picks one page and sets all its bits there, so a lookup reads
+# a single page. Keys are the encoded index keys. Deleted keys cannot be
+# cleared, they only cost false positives until the owning index rebuilds
+# the filter; add() returns False once more keys were added than the filter
+# was sized for, which is the owner's cue to rebuild it bigger. Only keys
+# that set a new bit are counted.
+class BloomFilter:
+    SUFFIX = ".bloom"
+    HEADER = struct.Struct('IIQQ')  # page_count, hash_count, item_count, capacity
+    PAGE_SIZE = 4096
+    PAGE_BITS = PAGE_SIZE * 8
+    MAX_HASHES = 16
+    DEFAULT_CAPACITY = 4096
+    DEFAULT_ERROR_RATE = 0.01
+
+    def __init__(self, filename: str, error_rate: float = DEFAULT_ERROR_RATE):
+        if not 0 < error_rate < 1:
+            raise ValueError(f"Error: error rate must be in (0, 1), got {error_rate}")
+        self.filename = filename
+        self.error_rate = error_rate
+        self.file = open_paged_file(filename, self.PAGE_SIZE, self.HEADER.size)
+
+    def is_empty(self) -> bool:
+        return self.file.is_empty()
+
+    def reset(self, capacity: int) -> None:
+        # clears the filter and sizes it for capacity keys
+        capacity = max(capacity, self.DEFAULT_CAPACITY)
+        bit_count = math.ceil(-capacity * math.log(self.error_rate) / math.log(2) ** 2)
+        page_count = -(-bit_count // self.PAGE_BITS)
+        hash_count = round(page_count * self.PAGE_BITS / capacity * math.log(2))
+        hash_count = max(1, min(self.MAX_HASHES, hash_count))
+
+        self.file.truncate()
+        for page_no in range(page_count):
+            self.file.write_page(page_no, bytes(self.PAGE_SIZE))
+        self.file.write_header(self.HEADER.pack(page_count, hash_count, 0, capacity))
+
+    def add(self, key: bytes) -> bool:
+        # a key whose bits are all set already (a duplicate in a non-unique
+        # index) changes nothing and is not counted, so item_count follows
+        # the distinct keys, as after a rebuild
+        page_count, hash_count, item_count, capacity = self.HEADER.unpack(self.file.read_header())
+        page_no, bits = self._locate(key, page_count, hash_count)
+        with self.file.pin(page_no) as frame:
+            unset = [bit for bit in bits if not frame.data[bit >> 3] & (1 << (bit & 7))]
+            for bit in unset:
+                frame.data[bit >> 3] |= 1 << (bit & 7)
+            if unset:
+                frame.mark_dirty()
+        if not unset:
+            return item_count <= capacity
+        item_count += 1
+        self.file.write_header(self.HEADER.pack(page_count, hash_count, item_count, capacity))
+        return item_count <= capacity
+
+    def might_contain(self, key: bytes) -> bool:
+        page_count, hash_count, _, _ = self.HEADER.unpack(self.file.read_header())
+        page_no, bits = self._locate(key, page_count, hash_count)
+        data = self.file.read_page(page_no)
+        return all(data[bit >> 3] & (1 << (bit & 7)) for bit in bits)
+
+    def get_item_count(self) -> int:
+        return self.HEADER.unpack(self.file.read_header())[2]
+
+    def _locate(self, key: bytes, page_count: int, hash_count: int) -> tuple[int, list[int]]:
+        # one hash picks the page, the halves of a second one drive double
+        # hashing inside it
+        page_no = xxh64(key).intdigest() % page_count
+        second = xxh64(key, seed=1).intdigest()
+        start, step = second & 0xFFFFFFFF, (second >> 32) | 1
+        return page_no, [(start + i * step) % self.PAGE_BITS for i in range(hash_count)]
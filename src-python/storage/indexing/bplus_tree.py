@@ -1,9 +1,12 @@
-import struct
 import os
-from typing import List, Tuple, Optional, Dict, Any
+import struct
+from bisect import bisect_left, bisect_right, insort
+from typing import List, Tuple, Optional, Dict, Any, Iterable, Iterator
 
 from models.enum.data_type_enum import DataTypeTag
-from storage.disk.data_serializer import DataSerializer
+from storage.disk.key_codec import KeyCodec
+from storage.disk.paged_file import open_paged_file, read_file_header, INDEX_EXTENT_SIZE
+from storage.indexing.bloom_filter import BloomFilter
 
 class TreeNode:
     def __init__(self, is_leaf: bool, parent_id: int = -1):
@@ -15,6 +18,7 @@ class TreeNode:
         if self.is_leaf:
             self.data_positions: List[int] = []
             self.next_leaf: int = -1
+            self.prev_leaf: int = -1
         else:
             self.pointers: List[int] = []
     
@@ -29,6 +33,7 @@ class TreeNode:
         if self.is_leaf:
             node_dict['data_positions'] = self.data_positions.copy()
             node_dict['next_leaf'] = self.next_leaf
+            node_dict['prev_leaf'] = self.prev_leaf
         else:
             node_dict['pointers'] = self.pointers.copy()
         
@@ -43,6 +48,7 @@ class TreeNode:
         if node.is_leaf:
             node.data_positions = node_dict['data_positions'].copy()
             node.next_leaf = node_dict['next_leaf']
+            node.prev_leaf = node_dict.get('prev_leaf', -1)
         else:
             node.pointers = node_dict['pointers'].copy()
         
@@ -98,19 +104,80 @@ class TreeNode:
         return self.key_count > max_keys
 
 class BPlusTreeFile:
-    HEADER_SIZE = 24  # root_node_id, node_count, height, record_count, data_type, max_key_len
+    HEADER_SIZE = 40  # root_node_id, node_count, height, record_count, data_type, max_key_len, order, page_size, flags, free_page
+    HEADER_FORMAT = 'IIIIIIIIII'
     NODE_HEADER_SIZE = 12
+    FLAG_UNIQUE = 0x1
+    # a leaf position with the high bit set points to a posting page instead
+    # of a row; posting pages hold the sorted record ids of one key as varint
+    # deltas and are chained through next_page when a key outgrows one page.
+    # Posting pages no longer used go to a free list (each free page holds
+    # the id of the next one) and are handed out again before the file grows
+    POSTING_FLAG = 0x80000000
+    POSTING_HEADER = struct.Struct('IHH')  # next_page, rid_count, payload_size
+    DEFAULT_PAGE_SIZE = 4096
+    DEFAULT_FILL_FACTOR = 0.9
     
-    def __init__(self, index_filename: str, data_type: DataTypeTag, max_key_len: int = 0, order: int = 4) -> None:
+    def __init__(self,
+                 index_filename: str,
+                 data_type: DataTypeTag,
+                 max_key_len: int = 0,
+                 order: Optional[int] = None,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 unique: bool = True,
+                 bloom: bool = False) -> None:
         self.index_filename = index_filename
         self.data_type = data_type
         self.max_key_len = max_key_len
+        # keys are kept encoded in the nodes and compared as bytes
+        self.codec = KeyCodec(data_type, max_key_len)
+        self.key_size = self.codec.size
+        self.pointer_size = 4
+        
+        self.root_node_id = -1
+        self.node_count = 0
+        self.height = 0
+        self.record_count = 0
+        self.free_page = -1
+        self.unique = unique
+        
+        # an existing index keeps the geometry and uniqueness it was created with
+        header_data = read_file_header(index_filename, self.HEADER_SIZE)
+        if header_data is not None:
+            *_, order, page_size, flags, _ = struct.unpack(self.HEADER_FORMAT, header_data)
+            self.unique = bool(flags & self.FLAG_UNIQUE)
+        elif order is None:
+            order = self.compute_order(page_size, self.key_size)
+        self._set_geometry(order, page_size)
+        self.file = open_paged_file(index_filename, self.node_size, self.HEADER_SIZE, INDEX_EXTENT_SIZE)
+        
+        if self._is_file_empty():
+            self._initialize_index_file()
+        else:
+            self._load_header()
+
+        # optional Bloom filter of the keys, so lookups of missing keys skip the tree
+        bloom_filename = str(index_filename) + BloomFilter.SUFFIX
+        self.bloom = BloomFilter(bloom_filename) if bloom or os.path.exists(bloom_filename) else None
+        if self.bloom is not None and self.bloom.is_empty():
+            self.rebuild_bloom_filter()
+    
+    @classmethod
+    def compute_order(cls, page_size: int, key_size: int, pointer_size: int = 4) -> int:
+        # largest fan-out whose internal and leaf nodes both fit in a page
+        available = page_size - cls.NODE_HEADER_SIZE
+        internal_order = (available + key_size) // (key_size + pointer_size)
+        leaf_order = (available - 2 * pointer_size) // (key_size + pointer_size) + 1
+        order = min(internal_order, leaf_order)
+        if order < 3:
+            raise ValueError(f"Error: page of {page_size} bytes is too small for keys of {key_size} bytes")
+        return order
+    
+    def _set_geometry(self, order: int, page_size: int) -> None:
         self.order = order
         self.max_keys = order - 1
         self.min_keys = max(1, (order - 1) // 2)
-        
-        self.key_size = DataSerializer.get_size(data_type, max_key_len)
-        self.pointer_size = 4
+        self.page_size = page_size
         
         self.internal_node_size = (self.NODE_HEADER_SIZE + 
                                  (self.max_keys * self.key_size) + 
@@ -119,21 +186,20 @@ class BPlusTreeFile:
         self.leaf_node_size = (self.NODE_HEADER_SIZE + 
                               (self.max_keys * self.key_size) + 
                               (self.max_keys * self.pointer_size) + 
-                              self.pointer_size)
-        
-        self.node_size = max(self.internal_node_size, self.leaf_node_size)
-        
-        self.root_node_id = -1
-        self.node_count = 0
-        self.height = 0
-        self.record_count = 0
+                              2 * self.pointer_size)
         
-        if self._is_file_empty():
-            self._initialize_index_file()
-        else:
-            self._load_header()
+        self.node_size = max(page_size, self.internal_node_size, self.leaf_node_size)
     
     def insert(self, key: Any, data_position: int) -> bool:
+        key = self.codec.encode(key)
+        inserted = self._insert(key, data_position)
+        if inserted and self.bloom is not None and not self.bloom.add(key):
+            self.rebuild_bloom_filter()
+        return inserted
+
+    def _insert(self, key: bytes, data_position: int) -> bool:
+        if not self.unique and data_position >= self.POSTING_FLAG:
+            raise ValueError(f"Error: record id {data_position} is too large for a non-unique index")
         if self.root_node_id == -1:
             self._create_root_leaf(key, data_position)
             return True
@@ -144,17 +210,17 @@ class BPlusTreeFile:
             
         leaf_node = self._read_node(leaf_node_id)
         
-        for i, existing_key in enumerate(leaf_node.keys):
-            if existing_key == key:
-                leaf_node.data_positions[i] = data_position
-                self._write_node(leaf_node_id, leaf_node)
+        insert_pos = bisect_left(leaf_node.keys, key)
+        if insert_pos < len(leaf_node.keys) and leaf_node.keys[insert_pos] == key:
+            if not self.unique:
+                if self._add_posting(leaf_node, insert_pos, data_position):
+                    self._write_node(leaf_node_id, leaf_node)
+                    self.record_count += 1
+                    self._save_header()
                 return True
-        
-        insert_pos = 0
-        for i, existing_key in enumerate(leaf_node.keys):
-            if key < existing_key:
-                break
-            insert_pos = i + 1
+            leaf_node.data_positions[insert_pos] = data_position
+            self._write_node(leaf_node_id, leaf_node)
+            return True
         
         leaf_node.insert_key(key, insert_pos, data_position=data_position)
         
@@ -169,8 +235,10 @@ class BPlusTreeFile:
         self._save_header()
         return True
     
-    def delete(self, key: Any) -> Optional[int]:
-        if self.root_node_id == -1:
+    def delete(self, key: Any, data_position: Optional[int] = None) -> Optional[int]:
+        # without data_position the key is removed with all its record ids
+        key = self.codec.encode(key)
+        if self.root_node_id == -1 or not self._might_contain(key):
             return None
         
         leaf_node_id = self._find_leaf(key)
@@ -179,121 +247,227 @@ class BPlusTreeFile:
             
         leaf_node = self._read_node(leaf_node_id)
         
-        for i, existing_key in enumerate(leaf_node.keys):
-            if existing_key == key:
-                deleted_record_position = leaf_node.data_positions[i]
-                
-                leaf_node.keys.pop(i)
-                leaf_node.data_positions.pop(i)
-                leaf_node.key_count -= 1
-                
-                self._write_node(leaf_node_id, leaf_node)
-                self.record_count -= 1
-                self._save_header()
-                
-                if leaf_node.is_underflow(self.min_keys) and leaf_node_id != self.root_node_id:
-                    self._handle_underflow(leaf_node_id)
-                
-                return deleted_record_position
+        i = bisect_left(leaf_node.keys, key)
+        if i < len(leaf_node.keys) and leaf_node.keys[i] == key:
+            positions = self._positions(leaf_node.data_positions[i])
+            if data_position is not None:
+                if data_position not in positions:
+                    return None
+                if len(positions) > 1:
+                    self._remove_posting(leaf_node, i, positions, data_position)
+                    self._write_node(leaf_node_id, leaf_node)
+                    self.record_count -= 1
+                    self._save_header()
+                    return data_position
+            deleted_record_position = data_position if data_position is not None else positions[0]
+            if leaf_node.data_positions[i] & self.POSTING_FLAG:
+                self._free_pages(leaf_node.data_positions[i] & ~self.POSTING_FLAG)
+            
+            leaf_node.keys.pop(i)
+            leaf_node.data_positions.pop(i)
+            leaf_node.key_count -= 1
+            
+            self._write_node(leaf_node_id, leaf_node)
+            self.record_count -= len(positions)
+            self._save_header()
+            
+            if leaf_node.is_underflow(self.min_keys) and leaf_node_id != self.root_node_id:
+                self._handle_underflow(leaf_node_id)
+            
+            return deleted_record_position
         
         return None
     
     def search(self, key: Any) -> Optional[int]:
-        if self.root_node_id == -1:
-            return None
+        positions = self.search_all(key)
+        return positions[0] if positions else None
+
+    def search_all(self, key: Any) -> List[int]:
+        key = self.codec.encode(key)
+        if self.root_node_id == -1 or not self._might_contain(key):
+            return []
         
         leaf_node_id = self._find_leaf(key)
         if leaf_node_id == -1:
-            return None
+            return []
             
         leaf_node = self._read_node(leaf_node_id)
         
-        for i, existing_key in enumerate(leaf_node.keys):
-            if existing_key == key:
-                return leaf_node.data_positions[i]
+        i = bisect_left(leaf_node.keys, key)
+        if i < len(leaf_node.keys) and leaf_node.keys[i] == key:
+            return self._positions(leaf_node.data_positions[i])
         
-        return None
+        return []
     
-    def all_tuples(self) -> List[Tuple[Any, int]]:
-        if self.root_node_id == -1:
-            return []
+    def bulk_load(self, pairs: Iterable[Tuple[Any, int]], fill_factor: float = DEFAULT_FILL_FACTOR) -> int:
+        # builds the tree bottom-up from (key, data_position) pairs: leaves are
+        # written left to right and then each internal level over the one below
+        if self.root_node_id != -1:
+            raise ValueError("Error: bulk load requires an empty index")
+        if not 0 < fill_factor <= 1:
+            raise ValueError(f"Error: fill factor must be in (0, 1], got {fill_factor}")
 
-        current_node_id = self.root_node_id
-        while True:
-            node = self._read_node(current_node_id)
-            if node.is_leaf:
-                break
-            current_node_id = node.pointers[0] if node.pointers else -1
-            if current_node_id == -1:
-                return []
+        entries = []
+        encoded = ((self.codec.encode(key), data_position) for key, data_position in pairs)
+        for key, data_position in sorted(encoded, key=lambda pair: pair[0]):
+            if not self.unique and data_position >= self.POSTING_FLAG:
+                raise ValueError(f"Error: record id {data_position} is too large for a non-unique index")
+            if entries and entries[-1][0] == key:
+                if self.unique:
+                    entries[-1] = (key, [data_position])  # same as insert: last one wins
+                else:
+                    entries[-1][1].append(data_position)
+            else:
+                entries.append((key, [data_position]))
+        if not entries:
+            return 0
 
-        result = []
-        while current_node_id != -1:
-            node = self._read_node(current_node_id)
-            for key, data_pos in zip(node.keys, node.data_positions):
-                result.append((key, data_pos))
-            current_node_id = node.next_leaf
+        leaf_capacity = max(1, int(self.max_keys * fill_factor))
+        node_capacity = max(2, int(self.order * fill_factor))
+        levels = [self._group_sizes(len(entries), leaf_capacity, 1)]
+        while len(levels[-1]) > 1:
+            levels.append(self._group_sizes(len(levels[-1]), node_capacity, 2))
+
+        level_start = [0]
+        for sizes in levels[:-1]:
+            level_start.append(level_start[-1] + len(sizes))
+        parents = [self._parent_ids(levels[i + 1], level_start[i + 1]) for i in range(len(levels) - 1)] + [[-1]]
+        # tree nodes take the first ids, posting pages are allocated after them
+        self.node_count = level_start[-1] + 1
+        record_count = 0
 
-        return result
+        first_keys = []
+        position = 0
+        for leaf_index, size in enumerate(levels[0]):
+            node = TreeNode(True, parents[0][leaf_index])
+            chunk = entries[position:position + size]
+            node.keys = [key for key, _ in chunk]
+            node.data_positions = []
+            for _, positions in chunk:
+                if len(positions) == 1:
+                    node.data_positions.append(positions[0])
+                else:
+                    positions = sorted(set(positions))
+                    node.data_positions.append(self._write_postings(positions) | self.POSTING_FLAG)
+                record_count += len(positions)
+            node.key_count = size
+            node.next_leaf = leaf_index + 1 if leaf_index + 1 < len(levels[0]) else -1
+            node.prev_leaf = leaf_index - 1
+            self._write_node(leaf_index, node)
+            first_keys.append(node.keys[0])
+            position += size
+
+        for level in range(1, len(levels)):
+            child_keys, first_keys = first_keys, []
+            child = 0
+            for node_index, size in enumerate(levels[level]):
+                node = TreeNode(False, parents[level][node_index])
+                node.keys = child_keys[child + 1:child + size]
+                node.pointers = [level_start[level - 1] + i for i in range(child, child + size)]
+                node.key_count = size - 1
+                self._write_node(level_start[level] + node_index, node)
+                first_keys.append(child_keys[child])
+                child += size
+
+        self.root_node_id = level_start[-1]
+        self.height = len(levels)
+        self.record_count = record_count
+        self._save_header()
+        if self.bloom is not None:
+            self.rebuild_bloom_filter()
+        return self.record_count
+
+    @staticmethod
+    def _group_sizes(count: int, capacity: int, minimum: int) -> List[int]:
+        # splits count children into evenly filled nodes of at most capacity,
+        # never leaving a node with fewer than minimum children
+        groups = -(-count // capacity)
+        if count // groups < minimum:
+            groups = max(1, count // minimum)
+        base, extra = divmod(count, groups)
+        return [base + 1] * extra + [base] * (groups - extra)
+
+    @staticmethod
+    def _parent_ids(parent_sizes: List[int], parent_start: int) -> List[int]:
+        parents = []
+        for i, size in enumerate(parent_sizes):
+            parents.extend([parent_start + i] * size)
+        return parents
+
+    def cursor(self) -> 'BPlusTreeCursor':
+        return BPlusTreeCursor(self)
+
+    def iter_range(self, start: Any = None, end: Any = None, reverse: bool = False) -> Iterator[Tuple[Any, int]]:
+        # lazily walks the leaf chain, reading one leaf at a time; None leaves
+        # that side of the range open
+        start = None if start is None else self.codec.encode(start)
+        end = None if end is None else self.codec.encode(end)
+        cursor = self.cursor()
+        if reverse:
+            cursor.seek_last() if end is None else cursor._position(end, bisect_right)
+            step = cursor.prev_raw
+        else:
+            cursor.seek_first() if start is None else cursor._position(start, bisect_left)
+            step = cursor.next_raw
+        decode = self.codec.decode
+        while (entry := step()) is not None:
+            key, data_position = entry
+            if (reverse and start is not None and key < start) or (not reverse and end is not None and key > end):
+                return
+            yield decode(key), data_position
+
+    def all_tuples(self) -> List[Tuple[Any, int]]:
+        return list(self.iter_range())
 
     def all_tuples_range(self, start: any, end: any) -> List[Tuple[Any, int]]:
-        if self.root_node_id == -1:
-            return []
+        return list(self.iter_range(start, end))
 
-        current_node_id = self.root_node_id
-        while True:
-            node = self._read_node(current_node_id)
-            if node.is_leaf:
-                break
-            child_index = 0
-            for i, key in enumerate(node.keys):
-                if start <= key:
-                    break
-                child_index = i + 1
-            current_node_id = node.pointers[child_index] if child_index < len(node.pointers) else -1
-            if current_node_id == -1:
-                return []
-
-        result = []
-        while current_node_id != -1:
-            node = self._read_node(current_node_id)
-            for key, data_pos in zip(node.keys, node.data_positions):
-                if key > end:
-                    return result
-                if start <= key <= end:
-                    result.append((key, data_pos))
-            current_node_id = node.next_leaf
+    def rebuild_bloom_filter(self) -> None:
+        # sizes the filter for twice the current keys and drops deleted ones
+        keys = []
+        node_id = self.cursor()._edge_leaf(0)
+        while node_id != -1:
+            node = self._read_node(node_id)
+            keys.extend(node.keys)
+            node_id = node.next_leaf
+        self.bloom.reset(2 * len(keys))
+        for key in keys:
+            self.bloom.add(key)
 
-        return result
+    def _might_contain(self, key: bytes) -> bool:
+        return self.bloom is None or self.bloom.might_contain(key)
 
     def _initialize_index_file(self):
-        with open(self.index_filename, 'wb') as f:
-            f.write(struct.pack('IIIIII', 0xFFFFFFFF, 0, 0, 0, self.data_type.value, self.max_key_len))
-            self.root_node_id = -1
-    
+        self.root_node_id = -1
+        self._save_header()
+
     def _load_header(self):
-        with open(self.index_filename, 'rb') as f:
-            header_data = f.read(self.HEADER_SIZE)
-            root_id, self.node_count, self.height, self.record_count, data_type_value, self.max_key_len = struct.unpack('IIIIII', header_data)
-            self.root_node_id = root_id if root_id != 0xFFFFFFFF else -1
-            self.data_type = DataTypeTag(data_type_value)
-    
+        header_data = self.file.read_header()
+        root_id, self.node_count, self.height, self.record_count, data_type_value, self.max_key_len, _, _, flags, free_page = struct.unpack(self.HEADER_FORMAT, header_data)
+        self.free_page = free_page if free_page != 0xFFFFFFFF else -1
+        self.unique = bool(flags & self.FLAG_UNIQUE)
+        self.root_node_id = root_id if root_id != 0xFFFFFFFF else -1
+        self.data_type = DataTypeTag(data_type_value)
+
     def _save_header(self):
-        with open(self.index_filename, 'r+b') as f:
-            f.seek(0)
-            root_id = self.root_node_id if self.root_node_id != -1 else 0xFFFFFFFF
-            f.write(struct.pack('IIIIII', root_id, self.node_count, self.height, self.record_count, self.data_type.value, self.max_key_len))
-    
+        root_id = self.root_node_id if self.root_node_id != -1 else 0xFFFFFFFF
+        self.file.write_header(struct.pack(self.HEADER_FORMAT, root_id, self.node_count, self.height, self.record_count,
+                                           self.data_type.value, self.max_key_len, self.order, self.page_size,
+                                           self.FLAG_UNIQUE if self.unique else 0,
+                                           self.free_page if self.free_page != -1 else 0xFFFFFFFF))
+
     def _create_root_leaf(self, key: Any, data_position: int):
         node = TreeNode(True)
         node.keys = [key]
         node.data_positions = [data_position]
         node.key_count = 1
         node.next_leaf = -1
+        node.prev_leaf = -1
         
         self.root_node_id = 0
         self.node_count = 1
         self.height = 1
+        self.record_count = 1
         self._write_node(0, node)
         self._save_header()
     
@@ -309,13 +483,10 @@ class BPlusTreeFile:
             if node.is_leaf:
                 return current_node_id
             
-            child_index = 0
-            for i, node_key in enumerate(node.keys):
-                if key < node_key:
-                    break
-                child_index = i + 1
+            child_index = bisect_right(node.keys, key)
             
-            if child_index >= len(node.pointers) or node.pointers[child_index] == 0:
+            # node 0 is a valid child (the first leaf), only clamp the index
+            if child_index >= len(node.pointers):
                 child_index = len(node.pointers) - 1
                 
             if child_index < 0 or child_index >= len(node.pointers):
@@ -328,9 +499,13 @@ class BPlusTreeFile:
     def _split_leaf(self, node_id: int, node: TreeNode):
         new_node, first_key = node.split_leaf()
         
-        new_node_id = self.node_count
-        self.node_count += 1
+        new_node_id = self._allocate_page()
         
+        new_node.prev_leaf = node_id
+        if node.next_leaf != -1:
+            next_node = self._read_node(node.next_leaf)
+            next_node.prev_leaf = new_node_id
+            self._write_node(node.next_leaf, next_node)
         node.next_leaf = new_node_id
         
         self._write_node(node_id, node)
@@ -341,8 +516,7 @@ class BPlusTreeFile:
     def _split_internal(self, node_id: int, node: TreeNode):
         new_node, middle_key = node.split_internal()
         
-        new_node_id = self.node_count
-        self.node_count += 1
+        new_node_id = self._allocate_page()
         
         for pointer in new_node.pointers:
             if pointer != -1:
@@ -364,8 +538,7 @@ class BPlusTreeFile:
             new_root.pointers = [left_child_id, right_child_id]
             new_root.key_count = 1
             
-            root_id = self.node_count
-            self.node_count += 1
+            root_id = self._allocate_page()
             self.height += 1
             self.root_node_id = root_id
             
@@ -381,12 +554,7 @@ class BPlusTreeFile:
         parent_id = left_node.parent_id
         parent = self._read_node(parent_id)
         
-        insert_pos = 0
-        for i, parent_key in enumerate(parent.keys):
-            if key < parent_key:
-                break
-            insert_pos = i + 1
-        
+        insert_pos = bisect_right(parent.keys, key)
         parent.insert_key(key, insert_pos, pointer=right_child_id)
         
         right_node = self._read_node(right_child_id)
@@ -413,103 +581,183 @@ class BPlusTreeFile:
     def _read_node(self, node_id: int) -> TreeNode:
         if node_id is None or node_id < 0:
             raise ValueError(f"node_id inválido: {node_id}")
-            
-        with open(self.index_filename, 'rb') as f:
-            f.seek(self._get_node_position(node_id))
-            
-            header_data = f.read(self.NODE_HEADER_SIZE)
-            if len(header_data) < self.NODE_HEADER_SIZE:
-                raise ValueError(f"Error: header {node_id}")
-                
-            is_leaf, key_count, parent_id = struct.unpack('III', header_data)
-            parent_id = parent_id if parent_id != 0xFFFFFFFF else -1
-            
-            node = TreeNode(bool(is_leaf), parent_id)
-            node.key_count = key_count
-            
-            for i in range(self.max_keys):
-                key_data = f.read(self.key_size)
-                if len(key_data) < self.key_size:
-                    raise ValueError(f"Could not read the key {i} of the node {node_id}")
-                if i < key_count:
-                    key = DataSerializer.deserialize(key_data, self.data_type, self.max_key_len)
-                    node.keys.append(key)
-            
-            if node.is_leaf:
-                for i in range(self.max_keys):
-                    pos_data = f.read(self.pointer_size)
-                    if len(pos_data) < self.pointer_size:
-                        raise ValueError(f"Could not read the position {i} of the node {node_id}")
-                    if i < key_count:
-                        data_pos = struct.unpack('I', pos_data)[0]
-                        node.data_positions.append(data_pos)
-                
-                next_data = f.read(self.pointer_size)
-                if len(next_data) < self.pointer_size:
-                    raise ValueError(f"Could not read the next_leaf {node_id}")
-                next_leaf = struct.unpack('I', next_data)[0]
-                node.next_leaf = next_leaf if next_leaf != 0xFFFFFFFF else -1
-            else:
-                for i in range(self.order):
-                    ptr_data = f.read(self.pointer_size)
-                    if len(ptr_data) < self.pointer_size:
-                        raise ValueError(f"Could not read the pointer {i} from the node {node_id}")
-                    if i < key_count + 1:
-                        pointer = struct.unpack('I', ptr_data)[0]
-                        node.pointers.append(pointer)
-            
-            return node
-    
+
+        data = self.file.read_page(node_id)
+        is_leaf, key_count, parent_id = struct.unpack_from('III', data, 0)
+        parent_id = parent_id if parent_id != 0xFFFFFFFF else -1
+
+        node = TreeNode(bool(is_leaf), parent_id)
+        node.key_count = key_count
+
+        offset = self.NODE_HEADER_SIZE
+        key_size = self.key_size
+        node.keys = [data[start:start + key_size] for start in range(offset, offset + key_count * key_size, key_size)]
+        offset += self.max_keys * key_size
+
+        if node.is_leaf:
+            node.data_positions = list(struct.unpack_from(f'{key_count}I', data, offset))
+            offset += self.max_keys * self.pointer_size
+            next_leaf, prev_leaf = struct.unpack_from('II', data, offset)
+            node.next_leaf = next_leaf if next_leaf != 0xFFFFFFFF else -1
+            node.prev_leaf = prev_leaf if prev_leaf != 0xFFFFFFFF else -1
+        else:
+            node.pointers = list(struct.unpack_from(f'{key_count + 1}I', data, offset))
+
+        return node
+
     def _write_node(self, node_id: int, node: TreeNode):
-        current_size = os.path.getsize(self.index_filename)
-        required_size = self._get_node_position(node_id) + self.node_size
-        
-        if required_size > current_size:
-            with open(self.index_filename, 'ab') as f:
-                f.write(b'\0' * (required_size - current_size))
-        
-        with open(self.index_filename, 'r+b') as f:
-            f.seek(self._get_node_position(node_id))
-            
-            parent_id = node.parent_id if node.parent_id != -1 else 0xFFFFFFFF
-            f.write(struct.pack('III', int(node.is_leaf), node.key_count, parent_id))
-            
-            for i in range(self.max_keys):
-                if i < len(node.keys):
-                    key_bytes = DataSerializer.serialize(node.keys[i], self.data_type, self.max_key_len)
-                else:
-                    key_bytes = b'\0' * self.key_size
-                f.write(key_bytes)
-            
-            if node.is_leaf:
-                for i in range(self.max_keys):
-                    if i < len(node.data_positions):
-                        f.write(struct.pack('I', node.data_positions[i]))
-                    else:
-                        f.write(struct.pack('I', 0))
-                
-                next_leaf = node.next_leaf if node.next_leaf != -1 else 0xFFFFFFFF
-                f.write(struct.pack('I', next_leaf))
-                
-                remaining = self.node_size - (self.NODE_HEADER_SIZE + 
-                                           (self.max_keys * self.key_size) + 
-                                           (self.max_keys * self.pointer_size) + 
-                                           self.pointer_size)
-                if remaining > 0:
-                    f.write(b'\0' * remaining)
-            else:
-                for i in range(self.order):
-                    if i < len(node.pointers):
-                        f.write(struct.pack('I', node.pointers[i]))
-                    else:
-                        f.write(struct.pack('I', 0))
-                
-                remaining = self.node_size - (self.NODE_HEADER_SIZE + 
-                                           (self.max_keys * self.key_size) + 
-                                           (self.order * self.pointer_size))
-                if remaining > 0:
-                    f.write(b'\0' * remaining)
-    
+        data = bytearray(self.node_size)
+        parent_id = node.parent_id if node.parent_id != -1 else 0xFFFFFFFF
+        struct.pack_into('III', data, 0, int(node.is_leaf), node.key_count, parent_id)
+
+        offset = self.NODE_HEADER_SIZE
+        keys = b''.join(node.keys[:self.max_keys])
+        data[offset:offset + len(keys)] = keys
+        offset += self.max_keys * self.key_size
+
+        if node.is_leaf:
+            positions = node.data_positions[:self.max_keys]
+            struct.pack_into(f'{len(positions)}I', data, offset, *positions)
+            offset += self.max_keys * self.pointer_size
+            next_leaf = node.next_leaf if node.next_leaf != -1 else 0xFFFFFFFF
+            prev_leaf = node.prev_leaf if node.prev_leaf != -1 else 0xFFFFFFFF
+            struct.pack_into('II', data, offset, next_leaf, prev_leaf)
+        else:
+            pointers = node.pointers[:self.order]
+            struct.pack_into(f'{len(pointers)}I', data, offset, *pointers)
+
+        self.file.write_page(node_id, bytes(data))
+
+    def _positions(self, data_position: int) -> List[int]:
+        if data_position & self.POSTING_FLAG:
+            return self._read_postings(data_position & ~self.POSTING_FLAG)
+        return [data_position]
+
+    def _add_posting(self, leaf_node: TreeNode, index: int, data_position: int) -> bool:
+        # returns False when the record id was already there
+        current = leaf_node.data_positions[index]
+        if not current & self.POSTING_FLAG:
+            if current == data_position:
+                return False
+            page_id = self._write_postings(sorted((current, data_position)))
+            leaf_node.data_positions[index] = page_id | self.POSTING_FLAG
+            return True
+
+        page_id = current & ~self.POSTING_FLAG
+        if self._append_posting(page_id, data_position):
+            return True
+        positions = self._read_postings(page_id)
+        i = bisect_left(positions, data_position)
+        if i < len(positions) and positions[i] == data_position:
+            return False
+        insort(positions, data_position)
+        self._write_postings(positions, page_id)
+        return True
+
+    def _remove_posting(self, leaf_node: TreeNode, index: int, positions: List[int], data_position: int) -> None:
+        page_id = leaf_node.data_positions[index] & ~self.POSTING_FLAG
+        positions.remove(data_position)
+        if len(positions) == 1:
+            leaf_node.data_positions[index] = positions[0]
+            self._free_pages(page_id)
+        else:
+            self._write_postings(positions, page_id)
+
+    def _read_postings(self, page_id: int) -> List[int]:
+        positions = []
+        while page_id != -1:
+            page_id, page_positions = self._read_posting_page(page_id)
+            positions.extend(page_positions)
+        return positions
+
+    def _read_posting_page(self, page_id: int) -> Tuple[int, List[int]]:
+        data = self.file.read_page(page_id)
+        next_page, count, size = self.POSTING_HEADER.unpack_from(data, 0)
+        positions = []
+        value = 0
+        offset = self.POSTING_HEADER.size
+        for _ in range(count):
+            delta, offset = _decode_varint(data, offset)
+            value += delta
+            positions.append(value)
+        return (next_page if next_page != 0xFFFFFFFF else -1), positions
+
+    def _append_posting(self, page_id: int, data_position: int) -> bool:
+        # fast path for record ids larger than every id in the list, the usual
+        # case for rows appended to the heap: only the tail page is rewritten
+        next_page = page_id
+        while next_page != -1:
+            page_id = next_page
+            next_page, positions = self._read_posting_page(page_id)
+        if data_position <= positions[-1]:
+            return False
+
+        data = bytearray(self.file.read_page(page_id))
+        _, count, size = self.POSTING_HEADER.unpack_from(data, 0)
+        delta = _encode_varint(data_position - positions[-1])
+        end = self.POSTING_HEADER.size + size
+        if end + len(delta) <= self.node_size:
+            data[end:end + len(delta)] = delta
+            self.POSTING_HEADER.pack_into(data, 0, 0xFFFFFFFF, count + 1, size + len(delta))
+        else:
+            new_page_id = self._write_postings([data_position])
+            self.POSTING_HEADER.pack_into(data, 0, new_page_id, count, size)
+        self.file.write_page(page_id, bytes(data))
+        return True
+
+    def _write_postings(self, positions: List[int], page_id: int = -1) -> int:
+        # writes sorted record ids as a chain of posting pages, reusing the
+        # pages of the chain starting at page_id, and returns its first page
+        capacity = self.node_size - self.POSTING_HEADER.size
+        chunks = [bytearray()]
+        counts = [0]
+        previous = 0
+        for position in positions:
+            delta = _encode_varint(position - previous)
+            if len(chunks[-1]) + len(delta) > capacity:
+                delta = _encode_varint(position)  # every page decodes on its own
+                chunks.append(bytearray())
+                counts.append(0)
+            chunks[-1] += delta
+            counts[-1] += 1
+            previous = position
+
+        page_ids = []
+        while page_id != -1 and len(page_ids) < len(chunks):
+            page_ids.append(page_id)
+            page_id, _ = self._read_posting_page(page_id)
+        # a shorter list leaves the rest of the old chain unused
+        self._free_pages(page_id)
+        while len(page_ids) < len(chunks):
+            page_ids.append(self._allocate_page())
+
+        for i, (chunk, count) in enumerate(zip(chunks, counts)):
+            next_page = page_ids[i + 1] if i + 1 < len(page_ids) else 0xFFFFFFFF
+            data = bytearray(self.node_size)
+            self.POSTING_HEADER.pack_into(data, 0, next_page, count, len(chunk))
+            data[self.POSTING_HEADER.size:self.POSTING_HEADER.size + len(chunk)] = chunk
+            self.file.write_page(page_ids[i], bytes(data))
+        return page_ids[0]
+
+    def _allocate_page(self) -> int:
+        if self.free_page == -1:
+            self.node_count += 1
+            return self.node_count - 1
+        page_id = self.free_page
+        next_free, = struct.unpack_from('I', self.file.read_page(page_id), 0)
+        self.free_page = next_free if next_free != 0xFFFFFFFF else -1
+        return page_id
+
+    def _free_pages(self, page_id: int) -> None:
+        # puts a chain of posting pages on the free list
+        while page_id != -1:
+            next_page, _ = self._read_posting_page(page_id)
+            data = bytearray(self.node_size)
+            struct.pack_into('I', data, 0, self.free_page if self.free_page != -1 else 0xFFFFFFFF)
+            self.file.write_page(page_id, bytes(data))
+            self.free_page = page_id
+            page_id = next_page
+
     def _get_node_position(self, node_id: int) -> int:
         if node_id is None:
             raise ValueError(f"Error: node_id")
@@ -518,11 +766,126 @@ class BPlusTreeFile:
         if node_id < 0:
             raise ValueError(f"Error: least {node_id}")
             
-        return self.HEADER_SIZE + (node_id * self.node_size)
+        return self.file.page_offset(node_id)
     
     def _is_file_empty(self) -> bool:
-        if not os.path.exists(self.index_filename):
-            with open(self.index_filename, 'wb') as f:
-                pass
-            return True
-        return os.path.getsize(self.index_filename) == 0
\ No newline at end of file
+        return self.file.is_empty()
+
+
+# A position between two entries of the leaf level. next() returns the entry
+# after the position and moves past it, prev() the one before it. Only the
+# current leaf is kept in memory; neighbours are read when the position
+# crosses a leaf boundary, so a scan can stop at any point without having
+# touched the rest of the index.
+class BPlusTreeCursor:
+    def __init__(self, tree: BPlusTreeFile):
+        self.tree = tree
+        self.node_id = -1
+        self.node: Optional[TreeNode] = None
+        self.index = 0
+        self.sub = 0  # position inside the record ids of the entry at index
+        self._entry: Tuple[int, int, List[int]] = (-1, -1, [])
+
+    def seek(self, key: Any) -> None:
+        # before the first entry >= key
+        self._position(self.tree.codec.encode(key), bisect_left)
+
+    def seek_after(self, key: Any) -> None:
+        # after the last entry <= key
+        self._position(self.tree.codec.encode(key), bisect_right)
+
+    def seek_first(self) -> None:
+        self._load(self._edge_leaf(0))
+        self.index = 0
+
+    def seek_last(self) -> None:
+        self._load(self._edge_leaf(-1))
+        self.index = self.node.key_count if self.node else 0
+
+    def next(self) -> Optional[Tuple[Any, int]]:
+        return self._decoded(self.next_raw())
+
+    def prev(self) -> Optional[Tuple[Any, int]]:
+        return self._decoded(self.prev_raw())
+
+    # the raw variants return the encoded key
+    def next_raw(self) -> Optional[Tuple[bytes, int]]:
+        while self.node is not None:
+            if self.index >= self.node.key_count:
+                if self.node.next_leaf == -1:
+                    return None
+                self._load(self.node.next_leaf)
+                continue
+            positions = self._positions()
+            if self.sub < len(positions):
+                self.sub += 1
+                return self.node.keys[self.index], positions[self.sub - 1]
+            self.index += 1
+            self.sub = 0
+        return None
+
+    def prev_raw(self) -> Optional[Tuple[bytes, int]]:
+        while self.node is not None:
+            if self.sub > 0:
+                self.sub -= 1
+                return self.node.keys[self.index], self._positions()[self.sub]
+            if self.index <= 0:
+                if self.node.prev_leaf == -1:
+                    return None
+                self._load(self.node.prev_leaf)
+                self.index = self.node.key_count
+                continue
+            self.index -= 1
+            self.sub = len(self._positions())
+        return None
+
+    def __iter__(self) -> Iterator[Tuple[Any, int]]:
+        while (entry := self.next()) is not None:
+            yield entry
+
+    def _decoded(self, entry: Optional[Tuple[bytes, int]]) -> Optional[Tuple[Any, int]]:
+        return None if entry is None else (self.tree.codec.decode(entry[0]), entry[1])
+
+    def _positions(self) -> List[int]:
+        node_id, index, positions = self._entry
+        if (node_id, index) != (self.node_id, self.index):
+            positions = self.tree._positions(self.node.data_positions[self.index])
+            self._entry = (self.node_id, self.index, positions)
+        return positions
+
+    def _position(self, key: Any, search) -> None:
+        self._load(self.tree._find_leaf(key))
+        self.index = search(self.node.keys, key) if self.node else 0
+
+    def _edge_leaf(self, side: int) -> int:
+        node_id = self.tree.root_node_id
+        while node_id != -1:
+            node = self.tree._read_node(node_id)
+            if node.is_leaf:
+                return node_id
+            node_id = node.pointers[side]
+        return -1
+
+    def _load(self, node_id: int) -> None:
+        self.node_id = node_id
+        self.node = self.tree._read_node(node_id) if node_id != -1 else None
+        self.index = 0
+        self.sub = 0
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _decode_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
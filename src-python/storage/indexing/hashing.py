@@ -1,205 +1,387 @@
+from dataclasses import dataclass, field
 from xxhash import xxh64
-import struct
 import os
+import struct
 
-from storage.disk.data_serializer import DataSerializer
+from storage.disk.key_codec import KeyCodec
+from storage.disk.paged_file import open_paged_file, INDEX_EXTENT_SIZE
+from storage.indexing.bloom_filter import BloomFilter
 from models.enum.data_type_enum import DataTypeTag
 
+@dataclass
+class Bucket:
+    local_depth: int = 0
+    next_overflow: int = -1
+    tail: int = -1  # last page of the chain, only kept in the primary page
+    chain_length: int = 1
+    entries: list[list] = field(default_factory=list)  # [key, [record ids]]
+
+# Layout of a bucket page, shared by the hash indexes: a header followed by
+# entries of key, record id count and record ids.
+class BucketFormat:
+    HEADER = struct.Struct('IHHiiI')  # local_depth, entry_count, used_bytes, next_overflow, tail, chain_length
+    ENTRY_HEADER = struct.Struct('H')  # record id count
+
+    def __init__(self, key_size: int, bucket_size: int):
+        self.key_size = key_size
+        self.page_size = self.HEADER.size + bucket_size * self.entry_size(1)
+        self.capacity = self.page_size - self.HEADER.size
+
+    def entry_size(self, count: int) -> int:
+        return self.key_size + self.ENTRY_HEADER.size + 4 * count
+
+    def free_bytes(self, bucket: Bucket) -> int:
+        return self.capacity - sum(self.entry_size(len(positions)) for _, positions in bucket.entries)
+
+    def find_entry(self, bucket: Bucket, key: bytes) -> list | None:
+        for entry in bucket.entries:
+            if entry[0] == key:
+                return entry
+        return None
+
+    def read(self, data: bytes) -> Bucket:
+        local_depth, entry_count, _, next_overflow, tail, chain_length = self.HEADER.unpack_from(data, 0)
+        bucket = Bucket(local_depth, next_overflow, tail, chain_length)
+        key_size = self.key_size
+        offset = self.HEADER.size
+        for _ in range(entry_count):
+            key = data[offset:offset + key_size]
+            count = self.ENTRY_HEADER.unpack_from(data, offset + key_size)[0]
+            offset += key_size + self.ENTRY_HEADER.size
+            bucket.entries.append([key, list(struct.unpack_from(f'{count}I', data, offset))])
+            offset += 4 * count
+        return bucket
+
+    def pack(self, bucket: Bucket) -> bytes:
+        data = bytearray(self.page_size)
+        offset = self.HEADER.size
+        for key, positions in bucket.entries:
+            data[offset:offset + len(key)] = key
+            offset += len(key)
+            self.ENTRY_HEADER.pack_into(data, offset, len(positions))
+            offset += self.ENTRY_HEADER.size
+            struct.pack_into(f'{len(positions)}I', data, offset, *positions)
+            offset += 4 * len(positions)
+        self.HEADER.pack_into(data, 0, bucket.local_depth, len(bucket.entries), offset - self.HEADER.size,
+                              bucket.next_overflow, bucket.tail, bucket.chain_length)
+        return bytes(data)
+
+    def split_pages(self, entries: list[list]) -> list[list[list]]:
+        # groups entries into pages; a key whose record ids do not fit in one
+        # page continues on the next
+        pages = [[]]
+        used = 0
+        for key, positions in entries:
+            remaining = positions
+            while remaining:
+                room = (self.capacity - used - self.entry_size(0)) // 4
+                if room < 1:
+                    pages.append([])
+                    used = 0
+                    continue
+                pages[-1].append([key, remaining[:room]])
+                used += self.entry_size(len(pages[-1][-1][1]))
+                remaining = remaining[room:]
+        return pages
+
 # Reference: https://www.geeksforgeeks.org/extendible-hashing-dynamic-approach-to-dbms/
+# The directory lives in its own file next to the index (index_filename + .dir)
+# so buckets stay at fixed offsets when it doubles. It is cached in memory and
+# only the directory pages that change are written back.
+# A bucket is a primary page plus an optional chain of overflow pages. Entries
+# hold a key with one or more record ids, so a non-unique index stores each
+# key once per page. A full bucket is only split when that separates its keys
+# and the split depth is below MAX_LOCAL_DEPTH; otherwise it grows its chain.
+# Pages left over when a split packs a chain into fewer pages go to a free
+# list (linked through next_overflow) and are reused before the file grows.
+# With bloom (or when the .bloom sidecar already exists) a Bloom filter of the
+# keys answers lookups of missing keys without reading any bucket.
 class ExtendibleHashingFile:
-    HEADER_SIZE = 12
+    HEADER = struct.Struct('IIIIi')  # global_depth, directory_size, bucket_count, flags, free_page
+    HEADER_SIZE = HEADER.size
     DIRECTORY_ENTRY_SIZE = 4
-    BUCKET_HEADER_SIZE = 12
+    DIRECTORY_PAGE_SIZE = 4096
+    DIRECTORY_SUFFIX = ".dir"
+    MAX_LOCAL_DEPTH = 20
+    FLAG_UNIQUE = 0x1
 
-    def __init__(self, index_filename: str, data_type: DataTypeTag, max_key_len: int, bucket_size: int = 10):
+    def __init__(self, index_filename: str, data_type: DataTypeTag, max_key_len: int, bucket_size: int = 10,
+                 unique: bool = True, bloom: bool = False):
         self.index_filename = index_filename
         self.bucket_size = bucket_size
         self.global_depth = 0
         self.directory_size = 1
-        self.bucket_count = 1
+        self.bucket_count = 1  # pages in use, primary and overflow
+        self.free_page = -1
+        self.unique = unique
         self.key_type = data_type
         self.max_key_len = max_key_len
-        self.index_record_size = DataSerializer.get_size(data_type, max_key_len) + 4
+        # keys are stored encoded and compared as bytes
+        self.codec = KeyCodec(data_type, max_key_len)
+        self.bucket_format = BucketFormat(self.codec.size, bucket_size)
+        self.index_record_size = self.bucket_format.entry_size(1)
+
+        self.directory: list[int] = [0]
+        self.entries_per_page = self.DIRECTORY_PAGE_SIZE // self.DIRECTORY_ENTRY_SIZE
 
-        if self._is_file_empty():
+        self.file = open_paged_file(index_filename, self._get_bucket_bytes(), self.HEADER_SIZE, INDEX_EXTENT_SIZE)
+        self.directory_file = open_paged_file(str(index_filename) + self.DIRECTORY_SUFFIX, self.DIRECTORY_PAGE_SIZE)
+
+        if self.file.is_empty():
             self._initialize_index_file()
         else:
             self._load_header()
+            self._load_directory()
+
+        bloom_filename = str(index_filename) + BloomFilter.SUFFIX
+        self.bloom = BloomFilter(bloom_filename) if bloom or os.path.exists(bloom_filename) else None
+        if self.bloom is not None and self.bloom.is_empty():
+            self.rebuild_bloom_filter()
 
     def insert(self, key: any, data_position: int) -> bool:
-        directory = self._read_directory()
+        key = self.codec.encode(key)
+        self._insert(key, data_position)
+        if self.bloom is not None and not self.bloom.add(key):
+            self.rebuild_bloom_filter()
+        return True
+
+    def _insert(self, key: bytes, data_position: int) -> bool:
+        self._sync_directory()
         bucket_index = self._get_bucket_index(key)
-        bucket_id = directory[bucket_index]
-        local_depth, records = self._read_bucket(bucket_id)
+        bucket_id = self.directory[bucket_index]
+        bucket = self._read_bucket(bucket_id)
 
-        for i, (existing_key, _) in enumerate(records):
-            if existing_key == key:
-                records[i] = (key, data_position)
-                self._write_bucket(bucket_id, local_depth, records)
-                return True
-
-        if len(records) < self.bucket_size:
-            records.append((key, data_position))
-            self._write_bucket(bucket_id, local_depth, records)
+        if self.unique and self._might_contain(key) and self._replace_in_chain(bucket_id, bucket, key, data_position):
             return True
 
-        if local_depth == self.global_depth:
-            self._expand_directory()
-            directory = self._read_directory()
-            bucket_index = self._get_bucket_index(key)
-            bucket_id = directory[bucket_index]
-            local_depth, records = self._read_bucket(bucket_id)
-
-        new_local_depth = local_depth + 1
-        bucket1_records, bucket2_records = self._split_bucket(bucket_id, local_depth, records)
-
-        new_bucket_id = self.bucket_count
-        self.bucket_count += 1
-        self._save_header()
-
-        self._write_bucket(bucket_id, new_local_depth, bucket1_records)
-        self._write_bucket(new_bucket_id, new_local_depth, bucket2_records)
-
-        self._update_directory_after_split(bucket_id, new_bucket_id, new_local_depth)
-
-        return self.insert(key, data_position)
-
-    def delete(self, key: any) -> bool:
-        directory = self._read_directory()
-        bucket_index = self._get_bucket_index(key)
-        bucket_id = directory[bucket_index]
-        local_depth, records = self._read_bucket(bucket_id)
-
-        for i, (record_key, _) in enumerate(records):
-            if record_key == key:
-                records.pop(i)
-                self._write_bucket(bucket_id, local_depth, records)
+        # only the primary page and the tail are tried, so inserting into a
+        # long chain costs the same as into a single page
+        pages = [(bucket_id, bucket)]
+        if bucket.tail not in (-1, bucket_id):
+            pages.append((bucket.tail, self._read_bucket(bucket.tail)))
+        if not self.unique:
+            for page_id, page in pages:
+                entry = self.bucket_format.find_entry(page, key)
+                if entry is not None and self.bucket_format.free_bytes(page) >= 4:
+                    entry[1].append(data_position)
+                    self._write_bucket(page_id, page)
+                    return True
+        for page_id, page in pages:
+            if self.bucket_format.free_bytes(page) >= self.index_record_size:
+                page.entries.append([key, [data_position]])
+                self._write_bucket(page_id, page)
                 return True
 
-        return False
+        # splitting means reading the whole chain, so it is only tried while
+        # the chain length is a power of two
+        if bucket.local_depth < self.MAX_LOCAL_DEPTH and bucket.chain_length & (bucket.chain_length - 1) == 0:
+            low, high = self._split_entries(self._read_chain_entries(bucket), bucket.local_depth)
+            if low and high:
+                self._split(bucket_index, bucket_id, bucket, low, high)
+                return self._insert(key, data_position)
+
+        self._add_overflow_page(bucket_id, bucket, pages[-1], key, data_position)
+        return True
+
+    def delete(self, key: any, data_position: int | None = None) -> bool:
+        # without data_position every record id of the key is removed
+        key = self.codec.encode(key)
+        if not self._might_contain(key):
+            return False
+        self._sync_directory()
+        page_id = self.directory[self._get_bucket_index(key)]
+        deleted = False
+        while page_id != -1:
+            page = self._read_bucket(page_id)
+            entry = self.bucket_format.find_entry(page, key)
+            if entry is not None and (data_position is None or data_position in entry[1]):
+                if data_position is None:
+                    page.entries.remove(entry)
+                else:
+                    entry[1].remove(data_position)
+                    if not entry[1]:
+                        page.entries.remove(entry)
+                self._write_bucket(page_id, page)
+                deleted = True
+                if data_position is not None or self.unique:
+                    break
+            page_id = page.next_overflow
+        return deleted
 
     def search(self, key: any) -> int:
-        directory = self._read_directory()
-        bucket_index = self._get_bucket_index(key)
-        bucket_id = directory[bucket_index]
-        _, records = self._read_bucket(bucket_id)
+        positions = self.search_all(key)
+        return positions[0] if positions else None
+
+    def search_all(self, key: any) -> list[int]:
+        key = self.codec.encode(key)
+        if not self._might_contain(key):
+            return []
+        self._sync_directory()
+        page_id = self.directory[self._get_bucket_index(key)]
+        positions = []
+        while page_id != -1:
+            page = self._read_bucket(page_id)
+            entry = self.bucket_format.find_entry(page, key)
+            if entry is not None:
+                positions.extend(entry[1])
+                if self.unique:
+                    break
+            page_id = page.next_overflow
+        return positions
 
-        for record_key, data_position in records:
-            if record_key == key:
-                return data_position
+    def rebuild_bloom_filter(self):
+        # sizes the filter for twice the current keys and drops deleted ones
+        self._sync_directory()
+        keys = {key for page_id in range(self.bucket_count) for key, _ in self._read_bucket(page_id).entries}
+        self.bloom.reset(2 * len(keys))
+        for key in keys:
+            self.bloom.add(key)
 
-        return None
+    def _might_contain(self, key: bytes) -> bool:
+        return self.bloom is None or self.bloom.might_contain(key)
 
     def _initialize_index_file(self):
-        with open(self.index_filename, 'wb') as f:
-            f.write(struct.pack('III', self.global_depth, self.directory_size, self.bucket_count))
-            f.write(struct.pack('I', 0))
-            self._write_bucket_at_position(f, 0, [])
+        self.directory_file.truncate()
+        self.directory = [0]
+        self._write_directory_pages({0})
+        self._write_bucket(0, Bucket(tail=0))
+        self._save_header()
 
     def _load_header(self):
-        with open(self.index_filename, 'rb') as f:
-            self.global_depth, self.directory_size, self.bucket_count = struct.unpack('III', f.read(self.HEADER_SIZE))
+        header_data = self.file.read_header()
+        self.global_depth, self.directory_size, self.bucket_count, flags, self.free_page = self.HEADER.unpack(header_data)
+        self.unique = bool(flags & self.FLAG_UNIQUE)
 
     def _save_header(self):
-        with open(self.index_filename, 'r+b') as f:
-            f.seek(0)
-            f.write(struct.pack('III',
-                                self.global_depth,
-                                self.directory_size,
-                                self.bucket_count))
-    
-    def _save_header_to_file(self, f):
-        f.seek(0)
-        f.write(struct.pack('III',
-                            self.global_depth,
-                            self.directory_size,
-                            self.bucket_count))
-
-    def _read_directory(self) -> list[int]:
-        with open(self.index_filename, 'rb') as f:
-            f.seek(self.HEADER_SIZE)
-            return [struct.unpack('I', f.read(4))[0] for _ in range(self.directory_size)]
-
-    def _write_directory(self, directory: list[int]):
-        with open(self.index_filename, 'r+b') as f:
-            f.seek(self.HEADER_SIZE)
-            for bucket_id in directory:
-                f.write(struct.pack('I', bucket_id))
-
-    def _write_directory_to_file(self, f, directory: list[int]):
-        f.seek(self.HEADER_SIZE)
-        for bucket_id in directory:
-            f.write(struct.pack('I', bucket_id))
-
-    def _rebuild_file(self,
-                      directory: list[int],
-                      buckets: dict[int, tuple[int, list[tuple[any,int]]]]):
-        with open(self.index_filename, 'r+b') as f:
-            f.truncate(0)
-            self._save_header_to_file(f)
-            self._write_directory_to_file(f, directory)
-            for bucket_id in range(self.bucket_count):
-                local_depth, records = buckets.get(bucket_id, (0, []))
-                f.seek(self._get_bucket_position(bucket_id))
-                self._write_bucket_at_position(f, local_depth, records)
-
-    def _pack_index_record(self, key: any, offset: int) -> bytes:
-        key_bytes = DataSerializer.serialize(key, self.key_type, self.max_key_len)
-        return key_bytes + struct.pack('I', offset)
-
-    def _unpack_index_record(self, record_bytes: bytes) -> tuple[any, int]:
-        key_size = DataSerializer.get_size(self.key_type, self.max_key_len)
-        key_bytes = record_bytes[:key_size]
-        offset = struct.unpack('I', record_bytes[key_size:])[0]
-        key = DataSerializer.deserialize(key_bytes, self.key_type, self.max_key_len)
-        return key, offset
-
-    def _read_bucket(self, bucket_id: int) -> tuple[int, list[tuple[str, int]]]:
-        with open(self.index_filename, 'rb') as f:
-            f.seek(self._get_bucket_position(bucket_id))
-            bucket_header = f.read(self.BUCKET_HEADER_SIZE)
-            if len(bucket_header) < self.BUCKET_HEADER_SIZE:
-                return 0, []
-            local_depth, max_size, record_count = struct.unpack('III', bucket_header)
-            records = []
-            for _ in range(record_count):
-                record_bytes = f.read(self.index_record_size)
-                if len(record_bytes) < self.index_record_size:
-                    break
-                key, offset = self._unpack_index_record(record_bytes)
-                if key:
-                    records.append((key, offset))
-            return local_depth, records
-
-    def _write_bucket_at_position(self, f, local_depth: int, records: list[tuple[str, int]]):
-        f.write(struct.pack('III', local_depth, self.bucket_size, len(records)))
-        for key, offset in records:
-            record_bytes = self._pack_index_record(key, offset)
-            f.write(record_bytes)
-        empty_slots = self.bucket_size - len(records)
-        for _ in range(empty_slots):
-            empty_record = b'\0' * self.index_record_size
-            f.write(empty_record)
-
-    def _write_bucket(self, bucket_id: int, local_depth: int, records: list[tuple[str, int]]):
-        with open(self.index_filename, 'r+b') as f:
-            f.seek(self._get_bucket_position(bucket_id))
-            self._write_bucket_at_position(f, local_depth, records)
+        flags = self.FLAG_UNIQUE if self.unique else 0
+        self.file.write_header(self.HEADER.pack(self.global_depth, self.directory_size, self.bucket_count, flags,
+                                                self.free_page))
+
+    def _load_directory(self):
+        directory = []
+        for page_no in range(-(-self.directory_size // self.entries_per_page)):
+            directory.extend(struct.unpack(f'{self.entries_per_page}I', self.directory_file.read_page(page_no)))
+        self.directory = directory[:self.directory_size]
+
+    def _sync_directory(self):
+        # another handle on the same index may have split or doubled since the
+        # directory was cached; the header is pool resident, so this is cheap
+        global_depth, directory_size, bucket_count, _, self.free_page = self.HEADER.unpack(self.file.read_header())
+        if (global_depth, directory_size, bucket_count) != (self.global_depth, self.directory_size, self.bucket_count):
+            self.global_depth, self.directory_size, self.bucket_count = global_depth, directory_size, bucket_count
+            self._load_directory()
+
+    def _write_directory_pages(self, page_numbers: set[int]):
+        for page_no in sorted(page_numbers):
+            entries = self.directory[page_no * self.entries_per_page:(page_no + 1) * self.entries_per_page]
+            page = struct.pack(f'{len(entries)}I', *entries).ljust(self.DIRECTORY_PAGE_SIZE, b'\0')
+            self.directory_file.write_page(page_no, page)
+
+    def _read_bucket(self, bucket_id: int) -> Bucket:
+        return self.bucket_format.read(self.file.read_page(bucket_id))
+
+    def _write_bucket(self, bucket_id: int, bucket: Bucket):
+        self.file.write_page(bucket_id, self.bucket_format.pack(bucket))
+
+    def _get_bucket_bytes(self) -> int:
+        return self.bucket_format.page_size
 
     def _get_bucket_position(self, bucket_id: int) -> int:
-        directory_size_bytes = self.directory_size * self.DIRECTORY_ENTRY_SIZE
-        buckets_start = self.HEADER_SIZE + directory_size_bytes
-        bucket_size_bytes = self.BUCKET_HEADER_SIZE + (self.bucket_size * self.index_record_size)
-        return buckets_start + (bucket_id * bucket_size_bytes)
+        return self.file.page_offset(bucket_id)
+
+    def _get_directory_position(self, bucket_index: int) -> int:
+        return bucket_index * self.DIRECTORY_ENTRY_SIZE
+
+    def _replace_in_chain(self, bucket_id: int, bucket: Bucket, key: bytes, data_position: int) -> bool:
+        page_id, page = bucket_id, bucket
+        while True:
+            entry = self.bucket_format.find_entry(page, key)
+            if entry is not None:
+                entry[1] = [data_position]
+                self._write_bucket(page_id, page)
+                return True
+            if page.next_overflow == -1:
+                return False
+            page_id = page.next_overflow
+            page = self._read_bucket(page_id)
+
+    def _read_chain_entries(self, bucket: Bucket) -> list[list]:
+        # entries of the whole chain, one per key
+        merged: dict[bytes, list[int]] = {}
+        page = bucket
+        while True:
+            for key, positions in page.entries:
+                merged.setdefault(key, []).extend(positions)
+            if page.next_overflow == -1:
+                break
+            page = self._read_bucket(page.next_overflow)
+        return [[key, positions] for key, positions in merged.items()]
+
+    def _chain_page_ids(self, bucket_id: int) -> list[int]:
+        page_ids = []
+        while bucket_id != -1:
+            page_ids.append(bucket_id)
+            bucket_id = self._read_bucket(bucket_id).next_overflow
+        return page_ids
+
+    def _write_chain(self, page_ids: list[int], local_depth: int, entries: list[list]):
+        # packs entries into the given pages, allocating more when needed
+        pages = self.bucket_format.split_pages(entries)
+        for page_id in page_ids[len(pages):]:
+            self._free_page(page_id)
+        page_ids = page_ids[:len(pages)]
+        while len(page_ids) < len(pages):
+            page_ids.append(self._allocate_page())
+        for i, page_entries in enumerate(pages):
+            next_overflow = page_ids[i + 1] if i + 1 < len(pages) else -1
+            bucket = Bucket(local_depth, next_overflow, entries=page_entries)
+            if i == 0:
+                bucket.tail = page_ids[-1]
+                bucket.chain_length = len(pages)
+            self._write_bucket(page_ids[i], bucket)
+
+    def _add_overflow_page(self, bucket_id: int, bucket: Bucket, tail_page: tuple[int, Bucket], key: bytes, data_position: int):
+        new_page_id = self._allocate_page()
+        self._write_bucket(new_page_id, Bucket(bucket.local_depth, entries=[[key, [data_position]]]))
+
+        tail_id, tail = tail_page
+        tail.next_overflow = new_page_id
+        if tail_id != bucket_id:
+            self._write_bucket(tail_id, tail)
+        bucket.tail = new_page_id
+        bucket.chain_length += 1
+        self._write_bucket(bucket_id, bucket)
+        self._save_header()
+
+    def _split(self, bucket_index: int, bucket_id: int, bucket: Bucket, low: list[list], high: list[list]):
+        if bucket.local_depth == self.global_depth:
+            self._expand_directory()
+
+        new_local_depth = bucket.local_depth + 1
+        new_bucket_id = self._allocate_page()
+
+        self._write_chain(self._chain_page_ids(bucket_id), new_local_depth, low)
+        self._write_chain([new_bucket_id], new_local_depth, high)
+        self._save_header()
+
+        self._update_directory_after_split(bucket_index, new_bucket_id, new_local_depth)
+
+    def _allocate_page(self) -> int:
+        if self.free_page != -1:
+            page_id = self.free_page
+            self.free_page = self._read_bucket(page_id).next_overflow
+            return page_id
+        self.bucket_count += 1
+        return self.bucket_count - 1
 
-    def _get_directory_position(self) -> int:
-        return self.HEADER_SIZE
+    def _free_page(self, page_id: int):
+        self._write_bucket(page_id, Bucket(next_overflow=self.free_page))
+        self.free_page = page_id
 
-    def _hash_key(self, key: any) -> int:
-        key_bytes = DataSerializer.serialize(key, self.key_type, self.max_key_len)
-        return xxh64(key_bytes).intdigest()
+    def _hash_key(self, key: bytes) -> int:
+        return xxh64(key).intdigest()
 
-    def _get_bucket_index(self, key: any) -> int:
+    def _get_bucket_index(self, key: bytes) -> int:
         hash_value = self._hash_key(key)
         mask = (1 << self.global_depth) - 1
         return hash_value & mask
@@ -207,59 +389,51 @@ class ExtendibleHashingFile:
     def _get_bit(self, number: int, position: int) -> bool:
         return bool((number >> position) & 1)
 
-    def _split_bucket(self, bucket_id: int, local_depth: int, records: list[tuple[str, int]]) -> tuple[list[tuple[str, int]], list[tuple[str, int]]]:
-        bucket1_records = []
-        bucket2_records = []
-        bit_position = local_depth
-        for key, offset in records:
-            hash_value = self._hash_key(key)
-            if self._get_bit(hash_value, bit_position):
-                bucket2_records.append((key, offset))
+    def _split_entries(self, entries: list[list], local_depth: int) -> tuple[list[list], list[list]]:
+        low = []
+        high = []
+        for entry in entries:
+            if self._get_bit(self._hash_key(entry[0]), local_depth):
+                high.append(entry)
             else:
-                bucket1_records.append((key, offset))
-        return bucket1_records, bucket2_records
+                low.append(entry)
+        return low, high
 
     def _expand_directory(self):
-        old_directory = self._read_directory()
-        buckets = {i: self._read_bucket(i) for i in range(self.bucket_count)}
-
+        # doubling only appends a copy of the directory, buckets do not move
+        old_size = self.directory_size
+        self.directory.extend(self.directory)
         self.global_depth += 1
         self.directory_size = 1 << self.global_depth
-        new_directory = [
-            old_directory[i % len(old_directory)]
-            for i in range(self.directory_size)
-        ]
-
-        self._rebuild_file(new_directory, buckets)
+        first_page = old_size // self.entries_per_page
+        last_page = (self.directory_size - 1) // self.entries_per_page
+        self._write_directory_pages(set(range(first_page, last_page + 1)))
+        self._save_header()
 
-    def _update_directory_after_split(self, old_bucket_id: int, new_bucket_id: int, local_depth: int):
-        directory = self._read_directory()
+    def _update_directory_after_split(self, bucket_index: int, new_bucket_id: int, local_depth: int):
+        # the entries of the split bucket share its low local_depth - 1 bits;
+        # the ones with the next bit set now point to the new bucket
         high_bit = 1 << (local_depth - 1)
-
-        for i in range(len(directory)):
-            if directory[i] == old_bucket_id and (i & high_bit):
-                directory[i] = new_bucket_id
-
-        self._write_directory(directory)
-
-    def _is_file_empty(self) -> bool:
-        if not os.path.exists(self.index_filename):
-            with open(self.index_filename, 'wb') as f:
-                pass
-            return True
-        return os.path.getsize(self.index_filename) == 0
+        start = (bucket_index & (high_bit - 1)) | high_bit
+        changed_pages = set()
+        for i in range(start, self.directory_size, high_bit << 1):
+            self.directory[i] = new_bucket_id
+            changed_pages.add(i // self.entries_per_page)
+        self._write_directory_pages(changed_pages)
 
     def debug_print_structure(self):
         print(f"Global Depth: {self.global_depth}")
         print(f"Directory Size: {self.directory_size}")
         print(f"Bucket Count: {self.bucket_count}")
         try:
-            directory = self._read_directory()
-            print(f"Directory: {directory}")
-            for bucket_id in range(self.bucket_count):
-                local_depth, records = self._read_bucket(bucket_id)
-                print(f"Bucket {bucket_id}: depth={local_depth}, records={len(records)}")
-                for key, pos in records:
-                    print(f" {len(key)} {key} -> {pos}")
+            print(f"Directory: {self.directory}")
+            for bucket_id in sorted(set(self.directory)):
+                page_id = bucket_id
+                while page_id != -1:
+                    bucket = self._read_bucket(page_id)
+                    print(f"Bucket {page_id}: depth={bucket.local_depth}, entries={len(bucket.entries)}, next={bucket.next_overflow}")
+                    for key, positions in bucket.entries:
+                        print(f" {self.codec.decode(key)} -> {positions}")
+                    page_id = bucket.next_overflow
         except Exception as e:
-            print(f"Error en debug: {e}")
\ No newline at end of file
+            print(f"Error en debug: {e}")
@@ -1,40 +1,201 @@
+from contextlib import contextmanager
+from itertools import groupby
 from pathlib import Path
-from io import BufferedWriter, BufferedReader
 
 from catalog.table import Table
-from storage.disk.fixed_length import FixedLengthRecord
+from storage.disk.buffer_pool import get_buffer_pool
+from storage.disk.fixed_length import FixedLengthRecord, RecordProjection
+from storage.disk.free_space_map import FreeSpaceMap
+from storage.disk.page import SlottedPage
+from storage.disk.paged_file import open_paged_file
+from models.enum.durability_enum import Durability
 
 class HeapFile:
-    def __init__(self, table: Table, file_path: Path, buf_size: int = 8192):
+    # record ids are (page, slot) pairs encoded as page * slots_per_page + slot,
+    # so they still fit in the 4 byte positions stored by the indexes.
+    # With use_mmap, reads of pages that are not cached go through a memory
+    # map of the file instead of the buffer pool, so random fetches after an
+    # index lookup do not push the working set out of the pool.
+    # With Durability.BATCH every insert_many writes its pages back; the
+    # other modes leave that to the end of the statement (see PKAdmin).
+    # Deleted slots are counted in a free space map and inserts fill them
+    # before appending, so the file tracks the live rows under churn.
+    def __init__(self, table: Table, file_path: Path, use_mmap: bool = False,
+                 durability: Durability = Durability.STATEMENT):
         self.table = table
         self.file_path = file_path
-        self._file = open(file_path, "a+b", buffering=buf_size)
-        self.writer = BufferedWriter(raw=self._file, buffer_size=buf_size) #8kb
-        self.reader = BufferedReader(raw=self._file, buffer_size=buf_size) #8kb
+        self.page_size = table.get_tab_page_size()
+        self.use_mmap = use_mmap
+        self.durability = durability
 
         self.fixed_length = FixedLengthRecord(table)
         self.fixed_length.set_format_str()
+        self.record_size = self.fixed_length.get_format_size()
+        self.slots_per_page = SlottedPage.capacity(self.page_size, self.record_size)
+        if self.slots_per_page == 0:
+            raise ValueError(f"Error: record of {self.record_size} bytes does not fit in a page")
+
+        self.file = open_paged_file(file_path, self.page_size)
+        self.fsm = FreeSpaceMap(file_path)
+        if self.fsm.is_empty():
+            self.rebuild_free_space_map()
 
     def insert(self, data_tuple: tuple) -> int:
-        packed_data = self.fixed_length.packing(data_tuple, is_active=True)
-        self.writer.write(packed_data)
-        self.writer.flush()
-        offset = self.writer.tell()
-        return (offset // self.fixed_length.get_format_size()) - 1
-
-    def delete(self, record_id: int):
-        rec = self.read_record(record_id)
-        if rec is None:
+        return self.insert_many([data_tuple])[0]
+
+    def insert_many(self, rows: list[tuple]) -> list[int]:
+        # the batch is packed into one buffer first, so a bad row fails before
+        # any page changes; then the last page is filled in place and new
+        # pages are built whole before going to the pool
+        size = self.record_size
+        packed = bytearray(len(rows) * size)
+        pack_into = self.fixed_length.codec.pack_into
+        for i, row in enumerate(rows):
+            pack_into(packed, i * size, row, True)
+
+        record_ids = []
+        while len(record_ids) < len(rows) and (page_no := self.fsm.find()) is not None:
+            with self.file.pin(page_no) as frame:
+                free = self._reuse_slots(SlottedPage(frame.data), page_no, packed, record_ids)
+                frame.mark_dirty()
+            self.fsm.set(page_no, free)
+
+        page_no = self.file.get_page_count() - 1
+        if len(record_ids) < len(rows) and page_no >= 0:
+            with self.file.pin(page_no) as frame:
+                if self._fill_page(SlottedPage(frame.data), page_no, packed, record_ids):
+                    frame.mark_dirty()
+
+        while len(record_ids) < len(rows):
+            page = SlottedPage.empty(self.page_size)
+            page_no = self.file.get_page_count()
+            self._fill_page(page, page_no, packed, record_ids)
+            self.file.write_page(page_no, page.data)
+
+        if self.durability == Durability.BATCH:
+            self.file.flush()
+            self.fsm.flush()
+        return record_ids
+
+    def _reuse_slots(self, page: SlottedPage, page_no: int, packed: bytearray, record_ids: list[int]) -> int:
+        # overwrites deleted records with the next ones of packed and returns
+        # how many deleted slots the page has left
+        size = self.record_size
+        free = 0
+        for slot_no in range(page.get_slot_count()):
+            offset = page.locate(slot_no)
+            if offset is None or page.data[offset + size - 1]:
+                continue
+            if len(record_ids) * size < len(packed):
+                start = len(record_ids) * size
+                page.data[offset:offset + size] = packed[start:start + size]
+                record_ids.append(self.make_rid(page_no, slot_no))
+            else:
+                free += 1
+        return free
+
+    def rebuild_free_space_map(self) -> None:
+        counts = [0] * self.file.get_page_count()
+        for record_id, _, is_active in self.scan():
+            if not is_active:
+                counts[self.split_rid(record_id)[0]] += 1
+        self.fsm.reset(counts)
+
+    def compact(self, limit: int) -> list[tuple[int, int, tuple]]:
+        # moves up to limit live records from the last pages into deleted
+        # slots of earlier ones, then cuts the pages left without live
+        # records; returns (old rid, new rid, row) of every moved record
+        size = self.record_size
+        moved = []
+        last = self.file.get_page_count() - 1
+        while last >= 0 and len(moved) < limit:
+            with self.file.pin(last) as frame:
+                page = SlottedPage(frame.data)
+                offsets = [(slot_no, page.locate(slot_no)) for slot_no in range(page.get_slot_count())]
+                live = [(slot_no, offset) for slot_no, offset in offsets
+                        if offset is not None and frame.data[offset + size - 1]][:limit - len(moved)]
+                packed = bytearray(b''.join(frame.data[offset:offset + size] for _, offset in live))
+            if not live:
+                last -= 1
+                continue
+
+            new_rids = []
+            while len(new_rids) < len(live) and (page_no := self.fsm.find()) is not None and page_no < last:
+                with self.file.pin(page_no) as frame:
+                    free = self._reuse_slots(SlottedPage(frame.data), page_no, packed, new_rids)
+                    frame.mark_dirty()
+                self.fsm.set(page_no, free)
+            if not new_rids:
+                break
+
+            with self.file.pin(last, dirty=True) as frame:
+                for (slot_no, offset), new_rid in zip(live, new_rids):
+                    frame.data[offset + size - 1] = 0
+                    row, _ = self.fixed_length.codec.unpack_from(frame.data, offset)
+                    moved.append((self.make_rid(last, slot_no), new_rid, row))
+            self.fsm.add(last, len(new_rids))
+            if len(new_rids) < len(live):
+                break
+
+        self._cut_dead_pages()
+        return moved
+
+    def _cut_dead_pages(self) -> None:
+        page_count = self.file.get_page_count()
+        keep = page_count
+        while keep > 0:
+            with self.file.pin(keep - 1) as frame:
+                page = SlottedPage(frame.data)
+                offsets = (page.locate(slot_no) for slot_no in range(page.get_slot_count()))
+                if any(offset is not None and frame.data[offset + self.record_size - 1] for offset in offsets):
+                    break
+            keep -= 1
+        if keep == page_count:
             return
+        for page_no in range(keep, page_count):
+            self.fsm.set(page_no, 0)
+        self.file.shrink(keep)
 
-        data_tuple, _ = rec
-        packed_data = self.fixed_length.packing(data_tuple, is_active=False)
+    def _fill_page(self, page: SlottedPage, page_no: int, packed: bytearray, record_ids: list[int]) -> bool:
+        # copies the next records of packed into free slots of the page
+        size = self.record_size
+        filled = False
+        while len(record_ids) * size < len(packed):
+            allocated = page.allocate(size)
+            if allocated is None:
+                break
+            slot_no, offset = allocated
+            start = len(record_ids) * size
+            page.data[offset:offset + size] = packed[start:start + size]
+            record_ids.append(self.make_rid(page_no, slot_no))
+            filled = True
+        return filled
 
-        size = self.fixed_length.get_format_size()
-        with open(self.file_path, "r+b") as f:
-            f.seek(record_id * size)
-            f.write(packed_data)
-            f.flush()
+    def delete(self, record_id: int) -> bool:
+        return self.delete_many([record_id]) == 1
+
+    def delete_many(self, record_ids: list[int]) -> int:
+        # tombstones the records by clearing their active byte in place, one
+        # pin per page in file order; returns how many were active
+        active_byte = self.record_size - 1
+        deleted = 0
+        for page_no, rids in groupby(sorted(record_ids), key=lambda rid: rid // self.slots_per_page):
+            if page_no >= self.file.get_page_count():
+                continue
+            count = 0
+            with self.file.pin(page_no) as frame:
+                page = SlottedPage(frame.data)
+                for record_id in rids:
+                    offset = page.locate(record_id % self.slots_per_page)
+                    if offset is not None and frame.data[offset + active_byte]:
+                        frame.data[offset + active_byte] = 0
+                        count += 1
+                if count:
+                    frame.mark_dirty()
+            if count:
+                self.fsm.add(page_no, count)
+                deleted += count
+        return deleted
 
     def get_column_value(self, record_id: int, column_name: str) -> any:
         record = self.read_record(record_id)
@@ -48,44 +209,107 @@ class HeapFile:
                 return index
 
     def read_record(self, record_id: int) -> tuple[tuple[any, ...], bool]:
-        data_bytes = self.read_at(record_id)
-        if data_bytes is None:
+        page_no, slot_no = self.split_rid(record_id)
+        if page_no >= self.file.get_page_count():
             return None
-        return self.fixed_length.unpacking(data_bytes)
+        with self._page_data(page_no) as data:
+            offset = SlottedPage(data).locate(slot_no)
+            if offset is None:
+                return None
+            return self.fixed_length.unpacking_from(data, offset)
 
-    def read_record_json(self, record_id: int) -> dict:
+    def read_record_json(self, record_id: int, columns: list[str] | None = None) -> dict:
+        # with columns only those are decoded, in that order
+        if columns is not None:
+            return self._read_projected(record_id, columns, self.projection(columns))
         record = self.read_record(record_id)
         if record is None:
             return None
-            
+
         data_tuple, is_active = record
         if not is_active:
             return None
-            
+
         columns = self.table.get_tab_columns()
         result = {}
-        
+
         for i, column in enumerate(columns):
             if i < len(data_tuple):
                 result[column.get_att_name()] = data_tuple[i]
             else:
                 result[column.get_att_name()] = None
-                
+
         return result
 
-    def read_all_records(self, record_ids: list[int]):
+    def read_all_records(self, record_ids: list[int], columns: list[str] | None = None):
+        if columns is None:
+            for record_id in record_ids:
+                yield self.read_record_json(record_id)
+            return
+        projection = self.projection(columns)
         for record_id in record_ids:
-            yield self.read_record_json(record_id)
+            yield self._read_projected(record_id, columns, projection)
+
+    def projection(self, columns: list[str]) -> RecordProjection:
+        positions = {column.get_att_name().lower(): i for i, column in enumerate(self.table.get_tab_columns())}
+        missing = [name for name in columns if name.lower() not in positions]
+        if missing:
+            raise ValueError(f"Error: columnas no encontradas en la tabla: {', '.join(missing)}")
+        return self.fixed_length.codec.projection(tuple(positions[name.lower()] for name in columns))
+
+    def _read_projected(self, record_id: int, columns: list[str], projection: RecordProjection) -> dict:
+        page_no, slot_no = self.split_rid(record_id)
+        if page_no >= self.file.get_page_count():
+            return None
+        with self._page_data(page_no) as data:
+            offset = SlottedPage(data).locate(slot_no)
+            if offset is None or not projection.is_active(data, offset):
+                return None
+            return dict(zip(columns, projection.read(data, offset)))
 
     def read_at(self, record_id: int) -> bytes:
-        self.reader.seek(0, 2)
-        file_size = self.reader.tell() // self.fixed_length.get_format_size()
-        
-        if record_id >= file_size:
+        page_no, slot_no = self.split_rid(record_id)
+        if page_no >= self.file.get_page_count():
             return None
-        
-        self.reader.seek(record_id * self.fixed_length.get_format_size())
-        return self.reader.read(self.fixed_length.get_format_size())
+        with self.file.pin(page_no) as frame:
+            return SlottedPage(frame.data).read(slot_no)
+
+    def scan(self, page_nos: list[int] | None = None, columns: list[str] | None = None):
+        # yields (record_id, data_tuple, is_active) page by page, over the
+        # whole file or only the given pages; with columns only those are
+        # decoded, in that order
+        unpack_from = self.fixed_length.codec.unpack_from
+        if columns is not None:
+            unpack_from = self.projection(columns).unpack_from
+        if page_nos is None:
+            page_nos = range(self.file.get_page_count())
+        for page_no in page_nos:
+            with self._page_data(page_no) as data:
+                page = SlottedPage(data)
+                offsets = [page.locate(slot_no) for slot_no in range(page.get_slot_count())]
+                records = [(slot_no, unpack_from(data, offset))
+                           for slot_no, offset in enumerate(offsets) if offset is not None]
+            for slot_no, (data_tuple, is_active) in records:
+                yield self.make_rid(page_no, slot_no), data_tuple, is_active
+
+    @contextmanager
+    def _page_data(self, page_no: int):
+        # read only access to a page
+        if self.use_mmap:
+            with self.file.view(page_no) as data:
+                yield data
+        else:
+            with self.file.pin(page_no) as frame:
+                yield frame.data
+
+    def make_rid(self, page_no: int, slot_no: int) -> int:
+        return page_no * self.slots_per_page + slot_no
+
+    def split_rid(self, record_id: int) -> tuple[int, int]:
+        return divmod(record_id, self.slots_per_page)
+
+    def get_page_count(self) -> int:
+        return self.file.get_page_count()
 
     def converto_to_type(self, data_tuple: tuple[any, ...]) -> tuple[any, ...]:
 
@@ -98,14 +322,17 @@ class HeapFile:
 
 
     def finalize(self):
-        self.writer.flush()
+        self.file.flush()
+        self.fsm.flush()
 
     def close(self):
-        self.writer.flush()
-        self._file.close()
+        # with a write-ahead log the pages are logged at the end of the
+        # statement and written back lazily
+        if get_buffer_pool().wal is None:
+            self.finalize()
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
\ No newline at end of file
+        self.close()
@@ -1,8 +1,8 @@
 import struct
-import os
 
 from models.enum.data_type_enum import DataTypeTag
-from storage.disk.data_serializer import DataSerializer
+from storage.disk.key_codec import KeyCodec
+from storage.disk.paged_file import open_paged_file, INDEX_EXTENT_SIZE
 
 class ISAMFile:
     HEADER_SIZE = 28  # levels, block_factor, data_type, max_key_len, total_blocks, root_blocks
@@ -15,12 +15,16 @@ class ISAMFile:
         self.levels = levels
         self.block_factor = block_factor
         
-        self.key_size = DataSerializer.get_size(data_type, max_key_len)
+        # keys are stored encoded and compared as bytes; the all zero NULL key
+        # marks the open ended entry of an index block
+        self.codec = KeyCodec(data_type, max_key_len)
+        self.key_size = self.codec.size
         self.key_record_size = self.key_size + 4  # for leaf 
         self.index_record_size = self.key_size + 4  # for index levels
         self.record_size = max(self.key_record_size, self.index_record_size)
         
         self.block_size = self.BLOCK_HEADER_SIZE + (self.block_factor * self.record_size)
+        self.file = open_paged_file(index_filename, self.block_size, self.HEADER_SIZE, INDEX_EXTENT_SIZE)
         
         self.total_blocks = 0
         self.root_blocks = 0
@@ -32,6 +36,7 @@ class ISAMFile:
     
     # main functions
     def insert(self, key: any, data_position: int) -> bool:
+        key = self.codec.encode(key)
         path = self._find_leaf_path(key)
         leaf_block_id = path[-1]
         
@@ -41,6 +46,7 @@ class ISAMFile:
         return self._handle_leaf_overflow(leaf_block_id, key, data_position)
     
     def delete(self, key: any) -> int | None:
+        key = self.codec.encode(key)
         path = self._find_leaf_path(key)
         leaf_block_id = path[-1]
         
@@ -51,6 +57,7 @@ class ISAMFile:
         return self._delete_from_overflow_chain(leaf_block_id, key)
     
     def search(self, key: any) -> int | None:
+        key = self.codec.encode(key)
         path = self._find_leaf_path(key)
         leaf_block_id = path[-1]
         
@@ -60,32 +67,29 @@ class ISAMFile:
         
         return self._search_in_overflow_chain(leaf_block_id, key)
     
+    def build(self, keys) -> None:
+        # sparse index over the rows in heap order: the key of every
+        # block_factor-th row with the number of its block
+        for i, key in enumerate(keys):
+            if i % self.block_factor == 0:
+                self.insert(key, i // self.block_factor)
+
+    def reset(self) -> None:
+        # empties the index, to build it again after the rows moved
+        self.file.truncate()
+        self._initialize_file()
+
     # helper functions
     def _initialize_file(self):
-        with open(self.index_filename, 'wb') as f:
-            self.total_blocks = 0
-            
-            if self.levels == 1:
-                self.root_blocks = 1
-                self._write_header(f)
-                self._write_empty_leaf_block(f, 0)
-                self.total_blocks = 1
-            else:
-                self.root_blocks = 1
-                self._write_header(f)
-                
-                block_id = 0
-                
-                for level in range(self.levels - 1):
-                    next_block_id = block_id + 1
-                    if level == self.levels - 2:
-                        self._write_index_block(f, level, [(None, next_block_id)])
-                    else:
-                        self._write_index_block(f, level, [(None, next_block_id)])
-                    block_id += 1
-                
-                self._write_empty_leaf_block(f, self.levels - 1)
-                self.total_blocks = self.levels
+        self.root_blocks = 1
+        if self.levels == 1:
+            self._write_block(0, self._pack_leaf_block(0, []))
+            self.total_blocks = 1
+        else:
+            for level in range(self.levels - 1):
+                self._write_block(level, self._pack_index_block(level, [(None, level + 1)]))
+            self._write_block(self.levels - 1, self._pack_leaf_block(self.levels - 1, []))
+            self.total_blocks = self.levels
         
         self._save_header()
     
@@ -112,69 +116,60 @@ class ISAMFile:
         return records[-1][1]
     
     def _read_block_header(self, block_id: int) -> tuple[int, int, int]:
-        with open(self.index_filename, 'rb') as f:
-            f.seek(self._get_block_position(block_id))
-            header_data = f.read(self.BLOCK_HEADER_SIZE)
-            if len(header_data) < self.BLOCK_HEADER_SIZE:
-                return 0, 0, -1
-            return struct.unpack('III', header_data)
+        return struct.unpack_from('IIi', self.file.read_page(block_id), 0)
     
     def _read_index_block(self, block_id: int) -> tuple[list[tuple[any, int]], int]:
-        with open(self.index_filename, 'rb') as f:
-            f.seek(self._get_block_position(block_id))            
-            _, record_count, next_overflow = struct.unpack('III', f.read(self.BLOCK_HEADER_SIZE))
-            
-            records = []
-            for _ in range(record_count):
-                record_data = f.read(self.record_size)
-                if len(record_data) < self.record_size:
-                    break
-                
-                key, block_pointer = self._unpack_index_record(record_data)
-                if key is not None or block_pointer > 0:
-                    records.append((key, block_pointer))
+        block_data = self.file.read_page(block_id)
+        _, record_count, next_overflow = struct.unpack_from('IIi', block_data, 0)
+        
+        records = []
+        offset = self.BLOCK_HEADER_SIZE
+        for _ in range(min(record_count, self.block_factor)):
+            record_data = block_data[offset:offset + self.record_size]
+            offset += self.record_size
             
-            return records, next_overflow
+            key, block_pointer = self._unpack_index_record(record_data)
+            if key is not None or block_pointer > 0:
+                records.append((key, block_pointer))
+        
+        return records, next_overflow
     
     def _read_leaf_block(self, block_id: int) -> tuple[list[tuple[any, int]], int]:
-        with open(self.index_filename, 'rb') as f:
-            f.seek(self._get_block_position(block_id))
-            _, record_count, next_overflow = struct.unpack('III', f.read(self.BLOCK_HEADER_SIZE))
-            
-            records = []
-            for _ in range(record_count):
-                record_data = f.read(self.record_size)
-                if len(record_data) < self.record_size:
-                    break
-                
-                key, data_offset = self._unpack_data_record(record_data)
-                if key is not None:
-                    records.append((key, data_offset))
+        block_data = self.file.read_page(block_id)
+        _, record_count, next_overflow = struct.unpack_from('IIi', block_data, 0)
+        
+        records = []
+        offset = self.BLOCK_HEADER_SIZE
+        for _ in range(min(record_count, self.block_factor)):
+            record_data = block_data[offset:offset + self.record_size]
+            offset += self.record_size
             
-            return records, next_overflow
+            key, data_offset = self._unpack_data_record(record_data)
+            if key is not None:
+                records.append((key, data_offset))
+        
+        return records, next_overflow
     
-    def _write_index_block(self, f, level: int, records: list[tuple[any, int]], next_overflow: int = -1):
-        f.write(struct.pack('III', level, len(records), next_overflow))
+    def _pack_index_block(self, level: int, records: list[tuple[any, int]], next_overflow: int = -1) -> bytes:
+        block_data = bytearray(self.block_size)
+        struct.pack_into('IIi', block_data, 0, level, len(records), next_overflow)
+        offset = self.BLOCK_HEADER_SIZE
         for key, block_pointer in records:
-            record_data = self._pack_index_record(key, block_pointer)
-            f.write(record_data)
-        
-        remaining = self.block_factor - len(records)
-        for _ in range(remaining):
-            f.write(b'\0' * self.record_size)
+            block_data[offset:offset + self.record_size] = self._pack_index_record(key, block_pointer)
+            offset += self.record_size
+        return bytes(block_data)
     
-    def _write_leaf_block(self, f, level: int, records: list[tuple[any, int]], next_overflow: int = -1):
-        f.write(struct.pack('III', level, len(records), next_overflow))        
+    def _pack_leaf_block(self, level: int, records: list[tuple[any, int]], next_overflow: int = -1) -> bytes:
+        block_data = bytearray(self.block_size)
+        struct.pack_into('IIi', block_data, 0, level, len(records), next_overflow)
+        offset = self.BLOCK_HEADER_SIZE
         for key, data_offset in records:
-            record_data = self._pack_data_record(key, data_offset)
-            f.write(record_data)
-        
-        remaining = self.block_factor - len(records)
-        for _ in range(remaining):
-            f.write(b'\0' * self.record_size)
+            block_data[offset:offset + self.record_size] = self._pack_data_record(key, data_offset)
+            offset += self.record_size
+        return bytes(block_data)
     
-    def _write_empty_leaf_block(self, f, level: int):
-        self._write_leaf_block(f, level, [], -1)
+    def _write_block(self, block_id: int, block_data: bytes):
+        self.file.write_page(block_id, block_data)
     
     def _insert_in_leaf_block(self, block_id: int, key: any, data_position: int) -> bool:
         records, next_overflow = self._read_leaf_block(block_id)
@@ -187,16 +182,14 @@ class ISAMFile:
         
         if len(records) < self.block_factor:
             records.append((key, data_position))
-            records.sort(key=lambda x: x[0] if x[0] is not None else float('inf'))
+            records.sort(key=lambda x: x[0])
             self._write_leaf_block_at_position(block_id, records, next_overflow)
             return True
         
         return False
     
     def _write_leaf_block_at_position(self, block_id: int, records: list[tuple[any, int]], next_overflow: int = -1):
-        with open(self.index_filename, 'r+b') as f:
-            f.seek(self._get_block_position(block_id))
-            self._write_leaf_block(f, self.levels - 1, records, next_overflow)
+        self._write_block(block_id, self._pack_leaf_block(self.levels - 1, records, next_overflow))
     
     def _handle_leaf_overflow(self, leaf_block_id: int, key: any, data_position: int) -> bool:
         records, next_overflow = self._read_leaf_block(leaf_block_id)
@@ -206,10 +199,7 @@ class ISAMFile:
             self.total_blocks += 1
             self._save_header()
             
-            with open(self.index_filename, 'r+b') as f:
-                f.seek(0, 2)
-                self._write_empty_leaf_block(f, self.levels - 1)
-            
+            self._write_leaf_block_at_position(overflow_block_id, [], -1)
             self._write_leaf_block_at_position(leaf_block_id, records, overflow_block_id)
             next_overflow = overflow_block_id
         
@@ -229,7 +219,7 @@ class ISAMFile:
             
             if len(records) < self.block_factor:
                 records.append((key, data_position))
-                records.sort(key=lambda x: x[0] if x[0] is not None else float('inf'))
+                records.sort(key=lambda x: x[0])
                 self._write_leaf_block_at_position(current_block, records, next_overflow)
                 return True
             
@@ -238,10 +228,6 @@ class ISAMFile:
                 self.total_blocks += 1
                 self._save_header()
                 
-                with open(self.index_filename, 'r+b') as f:
-                    f.seek(0, 2)
-                    self._write_empty_leaf_block(f, self.levels - 1)
-                
                 self._write_leaf_block_at_position(current_block, records, new_overflow_id)
                 
                 self._write_leaf_block_at_position(new_overflow_id, [(key, data_position)], -1)
@@ -289,62 +275,33 @@ class ISAMFile:
             current_block = next_overflow
         return None
     
-    def _pack_index_record(self, key: any, block_pointer: int) -> bytes:
-        if key is None:
-            key_bytes = b'\0' * self.key_size
-        else:
-            key_bytes = DataSerializer.serialize(key, self.data_type, self.max_key_len)
-        return key_bytes + struct.pack('I', block_pointer)
+    def _pack_index_record(self, key: bytes | None, block_pointer: int) -> bytes:
+        return (self.codec.null if key is None else key) + struct.pack('I', block_pointer)
     
-    def _unpack_index_record(self, record_bytes: bytes) -> tuple[any, int]:
+    def _unpack_index_record(self, record_bytes: bytes) -> tuple[bytes | None, int]:
         key_bytes = record_bytes[:self.key_size]
         block_pointer = struct.unpack('I', record_bytes[self.key_size:])[0]
-        
-        if all(b == 0 for b in key_bytes):
-            return None, block_pointer
-            
-        key = DataSerializer.deserialize(key_bytes, self.data_type, self.max_key_len)
-        return key, block_pointer
+        return (None if key_bytes == self.codec.null else key_bytes), block_pointer
     
-    def _pack_data_record(self, key: any, data_offset: int) -> bytes:
-        if key is None:
-            key_bytes = b'\0' * self.key_size
-        else:
-            key_bytes = DataSerializer.serialize(key, self.data_type, self.max_key_len)
-        return key_bytes + struct.pack('I', data_offset)
+    def _pack_data_record(self, key: bytes | None, data_offset: int) -> bytes:
+        return (self.codec.null if key is None else key) + struct.pack('I', data_offset)
     
-    def _unpack_data_record(self, record_bytes: bytes) -> tuple[any, int]:
+    def _unpack_data_record(self, record_bytes: bytes) -> tuple[bytes | None, int]:
         key_bytes = record_bytes[:self.key_size]
         data_offset = struct.unpack('I', record_bytes[self.key_size:])[0]
-        
-        if all(b == 0 for b in key_bytes):
-            return None, data_offset
-            
-        key = DataSerializer.deserialize(key_bytes, self.data_type, self.max_key_len)
-        return key, data_offset
-    
-    def _write_header(self, f):
-        f.write(struct.pack('IIIIIII', self.levels, self.block_factor, self.data_type.value, 
-                          self.max_key_len, self.total_blocks, self.root_blocks, 0))
+        return (None if key_bytes == self.codec.null else key_bytes), data_offset
     
     def _load_header(self):
-        with open(self.index_filename, 'rb') as f:
-            header_data = f.read(self.HEADER_SIZE)
-            self.levels, self.block_factor, data_type_value, self.max_key_len, self.total_blocks, self.root_blocks, _ = struct.unpack('IIIIIII', header_data)
-            self.data_type = DataTypeTag(data_type_value)
+        header_data = self.file.read_header()
+        self.levels, self.block_factor, data_type_value, self.max_key_len, self.total_blocks, self.root_blocks, _ = struct.unpack('IIIIIII', header_data)
+        self.data_type = DataTypeTag(data_type_value)
     
     def _save_header(self):
-        with open(self.index_filename, 'r+b') as f:
-            f.seek(0)
-            f.write(struct.pack('IIIIIII', self.levels, self.block_factor, self.data_type.value,
-                              self.max_key_len, self.total_blocks, self.root_blocks, 0))
+        self.file.write_header(struct.pack('IIIIIII', self.levels, self.block_factor, self.data_type.value,
+                                           self.max_key_len, self.total_blocks, self.root_blocks, 0))
     
     def _get_block_position(self, block_id: int) -> int:
-        return self.HEADER_SIZE + (block_id * self.block_size)
+        return self.file.page_offset(block_id)
 
     def _is_file_empty(self) -> bool:
-        if not os.path.exists(self.index_filename):
-            with open(self.index_filename, 'wb') as f:
-                pass
-            return True
-        return os.path.getsize(self.index_filename) == 0
\ No newline at end of file
+        return self.file.is_empty()
\ No newline at end of file
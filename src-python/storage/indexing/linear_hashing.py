@@ -0,0 +1,291 @@
+from xxhash import xxh64
+import os
+import struct
+
+from storage.disk.key_codec import KeyCodec
+from storage.disk.paged_file import PagedFile, open_paged_file, INDEX_EXTENT_SIZE
+from storage.indexing.bloom_filter import BloomFilter
+from storage.indexing.hashing import Bucket, BucketFormat
+from models.enum.data_type_enum import DataTypeTag
+
+# Reference: Litwin, "Linear Hashing: a new tool for file and table addressing" (1980)
+# Buckets are split one at a time in order, pointed to by next_split, whenever
+# the load factor passes max_load_factor, so an insert never does more than
+# one split. Primary pages live in the index file at their bucket number and
+# overflow pages in a sidecar file (index_filename + .ovf), with freed
+# overflow pages kept in a free list. Bucket pages use the same layout as
+# ExtendibleHashingFile, and so does the optional Bloom filter.
+class LinearHashingFile:
+    HEADER = struct.Struct('IIIIIIiI')  # level, next_split, bucket_count, initial_buckets, overflow_count, record_count, free_overflow, flags
+    HEADER_SIZE = HEADER.size
+    OVERFLOW_SUFFIX = ".ovf"
+    DEFAULT_INITIAL_BUCKETS = 4
+    DEFAULT_MAX_LOAD_FACTOR = 0.8
+    FLAG_UNIQUE = 0x1
+
+    def __init__(self,
+                 index_filename: str,
+                 data_type: DataTypeTag,
+                 max_key_len: int,
+                 bucket_size: int = 10,
+                 initial_buckets: int = DEFAULT_INITIAL_BUCKETS,
+                 max_load_factor: float = DEFAULT_MAX_LOAD_FACTOR,
+                 unique: bool = True,
+                 bloom: bool = False):
+        if initial_buckets < 1:
+            raise ValueError(f"Error: initial_buckets must be positive, got {initial_buckets}")
+        self.index_filename = index_filename
+        self.bucket_size = bucket_size
+        self.max_load_factor = max_load_factor
+        self.key_type = data_type
+        self.max_key_len = max_key_len
+        self.unique = unique
+
+        self.level = 0
+        self.next_split = 0
+        self.initial_buckets = initial_buckets
+        self.bucket_count = initial_buckets
+        self.overflow_count = 0
+        self.record_count = 0
+        self.free_overflow = -1
+
+        # keys are stored encoded and compared as bytes
+        self.codec = KeyCodec(data_type, max_key_len)
+        self.bucket_format = BucketFormat(self.codec.size, bucket_size)
+        self.index_record_size = self.bucket_format.entry_size(1)
+
+        self.file = open_paged_file(index_filename, self.bucket_format.page_size, self.HEADER_SIZE, INDEX_EXTENT_SIZE)
+        self.overflow_file = open_paged_file(str(index_filename) + self.OVERFLOW_SUFFIX, self.bucket_format.page_size,
+                                             0, INDEX_EXTENT_SIZE)
+
+        if self.file.is_empty():
+            self._initialize_index_file()
+        else:
+            self._load_header()
+
+        bloom_filename = str(index_filename) + BloomFilter.SUFFIX
+        self.bloom = BloomFilter(bloom_filename) if bloom or os.path.exists(bloom_filename) else None
+        if self.bloom is not None and self.bloom.is_empty():
+            self.rebuild_bloom_filter()
+
+    def insert(self, key: any, data_position: int) -> bool:
+        key = self.codec.encode(key)
+        self._insert(key, data_position)
+        if self.bloom is not None and not self.bloom.add(key):
+            self.rebuild_bloom_filter()
+        return True
+
+    def _insert(self, key: bytes, data_position: int):
+        self._load_header()
+        bucket_no = self._get_bucket_address(key)
+        bucket = self._read_bucket(self.file, bucket_no)
+
+        if self.unique and self._might_contain(key) and self._replace_in_chain(bucket_no, bucket, key, data_position):
+            return
+
+        # only the primary page and the tail are tried, so inserting into a
+        # long chain costs the same as into a single page
+        pages = [(self.file, bucket_no, bucket)]
+        if bucket.tail != -1:
+            pages.append((self.overflow_file, bucket.tail, self._read_bucket(self.overflow_file, bucket.tail)))
+        if not self._add_to_pages(pages, key, data_position):
+            self._add_overflow_page(bucket_no, bucket, pages[-1], key, data_position)
+
+        self.record_count += 1
+        if self.get_load_factor() > self.max_load_factor:
+            self._split_next()
+        self._save_header()
+
+    def delete(self, key: any, data_position: int | None = None) -> bool:
+        # without data_position every record id of the key is removed
+        key = self.codec.encode(key)
+        if not self._might_contain(key):
+            return False
+        self._load_header()
+        deleted = 0
+        for paged_file, page_id, page in self._iter_chain(self._get_bucket_address(key)):
+            entry = self.bucket_format.find_entry(page, key)
+            if entry is None or (data_position is not None and data_position not in entry[1]):
+                continue
+            if data_position is None:
+                page.entries.remove(entry)
+                deleted += len(entry[1])
+            else:
+                entry[1].remove(data_position)
+                deleted += 1
+                if not entry[1]:
+                    page.entries.remove(entry)
+            self._write_bucket(paged_file, page_id, page)
+            if data_position is not None or self.unique:
+                break
+        if deleted:
+            self.record_count -= deleted
+            self._save_header()
+        return deleted > 0
+
+    def search(self, key: any) -> int:
+        positions = self.search_all(key)
+        return positions[0] if positions else None
+
+    def search_all(self, key: any) -> list[int]:
+        key = self.codec.encode(key)
+        if not self._might_contain(key):
+            return []
+        self._load_header()
+        positions = []
+        for _, _, page in self._iter_chain(self._get_bucket_address(key)):
+            entry = self.bucket_format.find_entry(page, key)
+            if entry is not None:
+                positions.extend(entry[1])
+                if self.unique:
+                    break
+        return positions
+
+    def get_load_factor(self) -> float:
+        return self.record_count / (self.bucket_count * self.bucket_size)
+
+    def rebuild_bloom_filter(self):
+        # sizes the filter for twice the current keys and drops deleted ones;
+        # free overflow pages are empty, so every page can be read in order
+        self._load_header()
+        pages = [(self.file, page_id) for page_id in range(self.bucket_count)] + \
+                [(self.overflow_file, page_id) for page_id in range(self.overflow_count)]
+        keys = {key for paged_file, page_id in pages for key, _ in self._read_bucket(paged_file, page_id).entries}
+        self.bloom.reset(2 * len(keys))
+        for key in keys:
+            self.bloom.add(key)
+
+    def _might_contain(self, key: bytes) -> bool:
+        return self.bloom is None or self.bloom.might_contain(key)
+
+    def _initialize_index_file(self):
+        self.overflow_file.truncate()
+        for bucket_no in range(self.initial_buckets):
+            self._write_bucket(self.file, bucket_no, Bucket())
+        self._save_header()
+
+    def _load_header(self):
+        (self.level, self.next_split, self.bucket_count, self.initial_buckets, self.overflow_count,
+         self.record_count, self.free_overflow, flags) = self.HEADER.unpack(self.file.read_header())
+        self.unique = bool(flags & self.FLAG_UNIQUE)
+
+    def _save_header(self):
+        flags = self.FLAG_UNIQUE if self.unique else 0
+        self.file.write_header(self.HEADER.pack(self.level, self.next_split, self.bucket_count, self.initial_buckets,
+                                                self.overflow_count, self.record_count, self.free_overflow, flags))
+
+    def _read_bucket(self, paged_file: PagedFile, page_id: int) -> Bucket:
+        return self.bucket_format.read(paged_file.read_page(page_id))
+
+    def _write_bucket(self, paged_file: PagedFile, page_id: int, bucket: Bucket):
+        paged_file.write_page(page_id, self.bucket_format.pack(bucket))
+
+    def _iter_chain(self, bucket_no: int):
+        # yields (file, page_id, bucket) for the primary page and its overflow pages
+        bucket = self._read_bucket(self.file, bucket_no)
+        yield self.file, bucket_no, bucket
+        page_id = bucket.next_overflow
+        while page_id != -1:
+            page = self._read_bucket(self.overflow_file, page_id)
+            yield self.overflow_file, page_id, page
+            page_id = page.next_overflow
+
+    def _add_to_pages(self, pages: list[tuple[PagedFile, int, Bucket]], key: bytes, data_position: int) -> bool:
+        if not self.unique:
+            for paged_file, page_id, page in pages:
+                entry = self.bucket_format.find_entry(page, key)
+                if entry is not None and self.bucket_format.free_bytes(page) >= 4:
+                    entry[1].append(data_position)
+                    self._write_bucket(paged_file, page_id, page)
+                    return True
+        for paged_file, page_id, page in pages:
+            if self.bucket_format.free_bytes(page) >= self.index_record_size:
+                page.entries.append([key, [data_position]])
+                self._write_bucket(paged_file, page_id, page)
+                return True
+        return False
+
+    def _replace_in_chain(self, bucket_no: int, bucket: Bucket, key: bytes, data_position: int) -> bool:
+        for paged_file, page_id, page in self._iter_chain(bucket_no):
+            entry = self.bucket_format.find_entry(page, key)
+            if entry is not None:
+                entry[1] = [data_position]
+                self._write_bucket(paged_file, page_id, page)
+                return True
+        return False
+
+    def _add_overflow_page(self, bucket_no: int, bucket: Bucket, tail_page: tuple[PagedFile, int, Bucket],
+                           key: bytes, data_position: int):
+        new_page_id = self._allocate_overflow_page()
+        self._write_bucket(self.overflow_file, new_page_id, Bucket(entries=[[key, [data_position]]]))
+
+        tail_file, tail_id, tail = tail_page
+        tail.next_overflow = new_page_id
+        if tail_file is self.overflow_file:
+            self._write_bucket(tail_file, tail_id, tail)
+        bucket.tail = new_page_id
+        bucket.chain_length += 1
+        self._write_bucket(self.file, bucket_no, bucket)
+
+    def _allocate_overflow_page(self) -> int:
+        if self.free_overflow != -1:
+            page_id = self.free_overflow
+            self.free_overflow = self._read_bucket(self.overflow_file, page_id).next_overflow
+            return page_id
+        page_id = self.overflow_count
+        self.overflow_count += 1
+        return page_id
+
+    def _free_overflow_page(self, page_id: int):
+        self._write_bucket(self.overflow_file, page_id, Bucket(next_overflow=self.free_overflow))
+        self.free_overflow = page_id
+
+    def _split_next(self):
+        # moves the keys of bucket next_split that belong to its buddy under
+        # the next level's hash function into a new bucket at the end
+        bucket_no = self.next_split
+        new_bucket_no = self.bucket_count
+        modulus = self.initial_buckets << (self.level + 1)
+
+        merged: dict[bytes, list[int]] = {}
+        for paged_file, page_id, page in list(self._iter_chain(bucket_no)):
+            for key, positions in page.entries:
+                merged.setdefault(key, []).extend(positions)
+            if paged_file is self.overflow_file:
+                self._free_overflow_page(page_id)
+
+        stay, move = [], []
+        for key, positions in merged.items():
+            (stay if self._hash_key(key) % modulus == bucket_no else move).append([key, positions])
+
+        self.bucket_count += 1
+        self.next_split += 1
+        if self.next_split == self.initial_buckets << self.level:
+            self.level += 1
+            self.next_split = 0
+
+        self._write_chain(bucket_no, stay)
+        self._write_chain(new_bucket_no, move)
+
+    def _write_chain(self, bucket_no: int, entries: list[list]):
+        pages = self.bucket_format.split_pages(entries)
+        page_ids = [bucket_no] + [self._allocate_overflow_page() for _ in pages[1:]]
+        for i, page_entries in enumerate(pages):
+            next_overflow = page_ids[i + 1] if i + 1 < len(pages) else -1
+            page = Bucket(next_overflow=next_overflow, entries=page_entries)
+            if i == 0:
+                page.tail = page_ids[-1] if len(pages) > 1 else -1
+                page.chain_length = len(pages)
+                self._write_bucket(self.file, bucket_no, page)
+            else:
+                self._write_bucket(self.overflow_file, page_ids[i], page)
+
+    def _hash_key(self, key: bytes) -> int:
+        return xxh64(key).intdigest()
+
+    def _get_bucket_address(self, key: bytes) -> int:
+        hash_value = self._hash_key(key)
+        bucket_no = hash_value % (self.initial_buckets << self.level)
+        if bucket_no < self.next_split:
+            bucket_no = hash_value % (self.initial_buckets << (self.level + 1))
+        return bucket_no
@@ -0,0 +1,144 @@
+import os
+import struct
+
+import numpy as np
+
+from catalog.table import Table
+from storage.disk.buffer_pool import get_buffer_pool
+from storage.disk.fixed_length import FixedLengthRecord
+from storage.disk.page import SlottedPage
+from storage.indexing.heap import HeapFile
+
+# struct codes of the row codec and the numpy types with the same layout
+NUMPY_TYPES = {
+    'h': '<i2',
+    'i': '<i4',
+    'q': '<i8',
+    'I': '<u4',
+    'Q': '<u8',
+    'd': '<f8',
+    '?': '?',
+}
+ACTIVE_FIELD = '_active'
+SLOT_COUNT_OFFSET = struct.calcsize('<QH')  # after page_lsn and flags in the page header
+
+def record_dtype(heap: HeapFile) -> np.dtype:
+    # structured dtype with the exact packed layout of a row: the columns in
+    # order followed by the active flag; text and uuid columns stay raw bytes
+    codec = heap.fixed_length.codec
+    fields = [(column.get_att_name(), NUMPY_TYPES.get(code, f'S{code[:-1]}'))
+              for column, code in zip(heap.table.get_tab_columns(), codec.codes)]
+    dtype = np.dtype(fields + [(ACTIVE_FIELD, '?')])
+    if dtype.itemsize != codec.size:
+        raise ValueError(f"Error: dtype of {dtype.itemsize} bytes does not match records of {codec.size} bytes")
+    return dtype
+
+def array_columns(table: Table) -> set[str]:
+    # columns an array holds with the same values a row scan returns:
+    # numbers and booleans, which are stored as they are
+    record = FixedLengthRecord(table)
+    record.set_format_str()
+    codec = record.codec
+    return {column.get_att_name() for column, code, from_stored
+            in zip(table.get_tab_columns(), codec.codes, codec.converters)
+            if code in NUMPY_TYPES and from_stored is None}
+
+# Columnar scan of a heap file. Records have a fixed size and every page
+# allocates them downwards from its end, so slot n is always at
+# page_size - (n + 1) * record_size: the memmap of the file is viewed as a
+# (page, slot) structured array through strides, and no byte is copied
+# until a column is compared or selected. Slots past the slot count of a
+# page hold no record and are left out of the active mask. The scan holds a
+# view of the file (see PagedFile.acquire_view) until it is closed.
+class HeapArrayScan:
+    def __init__(self, heap: HeapFile):
+        self.heap = heap
+        self.dtype = record_dtype(heap)
+        self.slots = heap.slots_per_page
+        self.pages = self.map_pages(heap.file, heap.page_size)
+        try:
+            self._view_rows(heap.page_size)
+        except Exception:
+            self.close()
+            raise
+
+    def _view_rows(self, page_size: int) -> None:
+        page_count = len(self.pages)
+
+        def strided(dtype, offset: int, shape: tuple, strides: tuple):
+            if not page_count:
+                return np.zeros((0,) + shape[1:], dtype=dtype)
+            return np.ndarray(shape, dtype, buffer=self.pages, offset=offset, strides=strides)
+
+        size = self.dtype.itemsize
+        slot_size = SlottedPage.SLOT.size
+        # the last slot is the lowest in the page, so the view is reversed
+        self.rows = strided(self.dtype, page_size - self.slots * size,
+                            (page_count, self.slots), (page_size, size))[:, ::-1]
+        slot_counts = strided('<u2', SLOT_COUNT_OFFSET, (page_count,), (page_size,))
+        slot_offsets = strided('<u2', SlottedPage.HEADER.size, (page_count, self.slots), (page_size, slot_size))
+        slot_lengths = strided('<u2', SlottedPage.HEADER.size + 2, (page_count, self.slots), (page_size, slot_size))
+
+        used = (np.arange(self.slots) < slot_counts[:, None]) & (slot_lengths > 0)
+        expected = page_size - (np.arange(self.slots) + 1) * size
+        if np.any(used & (slot_offsets != expected)):
+            raise ValueError(f"Error: the pages of {self.heap.file_path} do not have the fixed record layout")
+        self.active = used & self.rows[ACTIVE_FIELD]
+
+    @staticmethod
+    def map_pages(file, page_size: int) -> np.ndarray:
+        # The pages as they are now: the file mapped copy on write, with the
+        # pages still dirty in the pool laid over it, so a scan neither
+        # writes pages back nor flushes the log. Pages appended since the
+        # last write back are past the end of the file and can not be
+        # mapped; then the mapped part is copied into one array with them.
+        pool = get_buffer_pool()
+        with pool.lock:
+            # the map is a view of the file until close(), so it is not cut
+            file.acquire_view()
+            page_count = file.get_page_count()
+            changed = pool.dirty_pages(file)
+            on_disk = min(page_count, max(0, (os.fstat(file.fd).st_size - file.header_size) // page_size))
+        if on_disk:
+            mapped = np.memmap(file.path, dtype=np.uint8, mode='c' if changed else 'r',
+                               offset=file.header_size, shape=(on_disk, page_size))
+        if on_disk == page_count and on_disk:
+            pages = mapped
+        else:
+            pages = np.zeros((page_count, page_size), dtype=np.uint8)
+            if on_disk:
+                pages[:on_disk] = mapped
+        for page_no, data in changed:
+            if page_no < page_count:
+                pages[page_no] = np.frombuffer(data, dtype=np.uint8)
+        return pages
+
+    def close(self) -> None:
+        # the arrays must not be read after this, the file may be cut
+        if self.pages is not None:
+            self.pages = self.rows = self.active = None
+            self.heap.file.release_view()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def column(self, name: str) -> np.ndarray:
+        # (page, slot) view of a column, unused slots included
+        return self.rows[name]
+
+    def select(self, name: str, mask: np.ndarray) -> np.ndarray:
+        # values of a column in the slots of the mask, in record id order
+        return self.rows[name][mask]
+
+    def record_ids(self, mask: np.ndarray) -> np.ndarray:
+        page_nos, slot_nos = np.nonzero(mask)
+        return page_nos.astype(np.int64) * self.slots + slot_nos
+
+    def records(self, mask: np.ndarray | None = None):
+        # (record ids, structured array of rows) of the active records, or
+        # of the slots of the mask
+        mask = self.active if mask is None else mask
+        return self.record_ids(mask), self.rows[mask]
@@ -0,0 +1,53 @@
+import pytest
+from models.enum.data_type_enum import DataTypeTag
+from storage.indexing.bloom_filter import BloomFilter
+from storage.indexing.bplus_tree import BPlusTreeFile
+from storage.indexing.hashing import ExtendibleHashingFile
+from storage.indexing.linear_hashing import LinearHashingFile
+
+def test_no_false_negatives_and_few_false_positives(tmp_path):
+    """Test: Added keys are always found and misses stay near the error rate."""
+    bloom = BloomFilter(str(tmp_path / "idx.bloom"))
+    bloom.reset(5000)
+    for key in range(5000):
+        assert bloom.add(key.to_bytes(4, 'big'))
+    assert all(bloom.might_contain(key.to_bytes(4, 'big')) for key in range(5000))
+    false_positives = sum(bloom.might_contain(key.to_bytes(4, 'big')) for key in range(5000, 25000))
+    assert false_positives < 20000 * 3 * BloomFilter.DEFAULT_ERROR_RATE
+
+def test_add_reports_saturation(tmp_path):
+    """Test: add() returns False once the filter holds more keys than it was sized for."""
+    bloom = BloomFilter(str(tmp_path / "idx.bloom"))
+    bloom.reset(0)
+    results = [bloom.add(key.to_bytes(4, 'big')) for key in range(BloomFilter.DEFAULT_CAPACITY + 1)]
+    assert all(results[:-1]) and not results[-1]
+
+@pytest.mark.parametrize("index_class", [BPlusTreeFile, ExtendibleHashingFile, LinearHashingFile])
+def test_index_misses_skip_pages(tmp_path, index_class):
+    """Test: With a Bloom filter most lookups of missing keys read no index page."""
+    path = str(tmp_path / "idx.dat")
+    index = index_class(path, DataTypeTag.INT, 0, bloom=True)
+    for key in range(0, 10000, 2):  # grows past the default capacity, so the filter is rebuilt
+        index.insert(key, key)
+    assert index.bloom.get_item_count() <= 2 * 5000
+
+    reopened = index_class(path, DataTypeTag.INT, 0)
+    assert reopened.bloom is not None
+    reads = []
+    read_page = reopened.file.read_page
+    reopened.file.read_page = lambda page_no: reads.append(page_no) or read_page(page_no)
+    assert all(reopened.search(key) is None for key in range(1, 10000, 2))
+    assert len(reads) < 5000 * 0.05
+    assert all(reopened.search(key) == key for key in range(0, 10000, 2))
+
+@pytest.mark.parametrize("index_class", [BPlusTreeFile, ExtendibleHashingFile, LinearHashingFile])
+def test_duplicate_keys_do_not_fill_the_filter(tmp_path, index_class):
+    """Test: Repeated keys of a non-unique index are counted once and never force a rebuild."""
+    index = index_class(str(tmp_path / "idx.dat"), DataTypeTag.INT, 0, unique=False, bloom=True)
+    rebuilds = []
+    rebuild = index.rebuild_bloom_filter
+    index.rebuild_bloom_filter = lambda: rebuilds.append(1) or rebuild()
+    for position in range(2 * BloomFilter.DEFAULT_CAPACITY):
+        index.insert(position % 10, position)
+    assert rebuilds == []
+    assert index.bloom.get_item_count() == 10
@@ -0,0 +1,155 @@
+import random
+import pytest
+from models.enum.data_type_enum import DataTypeTag
+from storage.indexing.bplus_tree import BPlusTreeFile
+
+@pytest.fixture(params=[64, BPlusTreeFile.DEFAULT_PAGE_SIZE])
+def page_size(request):
+    """Fixture: tiny pages to force deep trees, and the default page size."""
+    return request.param
+
+@pytest.fixture
+def keys():
+    keys = list(range(1, 501))
+    random.Random(7).shuffle(keys)
+    return keys
+
+def test_insert_and_search(tmp_path, keys, page_size):
+    """Test: Every inserted key can be found, also the ones in the first leaf."""
+    btree = BPlusTreeFile(str(tmp_path / "idx.dat"), DataTypeTag.INT, page_size=page_size)
+    for key in keys:
+        btree.insert(key, key * 10)
+    assert all(btree.search(key) == key * 10 for key in keys)
+    assert btree.search(1000) is None
+
+@pytest.mark.parametrize("fill_factor", [0.5, 0.9, 1.0])
+def test_bulk_load(tmp_path, keys, page_size, fill_factor):
+    """Test: A bulk loaded tree answers point, full and range lookups."""
+    btree = BPlusTreeFile(str(tmp_path / "idx.dat"), DataTypeTag.INT, page_size=page_size)
+    assert btree.bulk_load(((key, key * 10) for key in keys), fill_factor=fill_factor) == len(keys)
+    assert all(btree.search(key) == key * 10 for key in keys)
+    assert [key for key, _ in btree.all_tuples()] == sorted(keys)
+    assert [key for key, _ in btree.all_tuples_range(100, 120)] == list(range(100, 121))
+
+def test_bulk_load_then_insert_and_delete(tmp_path, keys, page_size):
+    """Test: A bulk loaded tree keeps working with regular inserts and deletes."""
+    path = str(tmp_path / "idx.dat")
+    BPlusTreeFile(path, DataTypeTag.INT, page_size=page_size).bulk_load((key, key) for key in keys)
+    btree = BPlusTreeFile(path, DataTypeTag.INT)
+    for key in range(501, 601):
+        btree.insert(key, key)
+    for key in keys[:250]:
+        assert btree.delete(key) == key
+    assert all(btree.search(key) is None for key in keys[:250])
+    assert all(btree.search(key) == key for key in keys[250:] + list(range(501, 601)))
+
+def test_bulk_load_requires_empty_tree(tmp_path, page_size):
+    """Test: Bulk loading over existing entries is rejected."""
+    btree = BPlusTreeFile(str(tmp_path / "idx.dat"), DataTypeTag.INT, page_size=page_size)
+    btree.insert(1, 1)
+    with pytest.raises(ValueError):
+        btree.bulk_load([(2, 2)])
+
+def test_order_is_derived_from_page_size(tmp_path):
+    """Test: The fan-out fills a page and is read back from the header."""
+    path = str(tmp_path / "idx.dat")
+    btree = BPlusTreeFile(path, DataTypeTag.INT)
+    assert btree.order == BPlusTreeFile.compute_order(BPlusTreeFile.DEFAULT_PAGE_SIZE, btree.key_size)
+    assert btree.order > 400
+    btree.insert(1, 1)
+    reopened = BPlusTreeFile(path, DataTypeTag.INT, page_size=64)
+    assert (reopened.order, reopened.page_size) == (btree.order, btree.page_size)
+    assert reopened.search(1) == 1
+
+def test_cursor_walks_both_directions(tmp_path, keys, page_size):
+    """Test: The cursor seeks into the leaf chain and iterates forwards and backwards."""
+    btree = BPlusTreeFile(str(tmp_path / "idx.dat"), DataTypeTag.INT, page_size=page_size)
+    for key in keys:
+        btree.insert(key * 2, key)
+    cursor = btree.cursor()
+    cursor.seek(101)
+    assert [cursor.next()[0] for _ in range(3)] == [102, 104, 106]
+    assert [cursor.prev()[0] for _ in range(4)] == [106, 104, 102, 100]
+    cursor.seek_last()
+    assert cursor.next() is None
+    assert cursor.prev() == (1000, 500)
+    assert [key for key, _ in btree.iter_range(10, 20, reverse=True)] == [20, 18, 16, 14, 12, 10]
+    assert [key for key, _ in btree.iter_range(reverse=True)] == sorted((key * 2 for key in keys), reverse=True)
+
+def test_iter_range_is_lazy(tmp_path, keys, page_size):
+    """Test: Stopping early only reads the leaves that were needed."""
+    btree = BPlusTreeFile(str(tmp_path / "idx.dat"), DataTypeTag.INT, page_size=page_size)
+    btree.bulk_load((key, key) for key in keys)
+    reads = []
+    read_node = btree._read_node
+    btree._read_node = lambda node_id: reads.append(node_id) or read_node(node_id)
+    entries = btree.iter_range(1)
+    assert [next(entries)[0] for _ in range(3)] == [1, 2, 3]
+    assert len(reads) <= btree.height + 1
+
+def test_non_unique_posting_lists(tmp_path, page_size):
+    """Test: A non-unique index keeps every record id of a key, also past one posting page."""
+    path = str(tmp_path / "idx.dat")
+    btree = BPlusTreeFile(path, DataTypeTag.INT, page_size=page_size, unique=False)
+    hot = list(range(0, 3000, 3))
+    for rid in hot:
+        btree.insert(7, rid)
+    for key in set(range(1, 50)) - {7}:
+        btree.insert(key, 10000 + key)
+    btree.insert(7, 1)  # out of order, goes through the rewrite path
+    btree.insert(7, 1)
+    assert btree.search_all(7) == sorted(hot + [1])
+    assert btree.record_count == len(hot) + 1 + 48
+    assert btree.search(8) == 10008
+
+    reopened = BPlusTreeFile(path, DataTypeTag.INT)
+    assert not reopened.unique
+    assert [rid for key, rid in reopened.iter_range(7, 7)] == sorted(hot + [1])
+    assert [rid for key, rid in reopened.iter_range(7, 7, reverse=True)][:2] == [hot[-1], hot[-2]]
+
+    assert reopened.delete(7, 4) is None
+    assert reopened.delete(7, 3) == 3
+    assert 3 not in reopened.search_all(7)
+    for rid in reopened.search_all(7)[1:]:
+        reopened.delete(7, rid)
+    assert reopened.search_all(7) == [0]
+    assert reopened.delete(7, 0) == 0
+    assert reopened.search_all(7) == []
+
+def test_non_unique_bulk_load(tmp_path, page_size):
+    """Test: Bulk loading groups duplicate keys into posting lists."""
+    btree = BPlusTreeFile(str(tmp_path / "idx.dat"), DataTypeTag.INT, page_size=page_size, unique=False)
+    pairs = [(rid % 10 + 1, rid) for rid in range(1000)]
+    assert btree.bulk_load(reversed(pairs)) == 1000
+    assert btree.search_all(3) == list(range(2, 1000, 10))
+    assert btree.all_tuples() == sorted(pairs)
+    btree.insert(3, 5000)
+    assert btree.search_all(3)[-1] == 5000
+
+def test_posting_pages_are_reused(tmp_path, page_size):
+    """Test: Posting pages freed by deletes are reused, so churn does not grow the file."""
+    btree = BPlusTreeFile(str(tmp_path / "idx.dat"), DataTypeTag.INT, page_size=page_size, unique=False)
+    for key in range(1, 20):
+        btree.insert(key, key)
+
+    def churn(round_no):
+        base = round_no * 10000
+        for key in (3, 11):
+            for rid in range(base, base + 400):
+                btree.insert(key, rid)
+        for rid in range(base, base + 400):
+            btree.delete(3, rid)  # the list shrinks back to one id
+        btree.delete(11)  # the whole key goes with its posting pages
+        btree.insert(11, 11)
+
+    churn(1)
+    pages = btree.node_count
+    for round_no in range(2, 8):
+        churn(round_no)
+    assert btree.node_count == pages
+    assert btree.search_all(3) == [3]
+    assert btree.search_all(11) == [11]
+    assert btree.all_tuples() == [(key, key) for key in range(1, 20)]
+
+    reopened = BPlusTreeFile(str(tmp_path / "idx.dat"), DataTypeTag.INT)
+    assert reopened.free_page == btree.free_page
@@ -0,0 +1,91 @@
+import threading
+import time
+import pytest
+from storage.disk.buffer_pool import BufferPool, configure_buffer_pool, get_buffer_pool, DEFAULT_POOL_SIZE
+from storage.disk.paged_file import open_paged_file, HEADER_PAGE
+
+@pytest.fixture
+def pool():
+    """Fixture: small shared pool (four 64 byte pages), restored afterwards."""
+    yield configure_buffer_pool(256)
+    configure_buffer_pool(DEFAULT_POOL_SIZE)
+
+@pytest.fixture
+def paged_file(pool, tmp_path):
+    return open_paged_file(tmp_path / "pages.dat", page_size=64, header_size=16)
+
+def test_repeated_reads_hit_the_pool(pool, paged_file):
+    """Test: Only the first read of a page goes to disk."""
+    paged_file.write_page(0, b"a" * 64)
+    for _ in range(10):
+        assert paged_file.read_page(0) == b"a" * 64
+    assert pool.misses == 0
+    assert pool.hits == 10
+
+def test_eviction_writes_back_dirty_pages(pool, paged_file, tmp_path):
+    """Test: Evicted dirty pages are written to the file and can be read again."""
+    for page_no in range(8):
+        paged_file.write_page(page_no, bytes([page_no]) * 64)
+    assert pool.used <= pool.capacity
+    assert pool.evictions > 0
+    for page_no in range(8):
+        assert paged_file.read_page(page_no) == bytes([page_no]) * 64
+
+def test_pinned_pages_are_not_evicted(pool, paged_file):
+    """Test: A pinned page stays resident while others are evicted around it."""
+    paged_file.write_page(0, b"x" * 64)
+    with paged_file.pin(0) as frame:
+        for page_no in range(1, 8):
+            paged_file.write_page(page_no, b"y" * 64)
+        assert (paged_file.path, 0) in pool.frames
+        assert frame.data == bytearray(b"x" * 64)
+
+def test_all_pages_pinned_raises():
+    """Test: The pool refuses to grow past its budget when nothing can be evicted."""
+    pool = BufferPool(capacity=64)
+
+    class FakeFile:
+        path = "fake"
+        def read_raw(self, page_no): return bytes(64)
+
+    pool.fetch_page(FakeFile(), 0)
+    with pytest.raises(RuntimeError):
+        pool.fetch_page(FakeFile(), 1)
+
+def test_header_and_flush(pool, paged_file, tmp_path):
+    """Test: Header and pages reach the disk after a flush."""
+    paged_file.write_header(b"h" * 16)
+    paged_file.write_page(1, b"p" * 64)
+    paged_file.flush()
+    data = (tmp_path / "pages.dat").read_bytes()
+    assert data[:16] == b"h" * 16
+    assert data[16 + 64:16 + 128] == b"p" * 64
+    assert paged_file.read_page(HEADER_PAGE) == b"h" * 16
+    assert get_buffer_pool().get_stats()["dirty"] == 0
+
+def test_paged_file_is_shared_and_preallocated(pool, tmp_path):
+    """Test: One descriptor per path; the file grows in whole extents."""
+    path = tmp_path / "extents.dat"
+    first = open_paged_file(path, page_size=64, header_size=16, extent_size=1024)
+    assert open_paged_file(path, page_size=64, header_size=16, extent_size=1024) is first
+    first.write_page(0, b"z" * 64)
+    first.flush()
+    assert path.stat().st_size == 1024
+    assert first.read_raw(0) == b"z" * 64
+
+def test_truncate_waits_for_mapped_views(pool, paged_file, tmp_path):
+    """Test: A truncate waits until the views of the memory map are released."""
+    for page_no in range(8):
+        paged_file.write_page(page_no, bytes([page_no]) * 64)
+    pool.flush_file(paged_file)
+    pool.discard_file(paged_file)
+    with paged_file.view(5) as data:
+        thread = threading.Thread(target=paged_file.truncate)
+        thread.start()
+        time.sleep(0.05)
+        # el fichero no se corta mientras la vista sigue en uso
+        assert thread.is_alive()
+        assert bytes(data) == bytes([5]) * 64
+    thread.join(5)
+    assert not thread.is_alive()
+    assert (tmp_path / "pages.dat").stat().st_size == 0
@@ -0,0 +1,67 @@
+import threading
+import time
+from storage.disk.buffer_pool import get_buffer_pool
+from storage.disk.checkpointer import Checkpointer
+from storage.disk.paged_file import open_paged_file, open_write_ahead_log
+
+def test_checkpoint_writes_back_and_cuts_the_log(tmp_path):
+    """Test: A checkpoint writes the logged pages back and replay starts after it."""
+    pool = get_buffer_pool()
+    wal = open_write_ahead_log(tmp_path / "wal")
+    pool.flush_all()
+    paged_file = open_paged_file(tmp_path / "data.dat", 64)
+    paged_file.write_page(0, b"a" * 64)
+    paged_file.write_page(1, b"b" * 64)
+    pool.log_dirty_pages()
+
+    checkpointer = Checkpointer(batch_pages=1, batch_delay=0)
+    redo_lsn = checkpointer.checkpoint()
+    with open(tmp_path / "data.dat", "rb") as data:
+        assert data.read() == b"a" * 64 + b"b" * 64
+    assert wal.read_checkpoint() == redo_lsn
+    assert [first for first, _ in wal.segments()] == [redo_lsn]
+    stats = checkpointer.get_stats()
+    assert (stats["last_pages"], stats["last_bytes"]) == (2, 128)
+
+    paged_file.write_page(0, b"c" * 64)
+    pool.log_dirty_pages()
+    assert [(lsn, data) for lsn, _, _, _, data in wal.records(wal.checkpoint_lsn)] == [(redo_lsn, b"c" * 64)]
+
+def test_background_checkpoints(tmp_path):
+    """Test: The background thread checkpoints on its own and once more on stop."""
+    open_write_ahead_log(tmp_path / "wal")
+    checkpointer = Checkpointer(interval=0.01)
+    checkpointer.start()
+    deadline = time.time() + 5
+    while checkpointer.checkpoints == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    checkpointer.stop()
+    assert checkpointer.checkpoints > 0
+    assert checkpointer.thread is None
+
+def test_checkpoint_waits_for_pinned_pages(tmp_path):
+    """Test: A checkpoint during a statement does not write or log a page that is half changed."""
+    pool = get_buffer_pool()
+    wal = open_write_ahead_log(tmp_path / "wal")
+    pool.flush_all()
+    paged_file = open_paged_file(tmp_path / "data.dat", 64)
+    paged_file.write_page(0, b"a" * 64)
+    pool.log_dirty_pages()
+
+    # la sentencia cambia la página en su sitio mientras la tiene fijada
+    checkpointer = Checkpointer(batch_pages=1, batch_delay=0)
+    with paged_file.pin(0) as frame:
+        frame.data[:32] = b"b" * 32
+        frame.mark_dirty()
+        thread = threading.Thread(target=checkpointer.checkpoint)
+        thread.start()
+        time.sleep(0.05)
+        assert thread.is_alive()
+        with open(tmp_path / "data.dat", "rb") as data:
+            assert data.read() == b""
+        frame.data[32:] = b"b" * 32
+    thread.join(5)
+    assert not thread.is_alive()
+    with open(tmp_path / "data.dat", "rb") as data:
+        assert data.read() == b"b" * 64
+    assert all(data == b"b" * 64 for _, _, _, _, data in wal.records(wal.checkpoint_lsn))
@@ -3,6 +3,8 @@ import shutil
 import pytest
 from catalog.catalog_manager import CatalogManager
 from engine.executor import PKAdmin
+from engine.operators.delete import Delete
+from query.parser_sql import parser_sql
 
 @pytest.fixture
 def admin(tmp_path):
@@ -44,3 +46,15 @@ def test_delete_with_hash_index(admin):
     # Ya nada queda
     res3 = admin.execute("DELETE FROM testdb.public.items WHERE descr = 'Gadget';")
     assert res3 == "0 rows deleted"
+
+def test_delete_in_batches_updates_index(admin):
+    admin.execute("CREATE TABLE testdb.public.logs (id INT, level VARCHAR(10));")
+    values = ", ".join(f"({i}, '{'error' if i % 3 == 0 else 'info'}')" for i in range(50))
+    admin.execute(f"INSERT INTO testdb.public.logs (id, level) VALUES {values};")
+    admin.execute("CREATE INDEX idx_id ON testdb.public.logs USING btree(id);")
+    # lotes de 4 filas
+    delete = Delete(admin.catalog, batch_size=4)
+    res = delete.execute(parser_sql("DELETE FROM testdb.public.logs WHERE level = 'error';")[0])
+    assert res == "17 rows deleted"
+    assert admin.execute("SELECT * FROM testdb.public.logs WHERE id = 9;") is None
+    assert admin.execute("SELECT * FROM testdb.public.logs WHERE id = 10;") == {"id": 10, "level": "info"}
@@ -0,0 +1,65 @@
+import struct
+import uuid
+from datetime import date, time, datetime
+import pytest
+from catalog.table import Table
+from catalog.column import Column
+from models.enum.data_type_enum import DataTypeTag
+from storage.disk.fixed_length import FixedLengthRecord, compile_record_codec
+
+def make_table(*columns) -> Table:
+    return Table(tab_id=1, tab_name="t", tab_namespace=1, tab_tuples=0, tab_pages=1, tab_page_size=4096,
+                 tab_columns=[Column(name, type_id.value, length, False, False) for name, type_id, length in columns])
+
+@pytest.fixture
+def record():
+    table = make_table(("id", DataTypeTag.INT, 4), ("name", DataTypeTag.VARCHAR, 8), ("big", DataTypeTag.BIGINT, 8),
+                       ("ok", DataTypeTag.BOOLEAN, 1), ("key", DataTypeTag.UUID, 16), ("day", DataTypeTag.DATE, 4),
+                       ("at", DataTypeTag.TIME, 8), ("ts", DataTypeTag.TIMESTAMP, 8), ("score", DataTypeTag.DOUBLE, 8))
+    record = FixedLengthRecord(table)
+    record.set_format_str()
+    return record
+
+def test_round_trip(record):
+    """Test: Every supported type comes back from pack and unpack."""
+    key = uuid.uuid4()
+    row = (7, "ana", 2 ** 40, True, str(key), date(2024, 5, 1), time(13, 4, 5), datetime(2024, 5, 1, 8, 30), 1.5)
+    assert record.unpacking(record.packing(row)) == (row, True)
+    assert record.unpacking(record.packing(row, is_active=False))[1] is False
+
+def test_layout_matches_format_string(record):
+    """Test: The compiled codec writes the same bytes as the plain format string."""
+    assert record.get_format_str() == "<i8sq?16sIIQd?"
+    data = record.packing((1, "bob", 2, False, None, None, None, None, 2.5))
+    assert data == struct.pack(record.get_format_str(), 1, b"bob", 2, False, bytes(16), 0, 0, 0, 2.5, True)
+    assert record.get_format_size() == len(data)
+
+def test_pack_into_and_unpack_from(record):
+    """Test: Rows can be written into and read from a larger buffer in place."""
+    buffer = bytearray(10 + record.get_format_size())
+    row = (3, "x" * 20, 4, True, None, None, None, None, 0.0)
+    record.packing_into(buffer, 10, row)
+    data_tuple, is_active = record.unpacking_from(buffer, 10)
+    assert data_tuple[:2] == (3, "x" * 8) and is_active
+
+def test_codec_is_shared_per_layout():
+    """Test: Tables with the same column types share one compiled codec."""
+    first = FixedLengthRecord(make_table(("a", DataTypeTag.INT, 4)))
+    second = FixedLengthRecord(make_table(("b", DataTypeTag.INT, 4)))
+    first.set_format_str()
+    second.set_format_str()
+    assert first.codec is second.codec
+    with pytest.raises(ValueError):
+        compile_record_codec(((DataTypeTag.JSON.value, 0),))
+
+def test_projection_decodes_only_selected_columns(record):
+    """Test: A projection reads columns from their offsets in the requested order."""
+    row = (9, "zoe", 5, True, None, date(2020, 1, 2), None, None, 4.25)
+    data = record.packing(row, is_active=False)
+    projection = record.codec.projection((8, 1, 5))
+    assert projection.read(data) == (4.25, "zoe", date(2020, 1, 2))
+    assert not projection.is_active(data)
+    assert record.codec.projection((8, 1, 5)) is projection
+    # un solo struct con bytes de relleno, también con columnas repetidas
+    assert projection.struct.size == record.codec.size
+    assert record.codec.projection((1, 0, 1)).unpack_from(data) == (("zoe", 9, "zoe"), False)
@@ -0,0 +1,92 @@
+import random
+import pytest
+from models.enum.data_type_enum import DataTypeTag
+from storage.indexing.hashing import ExtendibleHashingFile
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "hash.dat")
+
+def test_insert_search_delete(index_path):
+    """Test: Keys survive directory doublings, deletes and a reopen."""
+    keys = list(range(2000))
+    random.Random(3).shuffle(keys)
+    hash_file = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0)
+    for key in keys:
+        hash_file.insert(key, key * 2)
+    assert hash_file.global_depth > 4
+    for key in keys[:500]:
+        assert hash_file.delete(key)
+    reopened = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0)
+    assert reopened.directory == hash_file.directory
+    assert all(reopened.search(key) is None for key in keys[:500])
+    assert all(reopened.search(key) == key * 2 for key in keys[500:])
+
+def test_directory_growth_does_not_move_buckets(index_path):
+    """Test: Doubling the directory leaves bucket pages where they were."""
+    hash_file = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0)
+    for key in range(200):
+        hash_file.insert(key, key)
+    bucket = hash_file.file.read_page(0)
+    page_count = hash_file.file.get_page_count()
+    hash_file._expand_directory()
+    assert hash_file.file.read_page(0) == bucket
+    assert hash_file.file.get_page_count() == page_count
+    assert all(hash_file.search(key) == key for key in range(200))
+
+def test_handles_share_directory_changes(index_path):
+    """Test: A second handle picks up splits made through the first one."""
+    first = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0)
+    second = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0)
+    for key in range(300):
+        first.insert(key, key)
+    assert all(second.search(key) == key for key in range(300))
+
+def test_duplicate_keys_use_overflow_pages(index_path):
+    """Test: Many equal keys grow an overflow chain instead of the directory."""
+    hash_file = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0, unique=False)
+    for rid in range(3000):
+        hash_file.insert(rid % 3, rid)
+    assert hash_file.global_depth <= 2
+    assert sorted(hash_file.search_all(1)) == list(range(1, 3000, 3))
+    assert hash_file.delete(1, 4)
+    assert not hash_file.delete(1, 4)
+    assert 4 not in hash_file.search_all(1)
+    assert hash_file.delete(2)
+    assert hash_file.search_all(2) == []
+    reopened = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0)
+    assert not reopened.unique
+    assert len(reopened.search_all(0)) == 1000
+
+def test_mixed_hot_and_distinct_keys(index_path):
+    """Test: Distinct keys still split buckets next to a hot key."""
+    hash_file = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0, unique=False)
+    for rid in range(2000):
+        hash_file.insert(7 if rid % 2 else rid, rid)
+    assert len(hash_file.search_all(7)) == 1000
+    assert all(hash_file.search_all(rid) == [rid] for rid in range(0, 2000, 2) if rid != 7)
+    assert hash_file.global_depth <= ExtendibleHashingFile.MAX_LOCAL_DEPTH
+
+def test_split_pages_are_not_leaked(index_path):
+    """Test: Chain pages left over by splits are reused, every page is in a bucket or free."""
+    hash_file = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0, bucket_size=4, unique=False)
+    rng = random.Random(5)
+    # a few hot keys build overflow chains that later splits pack into fewer pages
+    for rid in range(4000):
+        key = rng.choice([1, 2, 3, 4]) if rid % 2 else rng.randrange(100000)
+        hash_file.insert(key, rid)
+
+    reachable = set()
+    for bucket_id in set(hash_file.directory):
+        reachable.update(hash_file._chain_page_ids(bucket_id))
+    free = []
+    page_id = hash_file.free_page
+    while page_id != -1:
+        free.append(page_id)
+        page_id = hash_file._read_bucket(page_id).next_overflow
+    assert reachable.isdisjoint(free)
+    assert len(reachable) + len(free) == hash_file.bucket_count
+    assert sorted(rid for key in (1, 2, 3, 4) for rid in hash_file.search_all(key)) == list(range(1, 4000, 2))
+
+    reopened = ExtendibleHashingFile(index_path, DataTypeTag.INT, 0)
+    assert reopened.free_page == hash_file.free_page
@@ -0,0 +1,149 @@
+import os
+import pytest
+from catalog.table import Table
+from catalog.column import Column
+from models.enum.data_type_enum import DataTypeTag
+from storage.disk.buffer_pool import get_buffer_pool
+from storage.disk.page import SlottedPage
+from models.enum.durability_enum import Durability
+from storage.indexing.heap import HeapFile
+
+@pytest.fixture
+def table():
+    return Table(
+        tab_id=1,
+        tab_name="users",
+        tab_namespace=1,
+        tab_tuples=0,
+        tab_pages=1,
+        tab_page_size=256,
+        tab_columns=[
+            Column("id", DataTypeTag.INT.value, 4, False, False),
+            Column("name", DataTypeTag.VARCHAR.value, 20, False, False),
+        ],
+    )
+
+@pytest.fixture
+def heap(table, tmp_path):
+    with HeapFile(table, tmp_path / "data.dat") as heap:
+        yield heap
+
+def test_slotted_page_insert_and_read():
+    """Test: Records are stored in slots and free space shrinks."""
+    page = SlottedPage.empty(128)
+    free = page.get_free_space()
+    slot = page.insert(b"abcd")
+    assert slot == 0
+    assert page.read(0) == b"abcd"
+    assert page.get_free_space() == free - 4 - SlottedPage.SLOT.size
+    assert page.read(1) is None
+
+def test_heap_file_is_page_aligned(heap, table, tmp_path):
+    """Test: data.dat grows in whole pages and rids map to (page, slot)."""
+    rids = [heap.insert((i, f"user{i}")) for i in range(20)]
+    heap.finalize()
+    assert os.path.getsize(tmp_path / "data.dat") % table.get_tab_page_size() == 0
+    assert heap.get_page_count() > 1
+    assert heap.split_rid(rids[-1]) == (heap.get_page_count() - 1, (len(rids) - 1) % heap.slots_per_page)
+    assert heap.read_record_json(rids[7]) == {"id": 7, "name": "user7"}
+
+def test_heap_file_delete_and_scan(heap):
+    """Test: Deleted records are tombstoned and reported by scan."""
+    rids = [heap.insert((i, f"user{i}")) for i in range(5)]
+    heap.delete(rids[2])
+    assert heap.read_record_json(rids[2]) is None
+    active = [row[0] for _, row, is_active in heap.scan() if is_active]
+    assert active == [0, 1, 3, 4]
+
+def test_heap_file_reopen(table, tmp_path):
+    """Test: Records survive closing and reopening the heap."""
+    with HeapFile(table, tmp_path / "data.dat") as heap:
+        rid = heap.insert((42, "answer"))
+    with HeapFile(table, tmp_path / "data.dat") as heap:
+        assert heap.read_record_json(rid) == {"id": 42, "name": "answer"}
+
+def test_read_projected_columns(heap):
+    """Test: Reads with a column list return only those columns and skip deleted rows."""
+    rids = [heap.insert((i, f"user{i}")) for i in range(5)]
+    heap.delete(rids[1])
+    assert heap.read_record_json(rids[0], ["name"]) == {"name": "user0"}
+    assert list(heap.read_all_records(rids[:3], ["NAME", "id"])) == [
+        {"NAME": "user0", "id": 0}, None, {"NAME": "user2", "id": 2}]
+    with pytest.raises(ValueError):
+        heap.read_record_json(rids[0], ["email"])
+
+def test_mmap_reads_bypass_the_pool(table, tmp_path):
+    """Test: Uncached pages are read from the file map, cached or unflushed ones from the pool."""
+    heap = HeapFile(table, tmp_path / "data.dat", use_mmap=True)
+    rids = [heap.insert((i, f"user{i}")) for i in range(40)]
+    assert heap.read_record(rids[-1]) == ((39, "user39"), True)  # still only in the pool
+    heap.file.flush()
+    get_buffer_pool().discard_file(heap.file)
+    misses = get_buffer_pool().misses
+    assert [heap.read_record(rid)[0][0] for rid in rids] == list(range(40))
+    assert get_buffer_pool().misses == misses
+    mapped = len(heap.file.map)
+    rids.append(heap.insert((40, "late")))
+    heap.file.flush()
+    get_buffer_pool().discard_file(heap.file)
+    assert heap.read_record_json(rids[-1], ["name"]) == {"name": "late"}
+    assert len(heap.file.map) > mapped
+
+def test_insert_many_fills_pages(heap):
+    """Test: A batch continues the last page, spills into new ones and matches scan order."""
+    first = heap.insert((0, "first"))
+    rids = heap.insert_many([(i, f"user{i}") for i in range(1, 30)])
+    assert len(rids) == 29 and heap.get_page_count() > 1
+    assert [(rid, row) for rid, row, _ in heap.scan()] == [(first, (0, "first"))] + [
+        (rid, (i, f"user{i}")) for i, rid in enumerate(rids, start=1)]
+
+def test_insert_many_bad_row_changes_nothing(heap):
+    """Test: A row that cannot be packed fails the batch before any page is touched."""
+    heap.insert((1, "a"))
+    with pytest.raises(ValueError):
+        heap.insert_many([(2, "b"), ("x", "c")])
+    assert [row for _, row, _ in heap.scan()] == [(1, "a")]
+
+def test_batch_durability_writes_back(table, tmp_path):
+    """Test: In batch mode the rows are in the file as soon as insert_many returns."""
+    path = tmp_path / "data.dat"
+    heap = HeapFile(table, path, durability=Durability.BATCH)
+    heap.insert_many([(1, "a"), (2, "b")])
+    assert os.path.getsize(path) == table.get_tab_page_size()
+    assert not any(frame.dirty for frame in get_buffer_pool().frames.values() if frame.file is heap.file)
+
+def test_deleted_slots_are_reused(heap):
+    """Test: Inserts after deletes fill the freed slots instead of growing the file."""
+    rids = heap.insert_many([(i, f"user{i}") for i in range(20)])
+    pages = heap.get_page_count()
+    for _ in range(3):
+        for rid in rids[::2]:
+            heap.delete(rid)
+        reused = heap.insert_many([(i, f"new{i}") for i in range(10)])
+        assert sorted(reused) == sorted(rids[::2])
+    assert heap.get_page_count() == pages
+    assert sum(1 for _, _, is_active in heap.scan() if is_active) == 20
+
+def test_free_space_map_survives_reopen(table, tmp_path):
+    """Test: The .fsm sidecar keeps the free slots and is rebuilt when missing."""
+    path = tmp_path / "data.dat"
+    with HeapFile(table, path) as heap:
+        rids = heap.insert_many([(i, f"user{i}") for i in range(10)])
+        heap.delete(rids[3])
+        heap.delete(rids[3])
+    with HeapFile(table, path) as heap:
+        assert heap.fsm.get(heap.split_rid(rids[3])[0]) == 1
+    get_buffer_pool().flush_all()
+    os.remove(str(path) + ".fsm")
+    with HeapFile(table, path) as heap:
+        assert heap.insert((99, "again")) == rids[3]
+
+def test_delete_many_flips_only_the_active_byte(heap):
+    """Test: delete_many tombstones each record once and leaves its bytes intact."""
+    rids = heap.insert_many([(i, f"user{i}") for i in range(30)])
+    before = heap.read_at(rids[4])
+    assert heap.delete_many([rids[20], rids[4], rids[4], rids[11]]) == 3
+    assert heap.delete_many([rids[4]]) == 0
+    assert heap.read_at(rids[4])[:-1] == before[:-1]
+    assert heap.read_record(rids[4]) == ((4, "user4"), False)
+    assert sum(1 for _, _, is_active in heap.scan() if is_active) == 27
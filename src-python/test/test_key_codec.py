@@ -0,0 +1,45 @@
+import pytest
+from datetime import date, datetime, time
+from models.enum.data_type_enum import DataTypeTag
+from storage.disk.key_codec import KeyCodec
+from storage.indexing.bplus_tree import BPlusTreeFile
+from storage.indexing.hashing import ExtendibleHashingFile
+
+@pytest.mark.parametrize("data_type, max_len, values", [
+    (DataTypeTag.SMALLINT, 0, [-32768, -5, -1, 0, 1, 7, 32767]),
+    (DataTypeTag.INT, 0, [-2**31, -1000, -1, 0, 1, 2**31 - 1]),
+    (DataTypeTag.BIGINT, 0, [-2**63, -1, 0, 2**40, 2**63 - 1]),
+    (DataTypeTag.DOUBLE, 0, [float('-inf'), -1e300, -2.5, -1e-300, 0.0, 1e-300, 3.75, 1e300, float('inf')]),
+    (DataTypeTag.VARCHAR, 8, ["", "a", "ab", "abc", "b", "zz", "ñ"]),
+    (DataTypeTag.DATE, 0, [date(1999, 12, 31), date(2000, 1, 1), date(2024, 2, 29)]),
+    (DataTypeTag.TIME, 0, [time(0, 0), time(9, 30, 15), time(23, 59, 59, 999999)]),
+    (DataTypeTag.TIMESTAMP, 0, [datetime(1960, 1, 1), datetime(1970, 1, 1), datetime(2024, 5, 1, 12, 30)]),
+])
+def test_encoding_preserves_order(data_type, max_len, values):
+    """Test: Encoded keys sort like the values, round-trip, and NULL sorts first."""
+    codec = KeyCodec(data_type, max_len)
+    encoded = [codec.encode(value) for value in values]
+    assert all(len(key) == codec.size for key in encoded)
+    assert sorted(encoded) == encoded
+    assert [codec.decode(key) for key in encoded] == values
+    assert codec.encode(None) < encoded[0]
+    assert codec.decode(codec.encode(None)) is None
+
+def test_negative_zero_is_normalized():
+    """Test: -0.0 and 0.0 encode to the same key."""
+    codec = KeyCodec(DataTypeTag.DOUBLE)
+    assert codec.encode(-0.0) == codec.encode(0.0)
+
+def test_zero_and_empty_keys_are_indexed(tmp_path):
+    """Test: 0 and the empty string are regular keys, not missing values."""
+    btree = BPlusTreeFile(str(tmp_path / "btree.dat"), DataTypeTag.INT)
+    for key in (-1, 0, 1):
+        btree.insert(key, key + 10)
+    assert btree.search(0) == 10
+    assert btree.all_tuples() == [(-1, 9), (0, 10), (1, 11)]
+
+    hash_file = ExtendibleHashingFile(str(tmp_path / "hash.dat"), DataTypeTag.VARCHAR, 8)
+    hash_file.insert("", 1)
+    hash_file.insert("x", 2)
+    assert hash_file.search("") == 1
+    assert hash_file.search("x") == 2
@@ -0,0 +1,57 @@
+import random
+import pytest
+from models.enum.data_type_enum import DataTypeTag
+from storage.indexing.linear_hashing import LinearHashingFile
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "lhash.dat")
+
+def test_insert_search_delete(index_path):
+    """Test: Keys survive bucket splits, deletes and a reopen."""
+    keys = list(range(2000))
+    random.Random(5).shuffle(keys)
+    hash_file = LinearHashingFile(index_path, DataTypeTag.INT, 0)
+    for key in keys:
+        hash_file.insert(key, key * 2)
+    assert hash_file.level > 2
+    assert hash_file.get_load_factor() <= hash_file.max_load_factor
+    for key in keys[:500]:
+        assert hash_file.delete(key)
+    reopened = LinearHashingFile(index_path, DataTypeTag.INT, 0)
+    assert (reopened.bucket_count, reopened.next_split) == (hash_file.bucket_count, hash_file.next_split)
+    assert all(reopened.search(key) is None for key in keys[:500])
+    assert all(reopened.search(key) == key * 2 for key in keys[500:])
+
+def test_one_split_per_insert(index_path):
+    """Test: The file grows by at most one bucket on each insert."""
+    hash_file = LinearHashingFile(index_path, DataTypeTag.INT, 0)
+    for key in range(500):
+        before = hash_file.bucket_count
+        hash_file.insert(key, key)
+        assert hash_file.bucket_count - before <= 1
+    assert hash_file.file.get_page_count() == hash_file.bucket_count
+
+def test_duplicate_keys_reuse_overflow_pages(index_path):
+    """Test: Hot keys live in overflow chains whose pages are recycled on splits."""
+    hash_file = LinearHashingFile(index_path, DataTypeTag.INT, 0, unique=False)
+    for rid in range(3000):
+        hash_file.insert(rid % 3, rid)
+    assert sorted(hash_file.search_all(1)) == list(range(1, 3000, 3))
+    assert hash_file.overflow_count < 3000 // hash_file.bucket_size
+    assert hash_file.delete(1, 4)
+    assert not hash_file.delete(1, 4)
+    assert hash_file.delete(2)
+    assert hash_file.search_all(2) == []
+    reopened = LinearHashingFile(index_path, DataTypeTag.INT, 0)
+    assert not reopened.unique
+    assert len(reopened.search_all(0)) == 1000
+    assert reopened.record_count == 1999
+
+def test_text_keys(index_path):
+    """Test: Text keys are hashed on their encoded form."""
+    hash_file = LinearHashingFile(index_path, DataTypeTag.VARCHAR, 12)
+    for i in range(300):
+        hash_file.insert(f"name-{i}", i)
+    assert all(hash_file.search(f"name-{i}") == i for i in range(300))
+    assert hash_file.search("missing") is None
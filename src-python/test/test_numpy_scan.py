@@ -0,0 +1,77 @@
+import threading
+import time
+import pytest
+from catalog.table import Table
+from catalog.column import Column
+from models.enum.data_type_enum import DataTypeTag
+from storage.disk.buffer_pool import get_buffer_pool
+from storage.indexing.heap import HeapFile
+
+np = pytest.importorskip("numpy")
+from storage.indexing.numpy_scan import HeapArrayScan
+
+@pytest.fixture
+def heap(tmp_path):
+    table = Table(tab_id=1, tab_name="t", tab_namespace=1, tab_tuples=0, tab_pages=1, tab_page_size=256,
+                  tab_columns=[Column("id", DataTypeTag.INT.value, 4, False, False),
+                               Column("name", DataTypeTag.VARCHAR.value, 10, False, False),
+                               Column("score", DataTypeTag.DOUBLE.value, 8, False, False)])
+    with HeapFile(table, tmp_path / "data.dat") as heap:
+        yield heap
+
+def test_structured_scan_matches_row_scan(heap):
+    """Test: The array scan sees the same active rows as HeapFile.scan."""
+    rids = [heap.insert((i, f"n{i % 7}", i * 0.5)) for i in range(200)]
+    for rid in rids[::3]:
+        heap.delete(rid)
+    with HeapArrayScan(heap) as scan:
+        record_ids, rows = scan.records()
+    expected = [(rid, row) for rid, row, active in heap.scan() if active]
+    assert record_ids.tolist() == [rid for rid, _ in expected]
+    assert rows["id"].tolist() == [row[0] for _, row in expected]
+    assert rows["name"].tolist() == [row[1].encode() for _, row in expected]
+    assert rows["score"][rows["id"] > 100].sum() == sum(row[2] for _, row in expected if row[0] > 100)
+
+def test_empty_heap(heap):
+    """Test: An empty heap gives empty arrays."""
+    with HeapArrayScan(heap) as scan:
+        record_ids, rows = scan.records()
+    assert len(record_ids) == len(rows) == 0
+
+def test_columns_are_views_of_the_file(heap):
+    """Test: Las columnas son vistas del fichero mapeado, sin copiar los registros."""
+    for i in range(100):
+        heap.insert((i, "x", float(i)))
+    with HeapArrayScan(heap) as scan:
+        column = scan.column("id")
+        assert np.shares_memory(column, scan.pages)
+        assert column.shape == (heap.get_page_count(), heap.slots_per_page)
+        # la máscara deja fuera los huecos sin registro de la última página
+        assert scan.select("id", scan.active).tolist() == list(range(100))
+
+def test_dirty_pages_are_laid_over_the_file(heap):
+    """Test: Pages changed in the pool are seen without writing them back."""
+    rids = [heap.insert((i, "x", float(i))) for i in range(200)]
+    pool = get_buffer_pool()
+    pool.flush_all()
+    for rid in rids[:50]:
+        heap.delete(rid)
+    writes = pool.writes
+    with HeapArrayScan(heap) as scan:
+        assert pool.writes == writes
+        assert scan.select("id", scan.active).tolist() == list(range(50, 200))
+
+def test_shrink_waits_for_the_scan(heap):
+    """Test: The heap file is not cut while an array scan still maps it."""
+    for i in range(100):
+        heap.insert((i, "x", float(i)))
+    get_buffer_pool().flush_all()
+    with HeapArrayScan(heap) as scan:
+        thread = threading.Thread(target=heap.file.shrink, args=(0,))
+        thread.start()
+        time.sleep(0.05)
+        assert thread.is_alive()
+        assert int(scan.column("id")[-1][scan.active[-1]].sum()) > 0
+    thread.join(5)
+    assert not thread.is_alive()
+    assert heap.get_page_count() == 0
@@ -0,0 +1,145 @@
+# test_pipeline.py
+import shutil
+import pytest
+from catalog.catalog_manager import CatalogManager
+from engine.executor import PKAdmin
+from engine.operators.select import Select
+from engine.pipeline import Operator, Limit, Sort, SortKey, Aggregate, AggregateCall, ArrayScan, ArrayAggregate, SeqScan
+from sqlglot import parse_one
+from storage.disk.buffer_pool import get_buffer_pool
+
+class Rows(Operator):
+    # fuente en memoria que cuenta las filas pedidas
+    def __init__(self, rows):
+        self.rows = rows
+        self.pulled = 0
+        self.closed = False
+
+    def open(self):
+        self.position = 0
+
+    def next(self):
+        if self.position == len(self.rows):
+            return None
+        self.position += 1
+        self.pulled += 1
+        return self.rows[self.position - 1]
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def admin(tmp_path):
+    cm    = CatalogManager(tmp_path)
+    admin = PKAdmin(catalog=cm)
+    admin.execute("CREATE DATABASE testdb;")
+    admin.execute("CREATE SCHEMA testdb.public;")
+    admin.execute("CREATE TABLE testdb.public.emp (id INT, dept VARCHAR(10), salary INT);")
+    values = ", ".join(f"({i}, 'd{i % 3}', {i * 10})" for i in range(30))
+    admin.execute(f"INSERT INTO testdb.public.emp (id, dept, salary) VALUES {values};")
+    yield admin
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+def test_limit_stops_pulling_rows():
+    """Test: Limit no pide más filas al hijo una vez alcanzado el límite"""
+    source = Rows([{"a": i} for i in range(100)])
+    assert list(Limit(source, offset=2, limit=3)) == [{"a": 2}, {"a": 3}, {"a": 4}]
+    assert source.pulled == 5
+    assert source.closed
+
+def test_sort_merges_runs_from_disk():
+    """Test: Sort ordena por varias claves en runs que se mezclan desde disco"""
+    rows = [{"a": i % 7, "b": i} for i in range(50)] + [{"a": None, "b": -1}]
+    keys = [SortKey("a", descending=True, nulls_first=True), SortKey("b")]
+    result = list(Sort(Rows(rows), keys, run_rows=8))
+    assert result[0] == {"a": None, "b": -1}
+    expected = sorted(rows[:-1], key=lambda row: (-row["a"], row["b"]))
+    assert result[1:] == expected
+    top = list(Sort(Rows(rows), keys[1:], limit=3))
+    assert [row["b"] for row in top] == [-1, 0, 1]
+
+def test_aggregate_without_rows_returns_one_group():
+    """Test: sin GROUP BY el agregado devuelve una fila aunque no haya filas"""
+    calls = [AggregateCall("n", "COUNT", None), AggregateCall("s", "SUM", "a")]
+    assert list(Aggregate(Rows([]), [], calls)) == [{"n": 0, "s": None}]
+
+def test_group_by_order_by_and_limit(admin):
+    """Test: GROUP BY, ORDER BY y LIMIT se resuelven con el árbol de operadores"""
+    result = admin.execute("""
+        SELECT dept, COUNT(*) AS n, SUM(salary), AVG(salary) AS avg_salary, MAX(id)
+        FROM testdb.public.emp WHERE id >= 3 GROUP BY dept ORDER BY dept DESC LIMIT 2;
+    """)
+    assert result == [
+        {"dept": "d2", "n": 9, "sum": 1530, "avg_salary": 170.0, "max": 29},
+        {"dept": "d1", "n": 9, "sum": 1440, "avg_salary": 160.0, "max": 28},
+    ]
+    assert admin.execute("SELECT COUNT(DISTINCT dept) FROM testdb.public.emp;") == [{"count": 3}]
+
+def test_order_by_non_projected_column(admin):
+    """Test: se puede ordenar por una columna que no está en la proyección"""
+    result = admin.execute("SELECT dept FROM testdb.public.emp ORDER BY salary DESC LIMIT 3 OFFSET 1;")
+    assert result == [{"dept": "d1"}, {"dept": "d0"}, {"dept": "d2"}]
+
+def test_stream_yields_rows_lazily(admin):
+    """Test: stream devuelve las filas a medida que se leen"""
+    rows = admin.stream("SELECT id FROM testdb.public.emp WHERE salary > 100;")
+    assert next(rows) == {"id": 11}
+    assert [row["id"] for row in rows] == list(range(12, 30))
+    with pytest.raises(ValueError):
+        admin.stream("DELETE FROM testdb.public.emp WHERE id = 1;")
+
+def test_aggregate_rejects_loose_columns(admin):
+    """Test: una columna fuera de GROUP BY es un error"""
+    with pytest.raises(ValueError):
+        admin.execute("SELECT dept, salary, COUNT(*) FROM testdb.public.emp GROUP BY dept;")
+
+def test_array_scan_matches_row_scan(admin, monkeypatch):
+    """Test: filtros y agregados sobre columnas numéricas dan lo mismo con arrays que fila a fila"""
+    admin.execute("CREATE TABLE testdb.public.m (id INT, g INT, v BIGINT, x DOUBLE, ok BOOLEAN);")
+    values = ", ".join(f"({i}, {i % 4}, {i * 7 % 50}, {i % 9}.5, {1 if i % 3 else 0})" for i in range(600))
+    admin.execute(f"INSERT INTO testdb.public.m (id, g, v, x, ok) VALUES {values};")
+    admin.execute("DELETE FROM testdb.public.m WHERE id < 40;")
+    queries = [
+        "SELECT g, COUNT(*), SUM(v), AVG(x), MIN(v), MAX(x), COUNT(DISTINCT v) FROM testdb.public.m "
+        "WHERE v BETWEEN 5 AND 40 AND NOT ok = true GROUP BY g;",
+        "SELECT g, ok, SUM(ok), MAX(id) FROM testdb.public.m GROUP BY g, ok ORDER BY 1, 2;",
+        "SELECT COUNT(*), SUM(v) FROM testdb.public.m WHERE id > 1000;",
+        "SELECT id, x FROM testdb.public.m WHERE g IN (1, 3) OR x >= 8.5;",
+    ]
+    # el árbol usa los operadores de arrays
+    select = Select(admin.catalog)
+    assert isinstance(select.build(parse_one(queries[0]))[0].child, ArrayAggregate)
+    assert isinstance(select.build(parse_one(queries[3]))[0].child, ArrayScan)
+    with_arrays = [admin.execute(query) for query in queries]
+    monkeypatch.setattr(Select, "array_scan", lambda self, *args: None)
+    assert with_arrays == [admin.execute(query) for query in queries]
+    assert with_arrays[2] == [{"count": 0, "sum": None}]
+
+def test_scan_decodes_only_needed_columns(admin):
+    """Test: el scan solo decodifica las columnas que lee la consulta"""
+    select = Select(admin.catalog)
+    root, _ = select.build(parse_one("SELECT id FROM testdb.public.emp WHERE dept = 'd1' ORDER BY id DESC;"))
+    scan = root
+    while not isinstance(scan, SeqScan):
+        scan = scan.child
+    assert scan.columns == ["id", "dept"]
+    with scan:
+        # las filas del scan no traen salary
+        assert scan.next() == {"id": 0, "dept": "d0"}
+    root, _ = select.build(parse_one("SELECT COUNT(*) FROM testdb.public.emp WHERE dept = 'd2';"))
+    assert root.child.child.child.columns == ["dept"]
+    assert admin.execute("SELECT COUNT(*) FROM testdb.public.emp WHERE dept = 'd2';") == [{"count": 10}]
+
+def test_array_scan_reads_dirty_pages_without_writing(admin):
+    """Test: el scan con arrays ve las páginas sucias del pool sin escribirlas ni forzar el log"""
+    pool = get_buffer_pool()
+    admin.execute("CREATE TABLE testdb.public.n (id INT, v INT);")
+    admin.execute("INSERT INTO testdb.public.n (id, v) VALUES " + ", ".join(f"({i}, {i % 5})" for i in range(2000)) + ";")
+    # parte de las páginas en disco, el resto solo en el pool
+    pool.flush_all()
+    admin.execute("DELETE FROM testdb.public.n WHERE v = 0;")
+    admin.execute("INSERT INTO testdb.public.n (id, v) VALUES " + ", ".join(f"({i}, 7)" for i in range(2000, 3000)) + ";")
+    writes, flushed = pool.writes, pool.wal.flushed_lsn
+    result = admin.execute("SELECT v, COUNT(*) FROM testdb.public.n WHERE id >= 50 GROUP BY v;")
+    assert (pool.writes, pool.wal.flushed_lsn) == (writes, flushed)
+    assert sorted((row["v"], row["count"]) for row in result) == [(1, 390), (2, 390), (3, 390), (4, 390), (7, 1000)]
@@ -0,0 +1,68 @@
+# test_planner.py
+import shutil
+import pytest
+from catalog.catalog_manager import CatalogManager
+from engine.executor import PKAdmin
+from engine.planner import Planner
+from models.enum.access_method_enum import AccessMethod
+from query.parser_sql import parser_sql
+
+@pytest.fixture
+def admin(tmp_path):
+    cm    = CatalogManager(tmp_path)
+    admin = PKAdmin(catalog=cm)
+    admin.execute("CREATE DATABASE testdb;")
+    admin.execute("CREATE SCHEMA testdb.public;")
+    admin.execute("CREATE TABLE testdb.public.emp (id INT, name VARCHAR(10), salary INT);")
+    values = ", ".join(f"({i}, 'n{i % 50}', {i * 10})" for i in range(2000))
+    admin.execute(f"INSERT INTO testdb.public.emp (id, name, salary) VALUES {values};")
+    yield admin
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+def choose(admin, sql):
+    where = parser_sql(sql)[0].args.get("where")
+    return Planner(admin.catalog).choose("testdb", "public", "emp", where.this if where else None)
+
+def test_primary_key_lookup_uses_btree(admin):
+    """Test: una igualdad sobre la pk usa el B+ tree y no recorre el heap"""
+    path = choose(admin, "SELECT * FROM testdb.public.emp WHERE id = 1234;")
+    assert path.method == AccessMethod.BTREE_POINT
+    assert admin.execute("SELECT * FROM testdb.public.emp WHERE id = 1234;") == \
+        {"id": 1234, "name": "n34", "salary": 12340}
+
+def test_unindexed_column_uses_seq_scan(admin):
+    """Test: sin índice sobre la columna se recorre el heap y se filtra"""
+    path = choose(admin, "SELECT * FROM testdb.public.emp WHERE salary = 500;")
+    assert path.method == AccessMethod.SEQ_SCAN
+    assert admin.execute("SELECT * FROM testdb.public.emp WHERE salary = 500;") == \
+        [{"id": 50, "name": "n0", "salary": 500}]
+
+def test_hash_index_is_chosen_for_equality(admin):
+    """Test: una igualdad sobre una columna con índice hash usa el hash"""
+    admin.execute("CREATE INDEX idx_name ON testdb.public.emp USING hash(name);")
+    path = choose(admin, "SELECT * FROM testdb.public.emp WHERE name = 'n7';")
+    assert path.method == AccessMethod.HASH_POINT
+    rows = admin.execute("SELECT * FROM testdb.public.emp WHERE name = 'n7';")
+    assert sorted(row["id"] for row in rows) == list(range(7, 2000, 50))
+
+def test_isam_index_is_not_an_access_path(admin):
+    """Test: un índice ISAM guarda bloques y no record ids, así que no se usa como camino de acceso"""
+    admin.execute("CREATE INDEX idx_salary ON testdb.public.emp USING isam(salary);")
+    for salary in (140, 700, 19990):
+        sql = f"SELECT * FROM testdb.public.emp WHERE salary = {salary};"
+        assert choose(admin, sql).method == AccessMethod.SEQ_SCAN
+        assert admin.execute(sql) == [{"id": salary // 10, "name": f"n{salary // 10 % 50}", "salary": salary}]
+
+def test_between_on_unindexed_column_filters_rows(admin):
+    """Test: BETWEEN sobre una columna sin índice no usa el índice de otra columna"""
+    path = choose(admin, "SELECT * FROM testdb.public.emp WHERE salary BETWEEN 100 AND 130;")
+    assert path.method == AccessMethod.SEQ_SCAN
+    rows = admin.execute("SELECT * FROM testdb.public.emp WHERE salary BETWEEN 100 AND 130;")
+    assert [row["id"] for row in rows] == [10, 11, 12, 13]
+
+def test_residual_predicate_is_checked(admin):
+    """Test: las condiciones que el índice no resuelve se comprueban en cada fila"""
+    path = choose(admin, "SELECT * FROM testdb.public.emp WHERE id BETWEEN 100 AND 199 AND name = 'n20';")
+    assert path.method == AccessMethod.BTREE_RANGE
+    rows = admin.execute("SELECT * FROM testdb.public.emp WHERE id BETWEEN 100 AND 199 AND name = 'n20';")
+    assert [row["id"] for row in rows] == [120, 170]
@@ -0,0 +1,97 @@
+# test_statistics.py
+import random
+import shutil
+import pytest
+from catalog.catalog_manager import CatalogManager
+from catalog.statistics import column_statistics
+from engine.executor import PKAdmin
+from engine.operators.analyze import Analyze
+from engine.planner import Planner
+from models.enum.access_method_enum import AccessMethod
+from query.parser_sql import parser_sql
+
+@pytest.fixture
+def admin(tmp_path):
+    cm    = CatalogManager(tmp_path)
+    admin = PKAdmin(catalog=cm)
+    admin.execute("CREATE DATABASE testdb;")
+    admin.execute("CREATE SCHEMA testdb.public;")
+    admin.execute("CREATE TABLE testdb.public.orders (id INT, status VARCHAR(10), amount INT);")
+    # 95% de los pedidos están entregados
+    values = ", ".join(f"({i}, '{'open' if i % 20 == 0 else 'done'}', {i % 1000})" for i in range(4000))
+    admin.execute(f"INSERT INTO testdb.public.orders (id, status, amount) VALUES {values};")
+    yield admin
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+def choose(admin, sql):
+    where = parser_sql(sql)[0].args.get("where")
+    return Planner(admin.catalog).choose("testdb", "public", "orders", where.this)
+
+def test_analyze_stores_table_and_column_statistics(admin):
+    """Test: ANALYZE guarda filas, páginas y estadísticas por columna en el catálogo"""
+    assert admin.execute("ANALYZE testdb.public.orders;") == "1 tables analyzed"
+    table = admin.catalog.get_table("testdb", "public", "orders")
+    assert table.get_tab_tuples() == 4000
+    assert table.get_tab_pages() >= 1
+    assert [index.get_idx_tuples() for index in table.get_tab_indexes()] == [4000]
+
+    statistics = table.get_tab_statistics()
+    status = statistics.get_column("status")
+    assert status.null_frac == 0.0
+    assert status.get_distinct(4000) == 2
+    assert dict(status.mcv) == {"done": 0.95, "open": 0.05}
+    amount = statistics.get_column("amount")
+    assert (amount.min_value, amount.max_value) == (0, 999)
+    assert amount.range_fraction(0, 99) == pytest.approx(0.1, abs=0.02)
+    assert statistics.get_column("id").get_distinct(4000) == 4000
+
+def test_sample_extrapolates_row_count(admin):
+    """Test: con una muestra menor que la tabla el número de filas se extrapola"""
+    Analyze(admin.catalog, sample_rows=500).execute(parser_sql("ANALYZE testdb.public.orders;")[0])
+    statistics = admin.catalog.get_table("testdb", "public", "orders").get_tab_statistics()
+    assert statistics.sample_rows == 500
+    assert statistics.rows == pytest.approx(4000, rel=0.1)
+
+def test_planner_uses_most_common_values(admin):
+    """Test: el índice sólo se usa para el valor poco frecuente"""
+    admin.execute("CREATE INDEX idx_status ON testdb.public.orders USING hash(status);")
+    admin.execute("ANALYZE;")
+    assert choose(admin, "SELECT * FROM testdb.public.orders WHERE status = 'done';").method == AccessMethod.SEQ_SCAN
+    assert choose(admin, "SELECT * FROM testdb.public.orders WHERE status = 'open';").method == AccessMethod.HASH_POINT
+    rows = admin.execute("SELECT * FROM testdb.public.orders WHERE status = 'open';")
+    assert len(rows) == 200
+
+def test_statistics_are_refreshed_after_many_writes(admin):
+    """Test: tras muchas escrituras las estadísticas se recalculan solas"""
+    admin.execute("ANALYZE testdb.public.orders;")
+    admin.execute("INSERT INTO testdb.public.orders (id, status, amount) VALUES (4000, 'open', 1);")
+    assert admin.catalog.get_table("testdb", "public", "orders").get_tab_tuples() == 4000
+    values = ", ".join(f"({i}, 'open', 1)" for i in range(4001, 4500))
+    admin.execute(f"INSERT INTO testdb.public.orders (id, status, amount) VALUES {values};")
+    assert admin.catalog.get_table("testdb", "public", "orders").get_tab_tuples() == 4500
+
+def test_modification_count_survives_restart(admin, tmp_path):
+    """Test: las filas escritas desde el último ANALYZE se cuentan también tras reiniciar"""
+    admin.execute("ANALYZE testdb.public.orders;")
+    values = ", ".join(f"({i}, 'open', 1)" for i in range(4000, 4300))
+    admin.execute(f"INSERT INTO testdb.public.orders (id, status, amount) VALUES {values};")
+    assert admin.catalog.get_table("testdb", "public", "orders").get_tab_modifications() == 300
+
+    # reinicio: un catálogo nuevo sobre el mismo directorio
+    restarted = PKAdmin(catalog=CatalogManager(tmp_path))
+    assert restarted.catalog.get_table("testdb", "public", "orders").get_tab_modifications() == 300
+    values = ", ".join(f"({i}, 'open', 1)" for i in range(4300, 4500))
+    restarted.execute(f"INSERT INTO testdb.public.orders (id, status, amount) VALUES {values};")
+    table = restarted.catalog.get_table("testdb", "public", "orders")
+    assert table.get_tab_tuples() == 4500
+    assert table.get_tab_modifications() == 0
+
+def test_histogram_interpolates_ranges():
+    """Test: el histograma equi-depth estima rangos sobre datos sesgados"""
+    rng = random.Random(7)
+    values = [int(rng.expovariate(1 / 100)) for _ in range(10000)] + [None] * 1000
+    stats = column_statistics(values, len(values))
+    assert stats.null_frac == pytest.approx(1000 / 11000)
+    actual = sum(1 for v in values if v is not None and v <= 50) / len(values)
+    assert stats.range_fraction(None, 50) == pytest.approx(actual, abs=0.02)
+    assert stats.eq_fraction(100000, len(values)) == 0.0
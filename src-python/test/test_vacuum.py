@@ -0,0 +1,79 @@
+import shutil
+import pytest
+from catalog.catalog_manager import CatalogManager
+from engine.executor import PKAdmin
+from engine.operators.vacuum import Vacuum
+from query.parser_sql import parser_sql
+from storage.indexing.heap import HeapFile
+
+@pytest.fixture
+def admin(tmp_path):
+    cm    = CatalogManager(tmp_path)
+    admin = PKAdmin(catalog=cm)
+    admin.execute("CREATE DATABASE testdb;")
+    admin.execute("CREATE SCHEMA testdb.public;")
+    admin.execute("CREATE TABLE testdb.public.users (id INT, name VARCHAR(10));")
+    values = ", ".join(f"({i}, 'u{i}')" for i in range(500))
+    admin.execute(f"INSERT INTO testdb.public.users (id, name) VALUES {values};")
+    yield admin
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+def open_heap(admin):
+    catalog = admin.catalog
+    table = catalog.get_table("testdb", "public", "users")
+    return HeapFile(table, catalog.path_builder.table_data("testdb", "public", "users"))
+
+def test_vacuum_truncates_dead_pages(admin):
+    """Test: VACUUM moves the live rows to the front and cuts the empty pages."""
+    with open_heap(admin) as heap:
+        pages = heap.get_page_count()
+        for rid, row, _ in list(heap.scan()):
+            if row[0] % 2:
+                heap.delete(rid)
+
+    result = admin.execute("VACUUM testdb.public.users;")
+    with open_heap(admin) as heap:
+        assert heap.get_page_count() < pages
+        assert result.endswith(f"{pages - heap.get_page_count()} pages freed")
+        rows = sorted(row[0] for _, row, active in heap.scan() if active)
+    assert rows == list(range(0, 500, 2))
+
+def test_vacuum_remaps_index_entries(admin):
+    """Test: Index lookups find the moved rows at their new positions."""
+    admin.execute("CREATE INDEX idx_id ON testdb.public.users USING btree(id);")
+    with open_heap(admin) as heap:
+        tail = 500 - heap.slots_per_page
+    for i in range(150):
+        admin.execute(f"DELETE FROM testdb.public.users WHERE id = {i};")
+
+    result = Vacuum(admin.catalog, chunk_size=7).execute(parser_sql("VACUUM testdb.public.users")[0])
+    assert result == f"{tail} rows moved, 1 pages freed"
+    assert admin.execute("SELECT * FROM testdb.public.users WHERE id = 499;") == {"id": 499, "name": "u499"}
+    assert admin.execute("SELECT * FROM testdb.public.users WHERE id = 50;") is None
+
+def test_vacuum_requires_table(admin):
+    """Test: VACUUM without a table name is rejected."""
+    with pytest.raises(ValueError):
+        admin.execute("VACUUM")
+
+def test_vacuum_keeps_hash_and_isam_indexes(admin):
+    """Test: VACUUM remaps a secondary hash index and builds the sparse ISAM index again."""
+    admin.execute("CREATE INDEX idx_name ON testdb.public.users USING hash(name);")
+    admin.execute("CREATE INDEX idx_isam ON testdb.public.users USING isam(id);")
+    for i in range(145):
+        admin.execute(f"DELETE FROM testdb.public.users WHERE id = {i};")
+    admin.execute("VACUUM testdb.public.users;")
+
+    catalog = admin.catalog
+    table = catalog.get_table("testdb", "public", "users")
+    indexes = {index.get_idx_name(): catalog.open_index(table, index) for index in table.get_tab_indexes()}
+    with open_heap(admin) as heap:
+        live = [(rid, row) for rid, row, active in heap.scan() if active]
+    assert len(live) == 355
+    for rid, row in live:
+        assert indexes["idx_name"].search_all(row[1]) == [rid]
+    # el ISAM guarda el bloque de cada décima fila, no su record id
+    isam = indexes["idx_isam"]
+    for i, (_, row) in enumerate(live):
+        assert isam.search(row[0]) == (i // 10 if i % 10 == 0 else None)
+    assert admin.execute("SELECT * FROM testdb.public.users WHERE name = 'u499';") == [{"id": 499, "name": "u499"}]
@@ -0,0 +1,104 @@
+import os
+import shutil
+import threading
+import pytest
+from catalog.catalog_manager import CatalogManager
+from engine.executor import PKAdmin
+from models.enum.durability_enum import Durability
+from storage.disk import paged_file as paged_files
+from storage.disk.buffer_pool import get_buffer_pool
+from storage.disk.paged_file import open_paged_file
+from storage.disk.wal import WriteAheadLog
+
+def crash():
+    # loses every page not written back and forgets the open files and log
+    pool = get_buffer_pool()
+    for paged_file in list(paged_files._open_files.values()):
+        pool.discard_file(paged_file)
+        if paged_file.fd >= 0:
+            os.close(paged_file.fd)
+            paged_file.fd = -1
+    paged_files._open_files.clear()
+    pool.unsynced.clear()
+    if pool.wal is not None:
+        pool.wal.close()
+        pool.wal = None
+
+@pytest.fixture
+def wal(tmp_path):
+    wal = WriteAheadLog(tmp_path / "wal")
+    yield wal
+    wal.close()
+
+def test_replay_applies_pages_in_order(wal, tmp_path):
+    """Test: Replay writes the logged page images and truncations into the files."""
+    path = str(tmp_path / "data.dat")
+    wal.append_pages([(path, 0, b"a" * 8), (path, 8, b"b" * 8)])
+    wal.append_pages([(path, 0, b"c" * 8)])
+    wal.log_truncate(path, 12)
+    wal.flush_all()
+    replayed = WriteAheadLog(tmp_path / "wal")
+    assert replayed.replay() == 4
+    with open(path, "rb") as data:
+        assert data.read() == b"c" * 8 + b"b" * 4
+    assert [os.path.getsize(path) for _, path in replayed.segments()] == [0]
+    assert replayed.read_checkpoint() == replayed.next_lsn == 5
+
+def test_replay_stops_at_torn_record(wal, tmp_path):
+    """Test: A record cut by a crash and everything after it are ignored."""
+    path = str(tmp_path / "data.dat")
+    wal.append_pages([(path, 0, b"a" * 8)])
+    wal.append_pages([(path, 8, b"b" * 8)])
+    _, segment = wal.segments()[-1]
+    with open(segment, "r+b") as log:
+        log.truncate(os.path.getsize(segment) - 3)
+    assert WriteAheadLog(tmp_path / "wal").replay() == 1
+    with open(path, "rb") as data:
+        assert data.read() == b"a" * 8
+
+def test_group_commit_shares_fsyncs(tmp_path):
+    """Test: Statements committing together are covered by fewer fsyncs."""
+    wal = WriteAheadLog(tmp_path / "wal", group_commit_delay=0.05)
+    barrier = threading.Barrier(8)
+
+    def commit(i):
+        barrier.wait()
+        wal.flush(wal.append_pages([(str(tmp_path / "data.dat"), i * 8, b"x" * 8)])[0])
+
+    threads = [threading.Thread(target=commit, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert wal.flushed_lsn == 8
+    assert wal.syncs < 8
+    wal.close()
+
+def test_pages_are_logged_before_write_back(tmp_path):
+    """Test: A page reaches its data file only after its image is in the log."""
+    pool = get_buffer_pool()
+    wal = paged_files.open_write_ahead_log(tmp_path / "wal")
+    paged_file = open_paged_file(tmp_path / "data.dat", 64)
+    paged_file.write_page(0, b"z" * 64)
+    assert wal.flushed_lsn < pool.log_dirty_pages() == wal.written_lsn
+    paged_file.flush()
+    assert wal.flushed_lsn >= wal.written_lsn
+    assert [record[2] for record in wal.records()] == [paged_file.path]
+
+def test_committed_rows_survive_a_crash(tmp_path):
+    """Test: Rows of a committed statement are replayed when the catalog opens again."""
+    admin = PKAdmin(catalog=CatalogManager(tmp_path), durability=Durability.COMMIT)
+    admin.execute("CREATE DATABASE testdb;")
+    admin.execute("CREATE SCHEMA testdb.public;")
+    admin.execute("CREATE TABLE testdb.public.users (id INT, name VARCHAR(10));")
+    admin.execute("CREATE INDEX idx_id ON testdb.public.users USING btree(id);")
+    admin.execute("INSERT INTO testdb.public.users (id, name) VALUES (1, 'Alice'), (2, 'Bob');")
+
+    data_path = admin.catalog.path_builder.table_data("testdb", "public", "users")
+    crash()
+    assert os.path.getsize(data_path) == 0
+
+    admin = PKAdmin(catalog=CatalogManager(tmp_path))
+    assert admin.execute("SELECT * FROM testdb.public.users WHERE id = 2;") == {"id": 2, "name": "Bob"}
+    assert len(admin.execute("SELECT * FROM testdb.public.users;")) == 2
+    shutil.rmtree(tmp_path, ignore_errors=True)